@@ -0,0 +1,68 @@
+import secrets
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import FileResponse
+from app.core.config import settings
+from app.core.profiling import profile_store
+from app.services.reembedding import COLLECTIONS, embedding_status, enqueue_reembedding
+
+router = APIRouter()
+
+def _require(expected: Optional[str], token: Optional[str], setting: str, header: str):
+    # Admin endpoints are disabled until their token is configured
+    if not expected:
+        raise HTTPException(status_code=403, detail=f"Disabled: set {setting} to enable")
+    if not secrets.compare_digest(token or "", expected):
+        raise HTTPException(status_code=403, detail=f"Invalid {header}")
+
+def _check_token(token: Optional[str]):
+    _require(settings.PROFILING_TOKEN, token, "PROFILING_TOKEN", "X-Profile-Token")
+
+def _check_admin_token(token: Optional[str]):
+    _require(settings.ADMIN_TOKEN, token, "ADMIN_TOKEN", "X-Admin-Token")
+
+@router.get("/admin/profiles")
+async def list_profiles(x_profile_token: Optional[str] = Header(None)):
+    """Saved request profiles, newest first (method, route, status, duration, samples)."""
+    _check_token(x_profile_token)
+    return {"mode": settings.PROFILING_MODE, "profiles": profile_store.list()}
+
+@router.get("/admin/profiles/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    kind: str = Query("folded", pattern="^(folded|memory|meta)$"),
+    x_profile_token: Optional[str] = Header(None),
+):
+    """
+    kind=folded: folded stacks for flamegraph.pl / speedscope / inferno.
+    kind=memory: peak / net traced memory and top allocation sites (X-Profile: memory requests).
+    kind=meta: the listing entry.
+    """
+    _check_token(x_profile_token)
+    path = profile_store.path(profile_id, kind)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    media_type = "text/plain" if kind == "folded" else "application/json"
+    return FileResponse(path, media_type=media_type, filename=path.name)
+
+@router.get("/admin/embeddings")
+async def list_embeddings(x_admin_token: Optional[str] = Header(None)):
+    """Per collection: serving generation, stored vector names, this process's model version, stale points."""
+    _check_admin_token(x_admin_token)
+    return {"collections": [embedding_status(name) for name in COLLECTIONS]}
+
+@router.post("/admin/reembed/{collection}")
+async def reembed_collection(
+    collection: str,
+    drop_previous: bool = Query(False),
+    allow_missing: bool = Query(False),
+    x_admin_token: Optional[str] = Header(None),
+):
+    """
+    Re-embed a collection with this process's model version in the background and switch
+    to it when done (progress: GET /jobs/{job_id}). Serving continues meanwhile.
+    """
+    _check_admin_token(x_admin_token)
+    if collection not in COLLECTIONS:
+        raise HTTPException(status_code=404, detail="Unknown collection")
+    return {"job_id": enqueue_reembedding(collection, drop_previous, allow_missing)}
@@ -1,23 +1,32 @@
 
-from fastapi import APIRouter, Body
+from fastapi import APIRouter, Body, Depends
+from fastapi.responses import StreamingResponse
 from app.services.conversation_service import conversation_service
 from app.services.semantic_memory import semantic_memory
 from app.services.memory_service import memory_service
 from app.services.llm_service import llm_service
+from app.api.session import get_session_id
+from app.api.sse import sse
+import logging
+from app.core.logging import get_logger, log_sampled
+from app.core.tracing import traced
+import re
+
+logger = get_logger(__name__)
 
 router = APIRouter()
 
-@router.post("/chat/query")
-async def chat_query(text: str = Body(..., embed=True)):
+@traced("chat.retrieve")
+def _retrieve(text: str, session_id: str):
     """
-    Process a text query.
-    Uses Semantic Vector Search + Server-Side Context.
+    Retrieval half of the chat pipeline: context, entity/semantic search, media merging.
+    Returns (response, llm_context). When llm_context is None the response is final;
+    otherwise the caller fills response["text"] from the LLM with llm_context.
     """
-    text = text.strip()
     lower_text = text.lower()
     
     # 1. Retrieve Context
-    context = conversation_service.get_context()
+    context = conversation_service.get_context(session_id)
     context_name = context.get("name") if context else None
     
     # 2. Check for Follow-up ("he", "she", "where", "look")
@@ -31,33 +40,40 @@ async def chat_query(text: str = Body(..., embed=True)):
          return {
              "status": "unknown",
              "text": "I'm not sure who you are referring to. Who are we talking about?"
-         }
+         }, None
     
     
+    # Retrieval plan (no LLM calls here; the answer is generated once by the caller):
+    #   a) subject: direct entity match, else semantic search (context-filtered for follow-ups)
+    #   b) records: all stored points for the subject's name (media + gallery)
+    # Per-request memo so a) and b) don't scroll the collections twice for the same query.
+    lookups = {}
+    def lookup(query: str):
+        key = query.lower()
+        if key not in lookups:
+            lookups[key] = memory_service.search_by_text(query)
+        return lookups[key]
+
     # 0. Direct Entity Search (Person/Object Name)
-    entity_matches = memory_service.search_by_text(text)
+    entity_matches = lookup(text)
     if entity_matches:
         # High confidence match on name
-        print(f"Direct Entity Match: {entity_matches[0].payload.get('name')}")
+        logger.debug("Direct entity match: %s", entity_matches[0].payload.get('name'))
         payload = entity_matches[0].payload
-        name = payload.get("name")
-        # Construct text using LLM
-        desc = llm_service.generate_response(user_text=text, context=payload)
-        matches = [{"name": name, "text": desc, "score": 1.0, "payload": payload}]
+        matches = [{"name": payload.get("name"), "score": 1.0, "payload": payload}]
     elif context_name and is_followup and "who is" not in lower_text:
         # Contextual Search: Filter by current person
         # e.g. "How does he look?" -> Search "How does he look" filtered by name="Emraan"
-        print(f"Context Search for {context_name}: {text}")
+        logger.debug("Context search for %s: %s", context_name, text)
         matches = semantic_memory.search_knowledge(text, context_name=context_name)
     else:
         # Global Search
         # e.g. "Who is Emraan?" or "Find the doctor"
-        print(f"Global Search: {text}")
+        logger.debug("Global search: %s", text)
         matches = semantic_memory.search_knowledge(text)
     
     if matches:
         best_match = matches[0] # Payload from semantic memory (Text only)
-        text_content = best_match.get("text") or f"I found a memory about {best_match.get('name', 'them')}."
         name = best_match.get("name")
         
         full_person = None
@@ -67,7 +83,7 @@ async def chat_query(text: str = Body(..., embed=True)):
         
         if name:
              # Update: Always search to get Gallery/Duplicates
-             original_matches = memory_service.search_by_text(name)
+             original_matches = lookup(name)
              if original_matches:
                  full_person = original_matches[0].payload
                  
@@ -92,9 +108,9 @@ async def chat_query(text: str = Body(..., embed=True)):
 
         # Update Context
         if full_person:
-            conversation_service.update_context(full_person)
+            conversation_service.update_context(full_person, session_id)
         else:
-             conversation_service.update_context(best_match)
+             conversation_service.update_context(best_match, session_id)
         
         # Prepare context for LLM
         llm_context = full_person if full_person else best_match
@@ -102,9 +118,6 @@ async def chat_query(text: str = Body(..., embed=True)):
             llm_context["has_audio"] = bool(audio_base64)
             llm_context["has_image"] = bool(image_base64)
 
-        # Generate Response via LLM
-        final_text = llm_service.generate_response(user_text=text, context=llm_context)
-
         # Build Gallery (Always helpful for identity)
         gallery = []
         if original_matches:
@@ -137,16 +150,72 @@ async def chat_query(text: str = Body(..., embed=True)):
 
         response_data = {
             "status": "found",
-            "text": final_text,
+            "text": None,
             "person": full_person if full_person else best_match,
             "audio_base64": final_audio,
             "image_base64": image_base64,
             "gallery": final_gallery
         }
-        print(f"DEBUG RESPONSE: IntentVoice={voice_intent} IntentGallery={gallery_intent} Audio={bool(final_audio)} Gallery={len(final_gallery)}")
-        return response_data
+        log_sampled(logger, logging.DEBUG, "Chat response: voice_intent=%s gallery_intent=%s audio=%s gallery=%d",
+                    voice_intent, gallery_intent, bool(final_audio), len(final_gallery))
+        return response_data, llm_context
 
     return {
         "status": "unknown",
         "text": "I couldn't find anything relevant in my memory."
-    }
+    }, None
+
+@router.post("/chat/query")
+async def chat_query(text: str = Body(..., embed=True), session_id: str = Depends(get_session_id)):
+    """
+    Process a text query.
+    Uses Semantic Vector Search + Server-Side Context.
+    """
+    text = text.strip()
+    response, llm_context = _retrieve(text, session_id)
+    if llm_context is not None:
+        # Generate Response via LLM
+        response["text"] = await llm_service.generate_response(user_text=text, context=llm_context)
+    return response
+
+# End of a sentence followed by whitespace: flush it so the client can start speaking
+SENTENCE_END = re.compile(r"[.!?](?=\s)")
+
+@router.post("/chat/query/stream")
+async def chat_query_stream(text: str = Body(..., embed=True), session_id: str = Depends(get_session_id)):
+    """
+    Streaming variant of /chat/query (Server-Sent Events).
+    Events: 'meta' (status, person, media; text is null while generating),
+    'token' (LLM chunks), 'sentence' (each completed sentence, e.g. to start
+    web-speech TTS on the first one) and 'done' (full text).
+    """
+    text = text.strip()
+    response, llm_context = _retrieve(text, session_id)
+
+    async def event_stream():
+        yield sse("meta", response)
+        if llm_context is None:
+            yield sse("sentence", {"text": response["text"]})
+            yield sse("done", {"text": response["text"]})
+            return
+
+        full_text = ""
+        pending = ""
+        async for chunk in llm_service.stream_response(user_text=text, context=llm_context):
+            full_text += chunk
+            pending += chunk
+            yield sse("token", {"text": chunk})
+            match = SENTENCE_END.search(pending)
+            while match:
+                sentence, pending = pending[:match.end()].strip(), pending[match.end():]
+                yield sse("sentence", {"text": sentence})
+                match = SENTENCE_END.search(pending)
+        if pending.strip():
+            yield sse("sentence", {"text": pending.strip()})
+        yield sse("done", {"text": full_text})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,16 +1,27 @@
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Form
+from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Form, Query, Response, Depends
 from app.services.face_service import face_service
 from app.services.object_service import detector as object_service
 from app.services.memory_service import memory_service
-from app.services.tts_service import tts_service
+from app.services.object_classifier import object_classifier
+from app.core.config import settings
+from app.core.metrics import record_recognition
+from app.services.tts_service import tts_service, greeting
+from app.services.media_utils import encode_image_base64
+from app.services.job_queue import job_queue
+from app.services.enrollment_jobs import enqueue_enrichment
+from app.services.semantic_indexer import semantic_indexer
+from app.services.speaker_service import speaker_service
+from app.services.fusion_service import fusion_recognizer
+from app.services.conversation_service import conversation_service
+from app.api.session import get_session_id
+from app.core.logging import get_logger
 import shutil
 from pathlib import Path
 import uuid
 from typing import Dict, Any
-import base64
-from PIL import Image
-import io
+
+logger = get_logger(__name__)
 
 router = APIRouter()
 
@@ -21,20 +32,6 @@ TEMP_DIR.mkdir(exist_ok=True)
 ENROLL_DIR = Path("photo/enrolled")
 ENROLL_DIR.mkdir(parents=True, exist_ok=True)
 
-def encode_image_base64(image_path: str):
-    """Resize and encode image to base64 for storage."""
-    try:
-        with Image.open(image_path) as img:
-            # Resize to thumbnail to save space (e.g., 300px max)
-            img.thumbnail((300, 300))
-            buffered = io.BytesIO()
-            img.convert("RGB").save(buffered, format="JPEG", quality=70)
-            img_str = base64.b64encode(buffered.getvalue()).decode("utf-8")
-            return f"data:image/jpeg;base64,{img_str}"
-    except Exception as e:
-        print(f"Error encoding image: {e}")
-        return None
-
 @router.post("/recognize/person")
 async def recognize_person(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
     """
@@ -54,6 +51,7 @@ async def recognize_person(background_tasks: BackgroundTasks, file: UploadFile =
         embedding = face_service.generate_embedding(str(temp_path))
         
         if not embedding:
+            record_recognition("face", "no_face")
             return {"status": "no_face_detected", "person": None}
             
         # 3. Search Memory
@@ -61,21 +59,18 @@ async def recognize_person(background_tasks: BackgroundTasks, file: UploadFile =
         
         if matches:
              best_match = matches[0]
-             # Check threshold (Cosine Similarity > 0.4 implies match)
-             if best_match.score > 0.4:
+             # Check threshold (cosine similarity, see scripts/evaluate_thresholds.py)
+             if best_match.score > settings.FACE_MATCH_THRESHOLD:
                  name = best_match.payload.get("name", "Unknown")
                  relation = best_match.payload.get("relation", "Unknown")
                  notes = best_match.payload.get("notes", "")
                  
-                 # TTS Feedback
-                 greeting = f"Hello {name}."
-                 if notes:
-                      greeting += f" {notes}"
-                 elif relation != "Unknown":
-                     greeting += f" You are a {relation}."
+                 # TTS Feedback (pre-synthesized at enrollment: GET /tts?text=...)
+                 greeting_text = greeting(name, relation, notes)
                  
-                 # background_tasks.add_task(tts_service.speak, greeting)
+                 # background_tasks.add_task(tts_service.speak, greeting_text)
 
+                 record_recognition("face", "identified")
                  return {
                      "status": "identified",
                      "person": {
@@ -86,9 +81,11 @@ async def recognize_person(background_tasks: BackgroundTasks, file: UploadFile =
                          "notes": notes,
                          "image": best_match.payload.get("image_base64", None),
                          "audio": best_match.payload.get("audio_base64", None)
-                     }
+                     },
+                     "greeting": greeting_text
                  }
 
+        record_recognition("face", "unknown")
         return {"status": "unknown", "person": None}
 
     except Exception as e:
@@ -98,82 +95,116 @@ async def recognize_person(background_tasks: BackgroundTasks, file: UploadFile =
         if temp_path.exists():
             temp_path.unlink()
 
-@router.post("/remember/person")
-async def remember_person(
-    background_tasks: BackgroundTasks,
-    name: str = Form(...),
-    relation: str = Form("Acquaintance"),
-    notes: str = Form(None),
-    age: int = Form(None),
-    file: UploadFile = File(...),
-    audio_file: UploadFile = File(None)
-):
-    """Enroll a new person with optional voice sample."""
+@router.post("/recognize/voice")
+async def recognize_voice(file: UploadFile = File(...)):
+    """
+    Identify a person from a short speech clip (one vector search over enrolled voice samples).
+    Works when the camera can't see the face.
+    """
     file_id = str(uuid.uuid4())
-    filename = f"{name.replace(' ', '_')}_{file_id}.jpg"
-    perm_path = ENROLL_DIR / filename
+    temp_path = TEMP_DIR / f"{file_id}{Path(file.filename or '').suffix or '.webm'}"
     
-    # Audio Path
-    audio_b64 = None
-    if audio_file:
-         audio_path = Path("audio/enrolled") / f"{name.replace(' ', '_')}_{file_id}.webm"
-         audio_path.parent.mkdir(parents=True, exist_ok=True)
-         try:
-             with open(audio_path, "wb") as buffer:
-                 shutil.copyfileobj(audio_file.file, buffer)
-             
-             # Encode for Cloud
-             with open(audio_path, "rb") as f:
-                 audio_b64 = base64.b64encode(f.read()).decode("utf-8")
-         except Exception as e:
-             print(f"Error saving audio: {e}")
-
     try:
-        # Save Image locally as backup
-        with open(perm_path, "wb") as buffer:
+        with open(temp_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
             
-        # Generate Embedding
-        embedding = face_service.generate_embedding(str(perm_path))
-        
+        embedding = speaker_service.generate_embedding(str(temp_path))
         if not embedding:
-            perm_path.unlink()
-            return {"status": "error", "message": "No face detected in enrollment photo."}
-
-        # Encode Image for Cloud Storage
-        img_b64 = encode_image_base64(str(perm_path))
-        
-        # 4. Generate Avatar
-        from app.services.avatar_service import avatar_service
-        avatar_url = avatar_service.generate_avatar(str(perm_path))
+            record_recognition("voice", "no_speech")
+            return {"status": "no_speech_detected", "person": None}
             
-        # Store in Qdrant
-        metadata = {
-            "name": name,
-            "relation": relation,
-            "age": age,
-            "type": "person",
-            "notes": notes or f"This is {name}, your {relation}.",
-            "image_base64": img_b64,
-            "avatar_url": avatar_url
-        }
-        if audio_b64:
-            metadata["audio_base64"] = audio_b64 # Store voice sample in cloud!
+        matches = memory_service.search_voice(embedding)
+        if matches and matches[0].score > settings.SPEAKER_MATCH_THRESHOLD:
+            best_match = matches[0]
+            record_recognition("voice", "identified")
+            return {
+                "status": "identified",
+                "person": {
+                    "name": best_match.payload.get("name", "Unknown"),
+                    "relation": best_match.payload.get("relation", "Unknown"),
+                    "confidence": best_match.score,
+                    "id": best_match.payload.get("person_id"),
+                    "notes": best_match.payload.get("notes", "")
+                }
+            }
+
+        record_recognition("voice", "unknown")
+        return {"status": "unknown", "person": None}
 
-        memory_service.store_face_memory(
-            person_id=name.replace(" ", "_"),
-            embedding=embedding,
-            metadata=metadata
-        )
-        
-        msg = f"I have enrolled {name}."
-        
-        return {"status": "stored", "name": name, "avatar_url": avatar_url}
-        
     except Exception as e:
-        if perm_path.exists():
-             perm_path.unlink()
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+
+@router.post("/recognize/fusion")
+async def recognize_fusion(
+    file: UploadFile = File(None),
+    audio_file: UploadFile = File(None),
+    use_context: bool = Form(True),
+    session_id: str = Depends(get_session_id)
+):
+    """
+    Identify a person from any subset of camera frame and speech clip, plus the
+    current conversation context. Returns one calibrated decision
+    (identified / uncertain / unknown) with per-modality scores and timings.
+    """
+    file_id = str(uuid.uuid4())
+    inputs, temp_paths = {}, []
+    try:
+        for modality, upload, default_ext in (("face", file, ".jpg"), ("voice", audio_file, ".webm")):
+            if upload is None:
+                continue
+            path = TEMP_DIR / f"{file_id}_{modality}{Path(upload.filename or '').suffix or default_ext}"
+            with open(path, "wb") as buffer:
+                shutil.copyfileobj(upload.file, buffer)
+            temp_paths.append(path)
+            inputs[modality] = str(path)
+
+        context = conversation_service.get_context(session_id) if use_context else None
+        result = fusion_recognizer.recognize(inputs, context=context)
+        if result["status"] == "no_input":
+            raise HTTPException(status_code=400, detail="Send a frame (file) and/or a speech clip (audio_file)")
+
+        # Chat follow-ups ("where does she live?") refer to whoever was just recognized
+        if result["status"] == "identified":
+            person = result["person"]
+            conversation_service.update_context({
+                "person_id": person["id"], "name": person["name"], "relation": person["relation"],
+                "notes": person["notes"]
+            }, session_id)
+        record_recognition("fusion", result["status"])
+        return result
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        for path in temp_paths:
+            if path.exists():
+                path.unlink()
+
+@router.post("/remember/person")
+async def remember_person(
+    background_tasks: BackgroundTasks,
+    name: str = Form(...),
+    relation: str = Form("Acquaintance"),
+    notes: str = Form(None),
+    age: int = Form(None),
+    file: UploadFile = File(...),
+    audio_file: UploadFile = File(None)
+):
+    """
+    Enroll a new person with optional voice sample.
+    Returns once the face embedding is stored; thumbnail, voice sample and avatar
+    run on the job queue (poll /jobs/{job_id}). Chat learns the person shortly
+    after (debounced semantic re-index).
+    """
+    return _enroll(
+        collection="faces", type_="person",
+        name=name, relation=relation, notes=notes, age=age, file=file, audio_file=audio_file
+    )
 
 @router.post("/remember/patient")
 async def remember_patient(
@@ -186,25 +217,32 @@ async def remember_patient(
     audio_file: UploadFile = File(None)
 ):
     """Enroll a new PATIENT/Person via Caregiver (Stored in 'patients' collection)"""
+    return _enroll(
+        collection="patients", type_="patient_contact",
+        name=name, relation=relation, notes=notes, age=age, file=file, audio_file=audio_file
+    )
+
+def _enroll(collection: str, type_: str, name: str, relation: str, notes: str, age: int,
+            file: UploadFile, audio_file: UploadFile = None):
+    """Shared by /remember/person and /remember/patient: store the face now, enrich in the background."""
     file_id = str(uuid.uuid4())
     filename = f"{name.replace(' ', '_')}_{file_id}.jpg"
     perm_path = ENROLL_DIR / filename
     
-    # Audio Path
-    audio_b64 = None
+    # Audio Path (encoded by the enrichment job)
+    audio_path = None
     if audio_file:
          audio_path = Path("audio/enrolled") / f"{name.replace(' ', '_')}_{file_id}.webm"
          audio_path.parent.mkdir(parents=True, exist_ok=True)
          try:
              with open(audio_path, "wb") as buffer:
                  shutil.copyfileobj(audio_file.file, buffer)
-             with open(audio_path, "rb") as f:
-                 audio_b64 = base64.b64encode(f.read()).decode("utf-8")
          except Exception as e:
-             print(f"Error saving audio: {e}")
+             logger.warning("Error saving audio: %s", e)
+             audio_path = None
 
     try:
-        # Save Image
+        # Save Image locally (source for thumbnail / avatar / re-embedding)
         with open(perm_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
             
@@ -215,39 +253,54 @@ async def remember_patient(
             perm_path.unlink()
             return {"status": "error", "message": "No face detected in enrollment photo."}
 
-        # Encode for storage
-        img_b64 = encode_image_base64(str(perm_path))
-        
-        # Generate Avatar
-        from app.services.avatar_service import avatar_service
-        avatar_url = avatar_service.generate_avatar(str(perm_path))
-            
-        # Store in Qdrant PATIENTS collection
+        # Store in Qdrant (searchable immediately)
         metadata = {
             "name": name,
             "relation": relation,
             "age": age,
-            "type": "patient_contact",
+            "type": type_,
             "notes": notes or f"This is {name}, your {relation}.",
-            "image_base64": img_b64,
-            "avatar_url": avatar_url
+            "source_path": str(perm_path)
         }
-        if audio_b64:
-            metadata["audio_base64"] = audio_b64
-
-        memory_service.store_patient_memory(
+        store = memory_service.store_face_memory if collection == "faces" else memory_service.store_patient_memory
+        point_id = store(
             person_id=name.replace(" ", "_"),
             embedding=embedding,
             metadata=metadata
         )
+
+        job_id = enqueue_enrichment(collection, point_id, metadata, str(perm_path), str(audio_path) if audio_path else None)
+        semantic_indexer.schedule(name)
         
-        return {"status": "stored", "name": name, "avatar_url": avatar_url}
+        return {"status": "stored", "name": name, "avatar_url": None, "job_id": job_id}
         
     except Exception as e:
         if perm_path.exists():
              perm_path.unlink()
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.patch("/person/{person_id}")
+async def update_person(
+    person_id: str,
+    name: str = Form(None),
+    relation: str = Form(None),
+    notes: str = Form(None),
+    age: int = Form(None)
+):
+    """Edit a person's metadata (all of their enrolled photos); chat picks up the change after re-indexing."""
+    edits = {k: v for k, v in {"name": name, "relation": relation, "notes": notes, "age": age}.items() if v is not None}
+    if not edits:
+        raise HTTPException(status_code=400, detail="Nothing to update")
+
+    old_name = memory_service.person_name(person_id)
+    if old_name is None:
+        raise HTTPException(status_code=404, detail="Person not found")
+
+    touched = memory_service.update_person(person_id, edits)
+    # A rename re-indexes both: the old name's facts are dropped, the new name's rebuilt
+    semantic_indexer.schedule(old_name, edits.get("name", old_name))
+    return {"status": "updated", "person_id": person_id, "records": touched, "fields": sorted(edits)}
+
 @router.post("/remember/object")
 async def remember_object(
     background_tasks: BackgroundTasks,
@@ -281,6 +334,8 @@ async def remember_object(
             }
         )
         
+        object_classifier.invalidate()
+        
         msg = f"I have remembered your {name}."
         # background_tasks.add_task(tts_service.speak, msg)
         
@@ -304,24 +359,34 @@ async def find_object(background_tasks: BackgroundTasks, file: UploadFile = File
         embedding = object_service.generate_embedding(str(temp_path))
         
         # 2. Search
-        matches = memory_service.search_object(embedding)
+        votes = None
+        if settings.OBJECT_RECOGNITION_MODE == "knn":
+            # Top-k category vote; best point of the winning category
+            votes = object_classifier.classify(embedding)
+            matches = [votes["point"]] if votes else []
+        else:
+            matches = memory_service.search_object(embedding)
         
         found_name = "Unknown Object"
         found_notes = ""
         found_img = None
         
-        if matches and matches[0].score > 0.6: # Threshold
+        if matches and matches[0].score > settings.OBJECT_MATCH_THRESHOLD:
             best = matches[0]
             found_name = best.payload.get("name", "Unknown")
             found_notes = best.payload.get("notes", "")
             found_img = best.payload.get("image_base64", None)
             
+            # Views that keep matching stay at the recent end of the auto-enroll cap (after the response)
+            background_tasks.add_task(memory_service.mark_object_seen, best)
+
             # TTS
             msg = f"This looks like your {found_name}."
             if found_notes:
                 msg += f" {found_notes}"
             # background_tasks.add_task(tts_service.speak, msg)
             
+            record_recognition("object", "identified")
             return {
                 "status": "identified", 
                 "object": {
@@ -329,7 +394,8 @@ async def find_object(background_tasks: BackgroundTasks, file: UploadFile = File
                     "notes": found_notes, 
                     "confidence": best.score,
                     "location": best.payload.get("location", "Unknown"),
-                    "image": found_img
+                    "image": found_img,
+                    "vote_share": votes["share"] if votes else None
                 }
             }
         
@@ -341,37 +407,49 @@ async def find_object(background_tasks: BackgroundTasks, file: UploadFile = File
             best_det = max(detections, key=lambda x: x['confidence'])
             label = best_det['object']
             
-            # Auto-Learn: Store this specific instance embedding
-            object_id = str(uuid.uuid4())
-            # Use the already calculated embedding
-            # Note: We should ideally crop the object, but full image embedding is OK for prototype 
-            # if the object is dominant.
-            
-            # Encode for storage
-            img_b64 = encode_image_base64(str(temp_path))
-            
             # Determine location (Mock or Current Context)
             # Since we don't have GPS, we say "Last Seen Location" or date
             from datetime import datetime
-            timestamp = datetime.now().strftime("%I:%M %p")
-            location = f"Last seen at {timestamp}"
-
-            memory_service.store_object_memory(
-                object_id=object_id,
-                embedding=embedding,
-                metadata={
-                    "name": label,
-                    "type": "object",
-                    "notes": "Auto-enrolled from observation.",
-                    "location": location,
-                    "image_base64": img_b64
-                }
-            )
+            now = datetime.now()
+            location = f"Last seen at {now.strftime('%I:%M %p')}"
+
+            # Dedup: same label and close enough -> refresh that point instead of growing the gallery.
+            # Only reached when nothing scored above OBJECT_MATCH_THRESHOLD, so a stricter dedup could never fire.
+            dedup_threshold = min(settings.OBJECT_DEDUP_THRESHOLD, settings.OBJECT_MATCH_THRESHOLD)
+            existing = memory_service.find_similar_object(embedding, label)
+            if existing and existing.score >= dedup_threshold:
+                memory_service.mark_object_seen(existing, {"location": location})
+                img_b64 = existing.payload.get("image_base64")
+                found_notes = "I have seen this before."
+            else:
+                # Auto-Learn: Store this specific instance embedding
+                # Note: We should ideally crop the object, but full image embedding is OK for prototype 
+                # if the object is dominant.
+                img_b64 = encode_image_base64(str(temp_path))
+
+                memory_service.store_object_memory(
+                    object_id=str(uuid.uuid4()),
+                    embedding=embedding,
+                    metadata={
+                        "name": label,
+                        "type": "object",
+                        "source": "auto",
+                        "notes": "Auto-enrolled from observation.",
+                        "location": location,
+                        "last_seen": now.isoformat(),
+                        "seen_count": 1,
+                        "image_base64": img_b64
+                    }
+                )
+                # Bounded gallery: drop least recently seen auto-enrolled views of this label
+                memory_service.enforce_object_cap(label, settings.OBJECT_AUTO_ENROLL_CAP)
+                object_classifier.invalidate()
+                found_notes = "I just learned this object."
             
             found_name = label
-            found_notes = "I just learned this object."
             
             # Return as 'identified' so Frontend treats it as a known object
+            record_recognition("object", "auto_enrolled")
             return {
                 "status": "identified", 
                 "object": {
@@ -383,11 +461,39 @@ async def find_object(background_tasks: BackgroundTasks, file: UploadFile = File
                 }
             }
             
+        record_recognition("object", "unknown")
         return {"status": "unknown", "object": None}
         
     finally:
         if temp_path.exists():
             temp_path.unlink()
+@router.get("/tts")
+async def text_to_speech(text: str = Query(..., max_length=1000), voice: str = Query(None)):
+    """MP3 for `text`. Served from the disk cache when it was spoken (or pre-synthesized) before."""
+    text = text.strip()
+    if not text:
+        raise HTTPException(status_code=400, detail="Empty text")
+    try:
+        audio = await tts_service.synthesize(text, voice)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"TTS failed: {e}")
+    return Response(
+        content=audio,
+        media_type="audio/mpeg",
+        headers={
+            "Cache-Control": "public, max-age=86400",
+            "ETag": tts_service.cache.key(text, voice or tts_service.voice)
+        }
+    )
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status / progress / result of a background job (e.g. enrollment enrichment)."""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 @router.get("/debug/names")
 async def debug_names():
     """List all names in Qdrant Faces"""
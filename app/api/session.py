@@ -0,0 +1,12 @@
+from typing import Optional
+from fastapi import Header, HTTPException
+from app.services.conversation_service import DEFAULT_SESSION
+
+def get_session_id(x_session_id: Optional[str] = Header(None)) -> str:
+    """Kiosk / browser session from the X-Session-ID header (single-kiosk setups may omit it)."""
+    if not x_session_id:
+        return DEFAULT_SESSION
+    session_id = x_session_id.strip()
+    if len(session_id) > 128:
+        raise HTTPException(status_code=400, detail="X-Session-ID too long")
+    return session_id
@@ -0,0 +1,5 @@
+import json
+
+def sse(event: str, data: dict) -> str:
+    """One Server-Sent Events message: a named event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,49 @@
+
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from app.services.voice_service import voice_service
+from app.api.sse import sse
+from pathlib import Path
+import shutil
+import uuid
+
+router = APIRouter()
+
+TEMP_DIR = Path("temp_uploads")
+TEMP_DIR.mkdir(exist_ok=True)
+
+@router.post("/voice/transcribe")
+async def transcribe(file: UploadFile = File(...), stream: bool = Form(False)):
+    """
+    Server-side speech-to-text.
+    Default: JSON with text, per-chunk segments, real-time factor and latency.
+    stream=true: Server-Sent Events, a 'partial' event per speech chunk as soon as
+    it is transcribed, then 'done' (same body as the JSON response).
+    """
+    temp_path = TEMP_DIR / f"{uuid.uuid4()}{Path(file.filename or '').suffix or '.webm'}"
+    with open(temp_path, "wb") as buffer:
+        shutil.copyfileobj(file.file, buffer)
+
+    if not stream:
+        try:
+            return await run_in_threadpool(voice_service.transcribe_detailed, str(temp_path))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        finally:
+            temp_path.unlink(missing_ok=True)
+
+    async def event_stream():
+        try:
+            async for event, data in iterate_in_threadpool(voice_service.stream(str(temp_path))):
+                yield sse(event, data)
+        except Exception as e:
+            yield sse("error", {"detail": str(e)})
+        finally:
+            temp_path.unlink(missing_ok=True)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
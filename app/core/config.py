@@ -1,3 +1,6 @@
+import json
+import os
+import warnings
 from pydantic_settings import BaseSettings
 from typing import Optional
 
@@ -9,17 +12,201 @@ class Settings(BaseSettings):
     QDRANT_PORT: int = 6333
     QDRANT_URL: Optional[str] = None
     QDRANT_API_KEY: Optional[str] = None
-    QDRANT_MODE: str = "server" # 'local' or 'server'
+    QDRANT_MODE: str = "server" # 'local', 'server' or 'embedded' (in-process NumPy/HNSW index)
     QDRANT_PATH: str = "qdrant_storage"
+
+    # Collection storage / index tuning (applied on creation, see scripts/migrate_collection_config.py)
+    QDRANT_QUANTIZATION: str = "none" # 'none', 'scalar', 'product' or 'binary'
+    QDRANT_QUANTIZATION_ALWAYS_RAM: bool = True
+    QDRANT_PRODUCT_COMPRESSION: str = "x16" # x4 .. x64
+    QDRANT_RESCORE: bool = True # Re-rank quantized candidates with original vectors
+    QDRANT_OVERSAMPLING: float = 2.0
+    QDRANT_ON_DISK_VECTORS: bool = False # Keep float32 originals on disk (mmap)
+    QDRANT_HNSW_M: int = 16
+    QDRANT_HNSW_EF_CONSTRUCT: int = 100
+    QDRANT_HNSW_EF_SEARCH: Optional[int] = None
+
+    # Embedded vector index (QDRANT_MODE=embedded)
+    VECTOR_INDEX_PATH: str = "vector_index"
+    VECTOR_INDEX_HNSW_THRESHOLD: int = 20000 # Exact search below this many points
+    VECTOR_INDEX_HNSW_M: int = 16
+    VECTOR_INDEX_HNSW_EF_CONSTRUCTION: int = 200
+    VECTOR_INDEX_HNSW_EF_SEARCH: int = 64
     
+    # Embedding model versions (app/services/model_versions.py): every point is tagged with the version
+    # that embedded it, and collections store it as a named vector. Bump a version when its weights
+    # change, then re-embed (scripts/reembed_collections.py or POST /api/v1/admin/reembed/{collection}).
+    FACE_MODEL_VERSION: str = "facenet512-keras"
+    OBJECT_MODEL_VERSION: str = "mobilenetv2-imagenet" # The object projection version is appended
+    SPEAKER_MODEL_VERSION: Optional[str] = None # Default: SPEAKER_MODEL
+    TEXT_MODEL_VERSION: Optional[str] = None # Default: the MiniLM model name
+    REEMBED_BATCH: int = 32 # Points re-embedded per upsert
+    REEMBED_MAX_CATCHUP_PASSES: int = 5 # Passes over writes made during the copy before switching anyway
+    REEMBED_JOB_TIMEOUT: float = 6 * 3600.0 # Re-embedding a large collection legitimately runs for hours
+    REEMBED_KEEP_PREVIOUS: bool = True # Carry the old version's vectors over, so not-yet-upgraded workers keep working
+    ADMIN_TOKEN: Optional[str] = None # X-Admin-Token for /admin/embeddings and /admin/reembed (disabled while unset)
+
+    # Object embedding projection (see scripts/fit_object_projection.py)
+    OBJECT_PROJECTION_ENABLED: bool = False
+    OBJECT_PROJECTION_PATH: str = "models/object_projection.npz"
+
+    # Object recognition: 'nearest' (single best point) or 'knn' (top-k category voting)
+    OBJECT_RECOGNITION_MODE: str = "knn"
+    OBJECT_KNN_K: int = 10
+    OBJECT_KNN_INITIAL_K: int = 3 # First probe; expanded to OBJECT_KNN_K only if undecided
+    OBJECT_KNN_DOMINANCE: float = 0.8 # Vote share needed to stop early
+    OBJECT_STATS_TTL: int = 300 # Seconds between per-category count refreshes
+
+    # Match thresholds (cosine similarity; best match must score above). Tune with
+    # scripts/evaluate_thresholds.py, which writes a THRESHOLDS_FILE loaded at startup.
+    FACE_MATCH_THRESHOLD: float = 0.4 # /recognize/person
+    OBJECT_MATCH_THRESHOLD: float = 0.6 # /find/object
+    THRESHOLDS_FILE: Optional[str] = None # JSON of *_MATCH_THRESHOLD values; environment variables take precedence
+
+    # Auto-enrollment from YOLO in find_object
+    OBJECT_DEDUP_THRESHOLD: float = 0.5 # Same label and at least this similar -> refresh instead of insert (capped at OBJECT_MATCH_THRESHOLD)
+    OBJECT_AUTO_ENROLL_CAP: int = 20 # Max auto-enrolled points per label (least recently seen evicted)
+    OBJECT_SEEN_UPDATE_SECONDS: int = 300 # A matched object's last_seen / seen_count is written at most this often
+
     GROQ_API_KEY: Optional[str] = None
+    GROQ_BASE_URL: str = "https://api.groq.com/openai/v1"
+
+    # Background jobs (enrollment side work)
+    JOB_QUEUE_PATH: str = "jobs.sqlite3"
+    JOB_WORKERS: int = 2
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_LEASE_SECONDS: float = 60.0 # A running job is re-claimed if its worker's heartbeat stops renewing this long
+    JOB_TIMEOUT: float = 600.0 # Leases stop being renewed after this, so a hung job is re-claimed (per kind: handler(timeout=))
+    JOB_RETRY_DELAY: float = 5.0 # A failed job waits this long before its retry, doubling per attempt
+    JOB_RETRY_MAX_DELAY: float = 300.0
+
+    # Semantic memory indexing (text_knowledge), triggered by enrollments / edits
+    SEMANTIC_INDEX_DEBOUNCE: float = 2.0 # seconds of quiet before a person's re-index is enqueued
+    SEMANTIC_INDEX_BATCH: int = 32 # max people per re-index job
+
+    # Outbound HTTP (Groq, Ready Player Me)
+    HTTP_TIMEOUT: float = 20.0
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_MAX_KEEPALIVE: int = 10
+    HTTP_RETRIES: int = 2
+    HTTP_BACKOFF: float = 0.5 # Seconds, doubled per retry
+    HTTP_CIRCUIT_THRESHOLD: int = 5 # Consecutive failures before failing fast
+    HTTP_CIRCUIT_RESET: float = 30.0 # Seconds before a trial request
+
+    # LLM backend: 'auto' (groq if key, else llamacpp if model file), 'groq', 'llamacpp' or 'stub'
+    LLM_BACKEND: str = "auto"
+    LLM_MODEL: str = "llama-3.1-8b-instant" # Groq model
+    LLM_MODEL_PATH: Optional[str] = None # GGUF file for llamacpp (pip install llama-cpp-python)
+    LLM_CONTEXT: int = 2048
+    LLM_THREADS: Optional[int] = None
+
+    # Chat response cache (person + normalized question)
+    LLM_CACHE_SIZE: int = 256
+    LLM_CACHE_TTL: int = 3600 # Seconds
+    # Semantic cache: near-duplicate questions about the same person (MiniLM similarity)
+    LLM_SEMANTIC_CACHE_ENABLED: bool = True
+    LLM_SEMANTIC_CACHE_SIZE: int = 512
+    LLM_SEMANTIC_CACHE_THRESHOLD: float = 0.92
+
+    # Speech-to-text: 'auto' (faster-whisper if installed, else openai-whisper), 'faster' or 'openai'
+    WHISPER_BACKEND: str = "auto"
+    WHISPER_MODEL: str = "base"
+    WHISPER_COMPUTE_TYPE: str = "int8" # CTranslate2 quantization for faster-whisper on CPU
+    WHISPER_CPU_THREADS: int = 0 # Per worker; 0 = CTranslate2 default
+    WHISPER_LANGUAGE: Optional[str] = "en" # None = auto-detect (slower)
+    WHISPER_PARALLEL_CHUNKS: int = 2 # Speech chunks transcribed concurrently
+    # Energy VAD used to split uploads into speech chunks
+    VAD_FRAME_MS: int = 30
+    VAD_MIN_SILENCE_MS: int = 400 # Shorter pauses stay inside a chunk
+    VAD_MAX_CHUNK_S: float = 15.0 # Longer speech is cut so chunks parallelize
+    VAD_PADDING_MS: int = 150
+    VAD_ENERGY_FLOOR: float = 0.005 # RMS below this is always silence
+
+    # Speaker identification (voices collection)
+    SPEAKER_MODEL: str = "speechbrain/spkrec-ecapa-voxceleb"
+    SPEAKER_MATCH_THRESHOLD: float = 0.35 # Cosine; ECAPA same-speaker pairs typically score well above
+    SPEAKER_MIN_SECONDS: float = 1.0 # Shorter speech is not embedded
+    SPEAKER_MAX_SECONDS: float = 20.0 # Longer clips are truncated
+    SPEAKER_BATCH_SIZE: int = 16
+
+    # Multimodal fusion (/recognize/fusion): per-modality logistic calibration of cosine scores
+    FUSION_FACE_SLOPE: float = 15.0
+    FUSION_FACE_MIDPOINT: float = 0.4 # Face score that alone means 50/50
+    FUSION_VOICE_SLOPE: float = 12.0
+    FUSION_VOICE_MIDPOINT: float = 0.35
+    FUSION_CONTEXT_BOOST: float = 1.0 # Log-odds added for the person already in the conversation
+    FUSION_ORDER: str = "face,voice" # Cheapest first; later ones are skipped once decisive
+    FUSION_TOP_K: int = 5
+    FUSION_ACCEPT: float = 0.8 # Fused probability to answer "identified"
+    FUSION_DECISIVE: float = 0.97 # Stop evaluating further modalities above this
+    FUSION_MARGIN: float = 1.0 # Log-odds lead required over the runner-up
+
+    # Text-to-speech audio cache (edge-tts mp3, LRU on disk)
+    TTS_CACHE_DIR: str = "tts_cache"
+    TTS_CACHE_MAX_MB: int = 100
+
+    # Conversation context per kiosk session (X-Session-ID): 'memory' (one worker) or 'redis' (shared)
+    CONVERSATION_BACKEND: str = "memory"
+    CONVERSATION_REDIS_URL: str = "redis://localhost:6379/0"
+    CONVERSATION_TTL: int = 1800 # Seconds of inactivity before a session's context is dropped
+    CONVERSATION_MAX_SESSIONS: int = 1000
+
+    # Logging (app/core/logging.py): queued writer thread, request ids, sampling for per-request events
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json" # 'json' (one object per line) or 'text'
+    LOG_LEVELS: str = "httpx=WARNING" # Per-module overrides, e.g. "app.services.semantic_memory=DEBUG,httpx=WARNING"
+    LOG_SAMPLE_RATE: float = 0.01 # Fraction of high-frequency events (log_sampled) that are written
+
+    # Tracing (app/core/tracing.py): per-request spans for offline tail-latency analysis
+    TRACING_EXPORTER: str = "none" # 'none', 'file' (JSON lines in TRACING_FILE) or 'otlp'
+    TRACING_FILE: str = "traces.jsonl"
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACING_SAMPLE_RATE: float = 1.0 # Fraction of requests traced
+    TRACING_SERVICE_NAME: str = "masthishq-api"
+
+    # Per-request profiling (app/core/profiling.py): 'off' (middleware not installed), 'header'
+    # (requests with X-Profile: 1 / memory) or 'sample' (header, plus a random fraction of requests)
+    PROFILING_MODE: str = "off"
+    PROFILING_TOKEN: Optional[str] = None # X-Profile-Token must match; X-Profile and /admin/profiles are disabled while unset
+    PROFILING_SAMPLE_RATE: float = 0.001
+    PROFILING_INTERVAL_MS: float = 5.0 # Stack sampling period
+    PROFILING_MEMORY: bool = False # tracemalloc for every profiled request, not only X-Profile: memory
+    PROFILING_MEMORY_FRAMES: int = 10
+    PROFILING_MEMORY_TOP: int = 30 # Allocation sites kept per profile
+    PROFILING_DIR: str = "profiles"
+    PROFILING_MAX_PROFILES: int = 200 # Oldest are deleted
+
+    # Multi-worker deployment: one model-server process holds the weights, API workers proxy to it
+    MODEL_SERVER_SOCKET: Optional[str] = None # e.g. /tmp/masthishq-models.sock (unset = load models in-process)
+    MODEL_SERVER_TIMEOUT: float = 60.0
+    MODEL_SERVER_PRELOAD: bool = True # Load all models at model-server startup
 
     def get_qdrant_url(self) -> str:
         if self.QDRANT_URL:
             return self.QDRANT_URL
         return f"http://{self.QDRANT_HOST}:{self.QDRANT_PORT}"
 
+    def load_thresholds(self, path: Optional[str] = None) -> dict:
+        """Apply tuned *_MATCH_THRESHOLD values from a JSON file; returns the ones applied."""
+        path = path or self.THRESHOLDS_FILE
+        if not path:
+            return {}
+        if not os.path.exists(path):
+            warnings.warn(f"THRESHOLDS_FILE {path} not found, keeping default thresholds")
+            return {}
+        with open(path) as f:
+            tuned = json.load(f)
+        applied = {
+            key: float(value) for key, value in tuned.items()
+            if key.endswith("_MATCH_THRESHOLD") and key in type(self).model_fields and key not in self.model_fields_set
+        }
+        for key, value in applied.items():
+            setattr(self, key, value)
+        return applied
+
     class Config:
         env_file = ".env"
 
 settings = Settings()
+settings.load_thresholds()
@@ -0,0 +1,169 @@
+"""
+Shared async HTTP client for third-party APIs (Groq, Ready Player Me).
+
+One pooled `httpx.AsyncClient` per event loop (keep-alive connections are
+reused across requests), explicit timeouts, retries with exponential backoff
+on transient failures of idempotent requests, and a per-host circuit breaker
+so a dead upstream fails fast instead of pinning every request for the full
+timeout.
+"""
+import asyncio
+import random
+import threading
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures; lets one trial request through after `reset_after` seconds.
+    Shared by every event loop in the process, hence the lock. A trial that never reports back (e.g. it
+    was cancelled) only blocks the next one for another `reset_after`.
+    """
+
+    def __init__(self, threshold: int, reset_after: float):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self.probe_at = None  # When the in-flight trial request was let through
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            # Half-open: one trial request once the cool-down has passed, the rest keep failing fast
+            if now - self.opened_at < self.reset_after:
+                return False
+            if self.probe_at is not None and now - self.probe_at < self.reset_after:
+                return False
+            self.probe_at = now
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probe_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.probe_at = None
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+class HTTPClient:
+    def __init__(self):
+        self._clients = {}  # id(loop) -> (loop, AsyncClient)
+        self._breakers = {}  # host -> CircuitBreaker
+
+    def client(self) -> httpx.AsyncClient:
+        """Pooled client bound to the running event loop (httpx clients can't cross loops)."""
+        loop = asyncio.get_running_loop()
+        entry = self._clients.get(id(loop))
+        if entry is None or entry[0] is not loop:
+            # Forget clients of loops that have since closed (e.g. finished worker threads)
+            self._clients = {k: v for k, v in self._clients.items() if not v[0].is_closed()}
+            entry = (loop, httpx.AsyncClient(
+                timeout=httpx.Timeout(settings.HTTP_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=settings.HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE,
+                ),
+            ))
+            self._clients[id(loop)] = entry
+        return entry[1]
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        host = urlsplit(url).netloc
+        if host not in self._breakers:
+            self._breakers[host] = CircuitBreaker(settings.HTTP_CIRCUIT_THRESHOLD, settings.HTTP_CIRCUIT_RESET)
+        return self._breakers[host]
+
+    async def request(
+        self, method: str, url: str, retries: int = None, idempotent: bool = None, **kwargs
+    ) -> httpx.Response:
+        """
+        Send a request with retry + backoff on connection errors, timeouts, 429 and 5xx.
+        Only idempotent methods are retried; pass idempotent=True for a POST that is safe to
+        send twice (a retried create may otherwise create twice).
+        Raises CircuitOpenError without touching the network while the host's circuit is open.
+        Bodies must be bytes/str/dict (not file handles) so they can be re-sent.
+        """
+        breaker = self.breaker(url)
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {urlsplit(url).netloc}")
+
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        retries = 0 if not idempotent else settings.HTTP_RETRIES if retries is None else retries
+        for attempt in range(retries + 1):
+            try:
+                response = await self.client().request(method, url, **kwargs)
+                if response.status_code not in RETRY_STATUS:
+                    breaker.record_success()
+                    return response
+                error = httpx.HTTPStatusError(f"{response.status_code}", request=response.request, response=response)
+            except (httpx.TransportError, httpx.TimeoutException) as e:
+                error = e
+
+            if attempt == retries:
+                breaker.record_failure()
+                if isinstance(error, httpx.HTTPStatusError):
+                    return error.response
+                raise error
+            await asyncio.sleep(settings.HTTP_BACKOFF * (2 ** attempt) * (1 + random.random() * 0.25))
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs):
+        """Streaming request (no retries: the body may already be partly consumed)."""
+        breaker = self.breaker(url)
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {urlsplit(url).netloc}")
+        try:
+            async with self.client().stream(method, url, **kwargs) as response:
+                if response.status_code >= 500:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                yield response
+        except (httpx.TransportError, httpx.TimeoutException):
+            breaker.record_failure()
+            raise
+
+    async def aclose(self):
+        """Close the clients of every loop (app shutdown)."""
+        current = asyncio.get_running_loop()
+        clients, self._clients = self._clients, {}
+        for loop, client in clients.values():
+            try:
+                if loop is not current and loop.is_running():
+                    # Another thread's loop: close on it, as its connections belong to it
+                    future = asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+                    await asyncio.wait_for(asyncio.wrap_future(future), timeout=5)
+                else:
+                    await client.aclose()
+            except Exception as e:
+                logger.debug("Closing an HTTP client failed: %s", e)
+
+
+http_client = HTTPClient()
@@ -0,0 +1,173 @@
+"""
+Structured logging for the API, the job workers and the model server.
+
+    from app.core.logging import get_logger, log_sampled
+    logger = get_logger(__name__)
+    logger.info("Indexed %d facts", n)                    # formatted lazily, off the hot path
+    log_sampled(logger, logging.DEBUG, "query_points for %r", query)  # 1 in 1/LOG_SAMPLE_RATE
+
+Records are handed to a queue and written by one background thread
+(QueueHandler / QueueListener), so a request never blocks on stdout. Output is
+one JSON object per line (LOG_FORMAT=json) or plain text, and carries the
+request id of the HTTP request (X-Request-ID) or job that produced it.
+Per-module levels: LOG_LEVELS="app.services.semantic_memory=DEBUG,httpx=WARNING".
+"""
+import contextvars
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import uuid
+
+from app.core.config import settings
+
+request_id_var = contextvars.ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else came in through `extra=` and is logged as a field
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id"}
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+
+    def format(self, record):
+        if getattr(record, "request_id", None) is None:
+            record.request_id = "-"
+        return super().format(record)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Captures the request id in the caller's context; formatting happens on the listener thread."""
+
+    def prepare(self, record):
+        record.request_id = request_id_var.get()
+        # Merge args now (they may be mutated later) but keep the record structured for the formatter
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_handler = None
+_listener = None
+_setup_lock = threading.Lock()
+
+
+def _parse_levels(spec: str) -> dict:
+    levels = {}
+    for item in (spec or "").split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def _start_listener(target, fresh_queue: bool = True):
+    global _listener
+    if fresh_queue:
+        _handler.queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(_handler.queue, target, respect_handler_level=True)
+    _listener.start()
+
+
+def setup_logging(level: str = None, fmt: str = None, levels: str = None, stream=None):
+    """Configure the root logger once (later calls are no-ops). Called on first `get_logger`."""
+    global _handler
+    with _setup_lock:
+        if _handler is not None:
+            return
+        target = logging.StreamHandler(stream or sys.stdout)
+        target.setFormatter(JsonFormatter() if (fmt or settings.LOG_FORMAT) == "json" else TextFormatter())
+
+        _handler = _QueueHandler(queue.SimpleQueue())
+        root = logging.getLogger()
+        root.addHandler(_handler)
+        root.setLevel((level or settings.LOG_LEVEL).upper())
+        for name, module_level in _parse_levels(settings.LOG_LEVELS if levels is None else levels).items():
+            logging.getLogger(name).setLevel(module_level)
+
+        _start_listener(target)
+        # A forked worker (gunicorn --preload) inherits the queue but not the writer thread
+        os.register_at_fork(after_in_child=lambda: _start_listener(target))
+
+
+def flush_logging():
+    """Write out everything queued so far (tests, shutdown)."""
+    if _listener is not None:
+        _listener.stop()  # Drains the queue
+        _start_listener(*_listener.handlers, fresh_queue=False)
+
+
+def get_logger(name: str) -> logging.Logger:
+    setup_logging()
+    return logging.getLogger(name)
+
+
+_sample_counters = {}
+
+
+def log_sampled(logger: logging.Logger, level: int, msg: str, *args, rate: float = None, **kwargs):
+    """
+    Log 1 in round(1 / rate) calls per call site (keyed by the format string), for
+    events that fire on every request. The level check comes first, so a disabled
+    event costs one comparison.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    rate = settings.LOG_SAMPLE_RATE if rate is None else rate
+    if rate <= 0:
+        return
+    every = max(1, round(1 / rate))
+    if every > 1:
+        counter = _sample_counters.get((logger.name, msg))
+        if counter is None:
+            counter = _sample_counters.setdefault((logger.name, msg), itertools.count())
+        if next(counter) % every:
+            return
+    extra = kwargs.pop("extra", None) or {}
+    extra["sample_every"] = every
+    logger.log(level, msg, *args, extra=extra, **kwargs)
+
+
+async def request_id_middleware(request, call_next):
+    """`app.middleware("http")(request_id_middleware)`: sets / echoes X-Request-ID for the request's logs."""
+    request_id = request.headers.get("X-Request-ID") or new_request_id()
+    token = request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
@@ -0,0 +1,198 @@
+"""
+Prometheus metrics (GET /metrics).
+
+- masthishq_stage_seconds{stage}: per-stage latency. Stages are named
+  "<area>.<step>", e.g. face.detect, face.embed, object.yolo, object.embed,
+  text.embed, qdrant.query_points, llm.groq, tts.synthesize, avatar.generate.
+- masthishq_http_request_seconds{method, route, status}: whole requests.
+- masthishq_recognitions_total{kind, status}: identified / unknown / no_face...
+- masthishq_cache_requests_total{cache, result}: hit / miss, so the hit ratio is
+  rate(...{result="hit"}) / rate(...).
+- masthishq_model_load_seconds{model}, and queue / session gauges.
+
+Use `timed("stage")` as a context manager or decorator. With several gunicorn
+workers, set PROMETHEUS_MULTIPROC_DIR so /metrics aggregates all processes.
+prometheus_client is optional (requirements-optional.txt): without it every
+metric is a no-op and /metrics says so.
+"""
+import functools
+import inspect
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest,
+    )
+except ImportError:  # Optional: metrics are not collected
+    Counter = Gauge = Histogram = None
+
+
+class _NoMetric:
+    """Stands in for every metric while prometheus_client isn't installed."""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+
+def _metric(kind, *args, **kwargs):
+    return kind(*args, **kwargs) if kind is not None else _NoMetric()
+
+
+# 1 ms .. 30 s: covers a Qdrant point lookup as well as a cold Groq call
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STAGE_SECONDS = _metric(
+    Histogram, "masthishq_stage_seconds", "Latency of one pipeline stage", ["stage"], buckets=LATENCY_BUCKETS
+)
+HTTP_REQUEST_SECONDS = _metric(
+    Histogram, "masthishq_http_request_seconds", "HTTP request latency", ["method", "route", "status"], buckets=LATENCY_BUCKETS
+)
+RECOGNITIONS = _metric(
+    Counter, "masthishq_recognitions_total", "Recognition outcomes", ["kind", "status"]
+)
+CACHE_REQUESTS = _metric(
+    Counter, "masthishq_cache_requests_total", "Cache lookups", ["cache", "result"]
+)
+MODEL_LOAD_SECONDS = _metric(
+    Gauge, "masthishq_model_load_seconds", "Time taken to load a model", ["model"], multiprocess_mode="max"
+)
+QUEUE_DEPTH = _metric(
+    Gauge, "masthishq_queue_depth", "Items waiting", ["queue"], multiprocess_mode="max"
+)
+
+
+@contextmanager
+def _timer(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - start)
+
+
+class timed:
+    """`with timed("face.embed"): ...` or `@timed("face.embed")` (sync, async and generator functions)."""
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        STAGE_SECONDS.labels(self.stage).observe(time.perf_counter() - self._start)
+        return False
+
+    def __call__(self, fn):
+        stage = self.stage
+        if inspect.isasyncgenfunction(fn):
+            @functools.wraps(fn)
+            async def agen_wrapper(*args, **kwargs):
+                with _timer(stage):
+                    async for item in fn(*args, **kwargs):
+                        yield item
+            return agen_wrapper
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with _timer(stage):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _timer(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+
+
+def record_recognition(kind: str, status: str):
+    RECOGNITIONS.labels(kind, status).inc()
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def record_model_load(model: str, seconds: float):
+    MODEL_LOAD_SECONDS.labels(model).set(seconds)
+
+
+_queue_probes = {}
+
+
+def register_queue(name: str, probe):
+    """`probe()` returns the current depth; evaluated on every scrape."""
+    _queue_probes[name] = probe
+
+
+def render():
+    """(body, content type) for the /metrics response."""
+    if Histogram is None:
+        return b"# prometheus_client is not installed (requirements-optional.txt)\n", "text/plain; version=0.0.4"
+    for name, probe in _queue_probes.items():
+        try:
+            QUEUE_DEPTH.labels(name).set(probe())
+        except Exception:
+            pass
+    registry = REGISTRY
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def _result_size(result):
+    points = getattr(result, "points", None)  # query_points
+    if points is None and isinstance(result, tuple):  # scroll -> (records, next_offset)
+        points = result[0]
+    return len(points) if isinstance(points, list) else None
+
+
+class InstrumentedVectorClient:
+    """
+    Wraps a Qdrant / embedded client: every call is timed as qdrant.<method> and,
+    when tracing is on, recorded as a span with the collection, limit and result size.
+    """
+
+    TIMED = {"query_points", "scroll", "upsert", "set_payload", "delete", "count", "get_collection", "recreate_collection"}
+
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name not in self.TIMED or not callable(attr):
+            return attr
+        from app.core.tracing import span
+        stage = f"qdrant.{name}"
+
+        @functools.wraps(attr)
+        def call(*args, **kwargs):
+            points = kwargs.get("points")
+            with span(
+                stage, service="qdrant",
+                collection=kwargs.get("collection_name", args[0] if args else None),
+                limit=kwargs.get("limit"),
+                filtered=kwargs.get("query_filter", kwargs.get("scroll_filter")) is not None,
+                **{"points.written": len(points) if isinstance(points, list) else None},
+            ) as current, _timer(stage):
+                result = attr(*args, **kwargs)
+                size = _result_size(result)
+                if size is not None:
+                    current.set_attribute("points.returned", size)
+                return result
+        return call
@@ -0,0 +1,208 @@
+"""
+Opt-in profiling of single requests (PROFILING_MODE, off by default).
+
+    PROFILING_MODE=header   profile requests sent with `X-Profile: 1` (or `X-Profile: memory`)
+                            and a matching X-Profile-Token; ignored while PROFILING_TOKEN is unset
+    PROFILING_MODE=sample   also profile a random PROFILING_SAMPLE_RATE fraction of requests
+    PROFILING_MODE=off      the middleware is not installed at all
+
+A background thread samples the Python stacks every PROFILING_INTERVAL_MS while
+the request runs and writes them as folded stacks ("frame;frame;frame count"),
+which flamegraph.pl, speedscope and inferno read directly. `X-Profile: memory`
+(or PROFILING_MEMORY) also records peak memory and the allocation sites that
+grew (tracemalloc). The response carries `X-Profile-Id`. Profiles are listed
+and downloaded through /api/v1/admin/profiles (X-Profile-Token; disabled without
+PROFILING_TOKEN).
+
+Every thread is sampled (event loop and threadpool workers; idle threads are
+dropped) with the thread name as the root frame, so concurrent requests show up
+too. One request is profiled at a time. A streamed body is profiled up to the
+response headers.
+"""
+import json
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from app.core.config import settings
+from app.core.logging import get_logger, request_id_var
+
+logger = get_logger(__name__)
+
+PROFILE_ID = re.compile(r"^[0-9]{8}T[0-9]{6}-[0-9a-f]{8}$")
+
+# (file, function) of leaf frames of threads that are waiting, not working
+IDLE_FRAMES = {
+    ("threading.py", "wait"), ("threading.py", "_wait_for_tstate_lock"), ("selectors.py", "select"),
+    ("queue.py", "get"), ("thread.py", "_worker"), ("handlers.py", "dequeue"), ("socket.py", "accept"),
+}
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or (Path(frame.f_code.co_filename).name, frame.f_code.co_name) in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+
+class ProfileStore:
+    def __init__(self, directory: str = None, max_profiles: int = None):
+        self.dir = Path(directory or settings.PROFILING_DIR)
+        self.max_profiles = max_profiles or settings.PROFILING_MAX_PROFILES
+
+    def save(self, meta: dict, stacks: Counter, allocations: dict = None) -> str:
+        self.dir.mkdir(parents=True, exist_ok=True)
+        profile_id = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{random.getrandbits(32):08x}"
+        (self.dir / f"{profile_id}.folded").write_text(
+            "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+        )
+        meta = {"id": profile_id, **meta, "has_memory": allocations is not None}
+        if allocations is not None:
+            (self.dir / f"{profile_id}.memory.json").write_text(json.dumps(allocations, indent=1))
+        (self.dir / f"{profile_id}.json").write_text(json.dumps(meta))
+        self._prune()
+        return profile_id
+
+    def _prune(self):
+        metas = sorted(self.dir.glob("*T*-*[0-9a-f].json"))
+        for old in metas[:max(len(metas) - self.max_profiles, 0)]:
+            for path in self.dir.glob(f"{old.stem}.*"):
+                path.unlink(missing_ok=True)
+
+    def list(self) -> list:
+        if not self.dir.exists():
+            return []
+        profiles = []
+        for path in sorted(self.dir.glob("*T*-*[0-9a-f].json"), reverse=True):
+            try:
+                profiles.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue
+        return profiles
+
+    def path(self, profile_id: str, kind: str = "folded"):
+        """File for a profile ('folded', 'memory' or 'meta'); None for unknown / malformed ids."""
+        if not PROFILE_ID.match(profile_id):
+            return None
+        suffix = {"folded": ".folded", "memory": ".memory.json", "meta": ".json"}[kind]
+        path = self.dir / f"{profile_id}{suffix}"
+        return path if path.exists() else None
+
+
+profile_store = ProfileStore()
+_busy = threading.Lock()
+
+
+def _requested(request):
+    """None, 'cpu' or 'memory' for this request."""
+    header = request.headers.get("X-Profile")
+    # Any client could otherwise make the server profile (and write files) at will
+    token = request.headers.get("X-Profile-Token", "")
+    if header and settings.PROFILING_TOKEN and secrets.compare_digest(token, settings.PROFILING_TOKEN):
+        return "memory" if header.lower() == "memory" or settings.PROFILING_MEMORY else "cpu"
+    if settings.PROFILING_MODE == "sample" and random.random() < settings.PROFILING_SAMPLE_RATE:
+        return "memory" if settings.PROFILING_MEMORY else "cpu"
+    return None
+
+
+def _memory_report(before, after, limit: int) -> dict:
+    """Peak traced memory during the request, and the sites whose allocations it kept."""
+    _, peak = tracemalloc.get_traced_memory()
+    stats = after.compare_to(before, "lineno")
+    return {
+        "peak_kb": round(peak / 1024, 1),
+        "net_kb": round(sum(stat.size_diff for stat in stats) / 1024, 1),
+        "top": [
+            {
+                "where": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_kb": round(stat.size_diff / 1024, 1),
+                "count": stat.count_diff,
+            }
+            for stat in stats[:limit]
+        ],
+    }
+
+
+async def profiling_middleware(request, call_next):
+    """`app.middleware("http")(profiling_middleware)`; only installed when PROFILING_MODE != off."""
+    kind = _requested(request)
+    if kind is None or not _busy.acquire(blocking=False):
+        return await call_next(request)
+
+    try:
+        memory = kind == "memory"
+        started_tracing = memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(settings.PROFILING_MEMORY_FRAMES)
+        before = None
+        if memory:
+            before = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+
+        started_at = datetime.now().isoformat(timespec="seconds")
+        profiler = SamplingProfiler(settings.PROFILING_INTERVAL_MS / 1000).start()
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+        finally:
+            elapsed = time.perf_counter() - start
+            stacks = profiler.stop()
+            allocations = None
+            if memory:
+                allocations = _memory_report(before, tracemalloc.take_snapshot(), settings.PROFILING_MEMORY_TOP)
+                if started_tracing:
+                    tracemalloc.stop()
+
+            route = request.scope.get("route")
+            profile_id = profile_store.save({
+                "method": request.method,
+                "path": request.url.path,
+                "route": route.path if route else None,
+                "status": status,
+                "request_id": request_id_var.get(),
+                "started_at": started_at,
+                "duration_ms": round(elapsed * 1000, 1),
+                "samples": profiler.samples,
+                "interval_ms": settings.PROFILING_INTERVAL_MS,
+            }, stacks, allocations)
+            logger.info("Profiled %s %s in %.0f ms: %s", request.method, request.url.path, elapsed * 1000, profile_id)
+        response.headers["X-Profile-Id"] = profile_id
+        return response
+    finally:
+        _busy.release()
@@ -0,0 +1,178 @@
+"""
+Per-request traces (OpenTelemetry) for diagnosing one slow request.
+
+Metrics (app/core/metrics.py) give latency distributions; a trace shows where
+the time of a single /chat/query went: the search_by_text scroll, the MiniLM
+encode, the filtered Qdrant query, the second lookup and the LLM call, each a
+span with service / collection / size attributes.
+
+    TRACING_EXPORTER=file  -> one JSON span per line in TRACING_FILE
+                              (python scripts/trace_report.py traces.jsonl)
+    TRACING_EXPORTER=otlp  -> OTLP/HTTP to TRACING_OTLP_ENDPOINT (Jaeger, Tempo, a collector)
+    TRACING_EXPORTER=none  -> spans are no-ops (default)
+
+    @traced("memory.search_by_text", service="memory")
+    def search_by_text(...): ...
+
+    with span("llm.complete", backend=name) as s:
+        ...
+        s.set_attribute("llm.response_chars", len(text))
+
+OpenTelemetry is optional (requirements-optional.txt): without opentelemetry-api
+every span is a no-op, and an exporter other than none also needs the SDK.
+"""
+import functools
+import inspect
+import json
+from contextlib import contextmanager
+
+try:
+    from opentelemetry import propagate, trace
+except ImportError:  # Optional: spans are no-ops
+    propagate = trace = None
+
+from app.core.config import settings
+from app.core.logging import get_logger, request_id_var
+
+logger = get_logger(__name__)
+
+tracer = trace.get_tracer("masthishq") if trace else None
+
+
+class _NoSpan:
+    """What `span()` yields while opentelemetry isn't installed."""
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, attributes):
+        pass
+
+    def update_name(self, name):
+        pass
+
+    def is_recording(self):
+        return False
+
+_configured = False
+
+
+def _clean(attributes: dict) -> dict:
+    """OTel attributes must be str / bool / int / float; None means 'not known here'."""
+    return {k: v for k, v in attributes.items() if v is not None}
+
+
+def setup_tracing(exporter: str = None, path: str = None, service_name: str = None):
+    """Install the tracer provider selected by TRACING_EXPORTER (once per process)."""
+    global _configured
+    exporter = (exporter or settings.TRACING_EXPORTER).lower()
+    if _configured or exporter == "none":
+        return
+    if trace is None:
+        logger.warning("TRACING_EXPORTER=%s ignored: opentelemetry is not installed", exporter)
+        return
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    if exporter == "file":
+        out = open(path or settings.TRACING_FILE, "a", encoding="utf-8")
+        span_exporter = ConsoleSpanExporter(out=out, formatter=lambda s: json.dumps(json.loads(s.to_json())) + "\n")
+    elif exporter == "otlp":
+        # pip install opentelemetry-exporter-otlp-proto-http
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        span_exporter = OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT)
+    else:
+        raise ValueError(f"Unknown TRACING_EXPORTER: {exporter}")
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": service_name or settings.TRACING_SERVICE_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATE)),
+    )
+    # Batched on a background thread: exporting never happens on the request path
+    provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    trace.set_tracer_provider(provider)
+    _configured = True
+
+
+def shutdown_tracing():
+    if trace is None:
+        return
+    provider = trace.get_tracer_provider()
+    if hasattr(provider, "shutdown"):
+        provider.shutdown()  # Flushes pending spans
+
+
+@contextmanager
+def span(name: str, **attributes):
+    if tracer is None:
+        yield _NoSpan()
+        return
+    with tracer.start_as_current_span(name, attributes=_clean(attributes)) as current:
+        yield current
+
+
+def set_attributes(**attributes):
+    """Annotate the current span with values only known mid-call (result counts, sizes)."""
+    if trace is None:
+        return
+    current = trace.get_current_span()
+    if current.is_recording():
+        current.set_attributes(_clean(attributes))
+
+
+class traced:
+    """`@traced("memory.search_face", service="memory")`: a span per call (sync, async and generator functions)."""
+
+    def __init__(self, name: str, **attributes):
+        self.name = name
+        self.attributes = attributes
+
+    def __call__(self, fn):
+        name, attributes = self.name, self.attributes
+        if inspect.isasyncgenfunction(fn):
+            @functools.wraps(fn)
+            async def agen_wrapper(*args, **kwargs):
+                with span(name, **attributes):
+                    async for item in fn(*args, **kwargs):
+                        yield item
+            return agen_wrapper
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(name, **attributes):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name, **attributes):
+                return fn(*args, **kwargs)
+        return wrapper
+
+
+def inject_headers(headers: dict) -> dict:
+    """Adds `traceparent` so the model server's spans join the calling request's trace."""
+    if propagate is None:
+        return headers
+    propagate.inject(headers)
+    return headers
+
+
+async def tracing_middleware(request, call_next):
+    """`app.middleware("http")(tracing_middleware)`: the root span of each request."""
+    if tracer is None:
+        return await call_next(request)
+    context = propagate.extract(request.headers)
+    with tracer.start_as_current_span(
+        f"{request.method} {request.url.path}", context=context, kind=trace.SpanKind.SERVER,
+        attributes=_clean({"http.method": request.method, "request_id": request_id_var.get()}),
+    ) as current:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        if route is not None:
+            current.update_name(f"{request.method} {route.path}")
+            current.set_attribute("http.route", route.path)
+        current.set_attribute("http.status_code", response.status_code)
+        return response
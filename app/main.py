@@ -2,17 +2,28 @@ import os
 os.environ["TF_CPP_MIN_LOG_LEVEL"] = "2" # Suppress TF Info/Warnings
 os.environ["TF_ENABLE_ONEDNN_OPTS"] = "0"
 
-from fastapi import FastAPI
+import time
+from fastapi import FastAPI, Request, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.core.http_client import http_client
+from app.services.job_queue import job_queue
+from app.core import metrics
+from app.core.logging import request_id_middleware, flush_logging
+from app.core.tracing import setup_tracing, shutdown_tracing, tracing_middleware
+from app.core.profiling import profiling_middleware
 
 # print("DEBUG: Importing API Router...", flush=True)
 from app.api.endpoints import router as api_router 
 # print("DEBUG: Importing Chat Endpoint...", flush=True)
 from app.api import chat_endpoint 
+from app.api import voice_endpoint
+from app.api import admin_endpoint
 # print("DEBUG: Imports Done.", flush=True) 
 
+setup_tracing()
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json"
@@ -27,12 +38,59 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Route template (/api/v1/jobs/{job_id}), not the raw path, to keep label cardinality bounded
+        route = request.scope.get("route")
+        metrics.HTTP_REQUEST_SECONDS.labels(
+            request.method, route.path if route else "unmatched", str(status)
+        ).observe(time.perf_counter() - start)
+
+app.middleware("http")(tracing_middleware)
+
+if settings.PROFILING_MODE != "off":
+    app.middleware("http")(profiling_middleware)
+
+# Registered last so it runs outermost: the metrics middleware and every handler see the request id
+app.middleware("http")(request_id_middleware)
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+@app.on_event("startup")
+async def start_job_workers():
+    from app.services.semantic_indexer import semantic_indexer
+    metrics.register_queue("jobs", job_queue.depth)
+    metrics.register_queue("semantic_index", semantic_indexer.pending)
+    job_queue.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    from app.services.semantic_indexer import semantic_indexer
+    # Re-indexes still in their debounce window go to the durable queue instead of being dropped
+    semantic_indexer.flush()
+    job_queue.stop()
+    await http_client.aclose()
+    shutdown_tracing()
+    flush_logging()
+
 # Mount static files (for dashboard)
 app.mount("/static", StaticFiles(directory="static", html=True), name="static")
 
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 app.include_router(chat_endpoint.router, prefix=settings.API_V1_STR)
+app.include_router(voice_endpoint.router, prefix=settings.API_V1_STR)
+app.include_router(admin_endpoint.router, prefix=settings.API_V1_STR)
 
 # --- Frontend Serving (Deployment) ---
 # Check if frontend build exists (Render/Production)
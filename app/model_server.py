@@ -0,0 +1,150 @@
+"""
+Local model server: loads FaceNet, YOLO, MobileNetV2, MiniLM, Whisper and
+ECAPA once and serves them to every API worker over a Unix socket.
+
+    MODEL_SERVER_SOCKET=/tmp/masthishq-models.sock python -m app.model_server
+    MODEL_SERVER_SOCKET=/tmp/masthishq-models.sock gunicorn -c gunicorn.conf.py app.main:app
+
+Workers started with MODEL_SERVER_SOCKET set use the proxies in
+app/services/model_client.py instead of loading their own copies.
+"""
+import os
+
+from app.services.model_client import MODEL_SERVER_ENV
+
+# Must be set before the service modules are imported: this process hosts the real models
+os.environ[MODEL_SERVER_ENV] = "1"
+
+import shutil
+import tempfile
+import threading
+import json
+from contextlib import contextmanager
+from typing import List
+
+from fastapi import FastAPI, UploadFile, File, Body
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.core.logging import get_logger, request_id_middleware
+from app.core.tracing import setup_tracing, tracing_middleware
+
+logger = get_logger(__name__)
+
+app = FastAPI(title="Masthishq model server")
+setup_tracing(service_name="masthishq-models")
+app.middleware("http")(tracing_middleware)  # Joins the caller's trace (traceparent header)
+app.middleware("http")(request_id_middleware)  # Same X-Request-ID as the API request that called us
+
+# Keras / TF models are not safe to call from several threads at once
+_locks = {"face": threading.Lock(), "object": threading.Lock()}
+
+
+def _save(files: List[UploadFile]):
+    """Uploads as temp files (the services work on paths). Returns (tmp_dir, paths)."""
+    tmp_dir = tempfile.mkdtemp(prefix="models-")
+    paths = []
+    for i, upload in enumerate(files):
+        path = os.path.join(tmp_dir, f"{i}_{os.path.basename(upload.filename or 'upload')}")
+        with open(path, "wb") as buffer:
+            shutil.copyfileobj(upload.file, buffer)
+        paths.append(path)
+    return tmp_dir, paths
+
+
+@contextmanager
+def _saved(files: List[UploadFile]):
+    tmp_dir, paths = _save(files)
+    try:
+        yield paths
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+_text_encoder = None
+
+
+def text_encoder():
+    global _text_encoder
+    if _text_encoder is None:
+        from app.services.text_encoder import load_text_encoder
+        _text_encoder = load_text_encoder()
+    return _text_encoder
+
+
+@app.get("/health")
+def health():
+    return {"status": "ok", "pid": os.getpid()}
+
+
+@app.post("/face/embed")
+def face_embed(files: List[UploadFile] = File(...)):
+    from app.services.face_service import face_service
+    with _saved(files) as paths, _locks["face"]:
+        return {"embedding": face_service.generate_embedding(paths[0])}
+
+
+@app.post("/object/embed")
+def object_embed(files: List[UploadFile] = File(...), project: bool = True):
+    from app.services.object_service import detector
+    with _saved(files) as paths, _locks["object"]:
+        return {"embedding": detector.generate_embedding(paths[0], project=project)}
+
+
+@app.post("/object/detect")
+def object_detect(files: List[UploadFile] = File(...)):
+    from app.services.object_service import detector
+    with _saved(files) as paths, _locks["object"]:
+        return {"detections": detector.detect_objects(paths[0])}
+
+
+@app.post("/text/embed")
+def text_embed(texts: List[str] = Body(...), batch_size: int = Body(32)):
+    embeddings = text_encoder().encode(texts, batch_size=batch_size)
+    return {"embeddings": embeddings.tolist()}
+
+
+@app.post("/speaker/embed")
+def speaker_embed(files: List[UploadFile] = File(...)):
+    from app.services.speaker_service import speaker_service
+    with _saved(files) as paths:
+        return {"embeddings": speaker_service.embed_batch(paths)}
+
+
+@app.post("/voice/transcribe")
+def voice_transcribe(files: List[UploadFile] = File(...)):
+    from app.services.voice_service import voice_service
+    tmp_dir, paths = _save(files)
+
+    def lines():
+        try:
+            for event, data in voice_service.stream(paths[0]):
+                yield json.dumps({"event": event, "data": data}) + "\n"
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.on_event("startup")
+def preload():
+    """Load everything up front so the first kiosk request doesn't pay for it."""
+    if not settings.MODEL_SERVER_PRELOAD:
+        return
+    from app.services.face_service import face_service  # noqa: F401
+    from app.services.object_service import detector, get_embedding_model  # noqa: F401
+    from app.services.voice_service import voice_service
+    from app.services.speaker_service import speaker_service
+    get_embedding_model()
+    text_encoder()
+    voice_service.backend
+    speaker_service.model
+    logger.info("Model server ready (pid %d)", os.getpid())
+
+
+if __name__ == "__main__":
+    import uvicorn
+    socket_path = settings.MODEL_SERVER_SOCKET or "/tmp/masthishq-models.sock"
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)  # Stale socket from a previous run
+    uvicorn.run(app, uds=socket_path, workers=1)
@@ -1,23 +1,31 @@
-import requests
 import os
+from app.core.http_client import http_client
+from app.core.metrics import timed
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
 
 READY_PLAYER_ME_API = "https://api.readyplayer.me/v1/avatars"
 
 class AvatarService:
-    def generate_avatar(self, image_path: str) -> str:
+    @timed("avatar.generate")
+    async def generate_avatar(self, image_path: str) -> str:
         """
         Generates a 3D avatar from a photo using Ready Player Me.
         Returns the URL of the generated avatar (GLB or PNG).
         """
         try:
             with open(image_path, "rb") as img:
-                # RPM allows POSTing image to generate avatar
-                response = requests.post(
-                    READY_PLAYER_ME_API,
-                    files={"file": img},
-                    data={"gender": "neutral"}, # or detect gender? neutral is safe
-                    headers={} # API Key optional for basic use
-                )
+                image_bytes = img.read()
+
+            # RPM allows POSTing image to generate avatar
+            response = await http_client.request(
+                "POST",
+                READY_PLAYER_ME_API,
+                files={"file": (os.path.basename(image_path), image_bytes, "image/jpeg")},
+                data={"gender": "neutral"}, # or detect gender? neutral is safe
+                headers={} # API Key optional for basic use
+            )
             
             if response.status_code in [200, 201]:
                 # Response format: {"data": {"id": "...", "url": "https://models.readyplayer.me/....glb", ...}}
@@ -31,10 +39,10 @@ class AvatarService:
                     return glb_url.replace(".glb", ".png")
                 return glb_url
             else:
-                print(f"RPM Error: {response.text}")
+                logger.warning("RPM error: %s", response.text)
                 return None
         except Exception as e:
-            print(f"Avatar Generation Failed: {e}")
+            logger.error("Avatar generation failed: %s", e)
             return None
 
 avatar_service = AvatarService()
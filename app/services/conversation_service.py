@@ -1,17 +1,147 @@
+"""
+Conversational state ("who are we talking about?") per kiosk session.
+
+Contexts are keyed by session id (X-Session-ID header; "default" for a single
+kiosk), expire after CONVERSATION_TTL seconds without use and are capped at
+CONVERSATION_MAX_SESSIONS (least recently used evicted). Backends:
+
+- memory: in-process LRU. One worker only; state is lost on restart.
+- redis:  any Redis-protocol store (redis, valkey, KeyDB, or fakeredis in
+          tests). Shared by all uvicorn workers and kiosks.
+
+Media blobs (*_base64) are not kept in the context; chat re-fetches them.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_SESSION = "default"
+
+
+def compact(person_data: dict) -> dict:
+    return {k: v for k, v in (person_data or {}).items() if not k.endswith("_base64")}
+
+
+class InMemoryContextStore:
+    def __init__(self, ttl: int, max_sessions: int):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._entries = OrderedDict()  # session -> (expires_at, context)
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> dict:
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return {}
+            if entry[0] < time.monotonic():
+                del self._entries[session_id]
+                return {}
+            # Sliding expiry: an active conversation stays alive
+            self._entries[session_id] = (time.monotonic() + self.ttl, entry[1])
+            self._entries.move_to_end(session_id)
+            return entry[1]
+
+    def set(self, session_id: str, context: dict):
+        with self._lock:
+            self._entries[session_id] = (time.monotonic() + self.ttl, context)
+            self._entries.move_to_end(session_id)
+            self._evict()
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+    def __len__(self):
+        with self._lock:
+            self._evict()
+            return len(self._entries)
+
+    def _evict(self):
+        now = time.monotonic()
+        for session_id in [s for s, (expires, _) in self._entries.items() if expires < now]:
+            del self._entries[session_id]
+        while len(self._entries) > self.max_sessions:
+            self._entries.popitem(last=False)
+
+
+class RedisContextStore:
+    """Context per key with a TTL; a sorted set of last-access times enforces the session cap."""
+
+    def __init__(self, url: str, ttl: int, max_sessions: int, client=None, prefix: str = "conversation:"):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+            client.ping()
+        self.redis = client
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.prefix = prefix
+        self.index = f"{prefix}sessions"
+
+    def get(self, session_id: str) -> dict:
+        raw = self.redis.get(self.prefix + session_id)
+        if raw is None:
+            return {}
+        pipe = self.redis.pipeline()
+        pipe.expire(self.prefix + session_id, self.ttl)
+        pipe.zadd(self.index, {session_id: time.time()})
+        pipe.execute()
+        return json.loads(raw)
+
+    def set(self, session_id: str, context: dict):
+        pipe = self.redis.pipeline()
+        pipe.set(self.prefix + session_id, json.dumps(context), ex=self.ttl)
+        pipe.zadd(self.index, {session_id: time.time()})
+        pipe.zremrangebyscore(self.index, 0, time.time() - self.ttl)
+        pipe.zcard(self.index)
+        count = pipe.execute()[-1]
+        if count > self.max_sessions:
+            oldest = self.redis.zpopmin(self.index, count - self.max_sessions)
+            if oldest:
+                sessions = [s.decode() if isinstance(s, bytes) else s for s, _ in oldest]
+                self.redis.delete(*[self.prefix + s for s in sessions])
+
+    def delete(self, session_id: str):
+        pipe = self.redis.pipeline()
+        pipe.delete(self.prefix + session_id)
+        pipe.zrem(self.index, session_id)
+        pipe.execute()
+
+    def __len__(self):
+        return self.redis.zcount(self.index, time.time() - self.ttl, "+inf")
+
+
+def create_store():
+    ttl, max_sessions = settings.CONVERSATION_TTL, settings.CONVERSATION_MAX_SESSIONS
+    if settings.CONVERSATION_BACKEND == "redis":
+        try:
+            return RedisContextStore(settings.CONVERSATION_REDIS_URL, ttl, max_sessions)
+        except Exception as e:
+            logger.warning("Conversation store: Redis unavailable (%s), using in-memory sessions", e)
+    return InMemoryContextStore(ttl, max_sessions)
+
 
 class ConversationService:
-    def __init__(self):
-        self.context = {} # Simple dictionary to hold current state
-        # In a real app, use Redis or Session ID. 
-        # Here we assume single user (Avatar kiosk mode).
+    def __init__(self, store=None):
+        self.store = store if store is not None else create_store()
+
+    def update_context(self, person_data: dict, session_id: str = DEFAULT_SESSION):
+        self.store.set(session_id or DEFAULT_SESSION, compact(person_data))
 
-    def update_context(self, person_data: dict):
-        self.context = person_data
+    def get_context(self, session_id: str = DEFAULT_SESSION):
+        return self.store.get(session_id or DEFAULT_SESSION)
 
-    def get_context(self):
-        return self.context
+    def clear_context(self, session_id: str = DEFAULT_SESSION):
+        self.store.delete(session_id or DEFAULT_SESSION)
 
-    def clear_context(self):
-        self.context = {}
+    def active_sessions(self) -> int:
+        return len(self.store)
 
 conversation_service = ConversationService()
@@ -0,0 +1,105 @@
+"""
+Optional linear projection (PCA, optionally whitened) for object embeddings.
+
+MobileNetV2 gives 1280-d vectors; a gallery of a few dozen object categories
+lives in a much smaller subspace. The projection is fitted offline on the
+enrolled gallery (scripts/fit_object_projection.py), saved as an .npz next to
+the vector store and applied by ObjectDetector at both ingest and query time.
+Every object point records the `projection_version` it was written with.
+"""
+import hashlib
+from pathlib import Path
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class PCAProjection:
+    def __init__(self, mean: np.ndarray, components: np.ndarray, scale: np.ndarray = None, version: str = None):
+        self.mean = mean.astype(np.float32)
+        self.components = components.astype(np.float32)  # (k, d)
+        self.scale = None if scale is None else scale.astype(np.float32)  # (k,) whitening
+        self.version = version or self._fingerprint()
+
+    @property
+    def source_dim(self) -> int:
+        return self.components.shape[1]
+
+    @property
+    def dim(self) -> int:
+        return self.components.shape[0]
+
+    def _fingerprint(self) -> str:
+        h = hashlib.sha1(self.components.tobytes()).hexdigest()[:8]
+        kind = "pcaw" if self.scale is not None else "pca"
+        return f"{kind}{self.dim}-{h}"
+
+    @classmethod
+    def fit(cls, X, n_components: int, whiten: bool = False, eps: float = 1e-6):
+        X = np.asarray(X, dtype=np.float64)
+        n_components = min(n_components, X.shape[0], X.shape[1])
+        mean = X.mean(axis=0)
+        # SVD of the centered data: rows of vt are the principal axes
+        _, s, vt = np.linalg.svd(X - mean, full_matrices=False)
+        components = vt[:n_components]
+        scale = None
+        if whiten:
+            variance = (s[:n_components] ** 2) / max(X.shape[0] - 1, 1)
+            scale = 1.0 / np.sqrt(variance + eps)
+        return cls(mean, components, scale)
+
+    def transform(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        Y = (X - self.mean) @ self.components.T
+        if self.scale is not None:
+            Y = Y * self.scale
+        return Y
+
+    def explained_variance_ratio(self, X) -> float:
+        X = np.asarray(X, dtype=np.float32) - self.mean
+        projected = X @ self.components.T
+        return float((projected ** 2).sum() / max((X ** 2).sum(), 1e-12))
+
+    def save(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            path,
+            mean=self.mean,
+            components=self.components,
+            scale=self.scale if self.scale is not None else np.array([]),
+            version=np.array(self.version),
+        )
+
+    @classmethod
+    def load(cls, path: str):
+        data = np.load(path)
+        scale = data["scale"] if data["scale"].size else None
+        return cls(data["mean"], data["components"], scale, str(data["version"]))
+
+
+def load_object_projection():
+    """The active object projection, or None when disabled / not fitted yet."""
+    if not settings.OBJECT_PROJECTION_ENABLED:
+        return None
+    path = Path(settings.OBJECT_PROJECTION_PATH)
+    if not path.exists():
+        logger.warning("OBJECT_PROJECTION_ENABLED but %s not found. Using raw embeddings.", path)
+        return None
+    projection = PCAProjection.load(str(path))
+    logger.info("Object projection %s (%d -> %d)", projection.version, projection.source_dim, projection.dim)
+    return projection
+
+
+object_projection = load_object_projection()
+
+
+def object_vector_size() -> int:
+    return object_projection.dim if object_projection else 1280
+
+
+def object_projection_version() -> str:
+    return object_projection.version if object_projection else "raw"
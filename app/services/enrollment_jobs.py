@@ -0,0 +1,93 @@
+"""
+Enrollment side work, run on the job queue after the face embedding is stored:
+thumbnail, voice sample (+ speaker embedding), avatar and greeting audio.
+Each step patches the stored point's payload as soon as it is done, so
+recognition can use it early. (Semantic indexing is scheduled separately,
+see semantic_indexer.)
+"""
+from app.services.job_queue import job_queue
+from app.services.memory_service import memory_service
+from app.services.media_utils import encode_image_base64, encode_audio_base64
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+@job_queue.handler("enrich_person")
+async def enrich_person(job):
+    p = job.payload
+    collection, point_id = p["collection"], p["point_id"]
+    result = {}
+
+    # 1. Thumbnail for the UI / cloud copy
+    img_b64 = encode_image_base64(p["image_path"])
+    if img_b64:
+        memory_service.update_payload(collection, point_id, {"image_base64": img_b64})
+    result["image"] = bool(img_b64)
+    job.progress(0.25, "thumbnail")
+
+    # 2. Voice sample
+    if p.get("audio_path"):
+        audio_b64 = encode_audio_base64(p["audio_path"])
+        if audio_b64:
+            memory_service.update_payload(collection, point_id, {"audio_base64": audio_b64}) # Store voice sample in cloud!
+        result["audio"] = bool(audio_b64)
+
+        # Speaker embedding, so /recognize/voice can find this person without the camera
+        from app.services.speaker_service import speaker_service
+        voice_embedding = speaker_service.generate_embedding(p["audio_path"])
+        if voice_embedding:
+            person_id = p.get("person_id") or p["name"].replace(" ", "_")
+            with open(p["audio_path"], "rb") as f:
+                audio = f.read()
+            memory_service.store_voice_memory(
+                person_id=person_id,
+                embedding=voice_embedding,
+                metadata={
+                    "name": p["name"],
+                    "relation": p.get("relation"),
+                    "notes": p.get("notes", ""),
+                    "type": "voice",
+                    "face_collection": collection,
+                    "face_point_id": point_id,
+                    "source_path": p["audio_path"],
+                },
+                # Stable id: a retried job or scripts/enroll_voices.py overwrites instead of duplicating
+                point_id=memory_service.voice_point_id(person_id, audio)
+            )
+        result["voice_embedding"] = bool(voice_embedding)
+    job.progress(0.5, "audio")
+
+    # 3. Avatar (remote, slowest step)
+    from app.services.avatar_service import avatar_service
+    avatar_url = await avatar_service.generate_avatar(p["image_path"])
+    if avatar_url:
+        memory_service.update_payload(collection, point_id, {"avatar_url": avatar_url})
+    result["avatar_url"] = avatar_url
+    job.progress(0.75, "avatar")
+
+    # 4. Greeting audio, so the kiosk speaks instantly on first recognition
+    from app.services.tts_service import tts_service, greeting
+    try:
+        await tts_service.presynthesize([
+            f"Hello {p['name']}.",
+            greeting(p["name"], p.get("relation"), p.get("notes")),
+        ])
+        result["greeting_cached"] = True
+    except Exception as e:
+        logger.warning("Greeting pre-synthesis failed for %s: %s", p['name'], e)
+        result["greeting_cached"] = False
+    job.progress(1.0, "greeting")
+
+    return result
+
+def enqueue_enrichment(collection: str, point_id: str, metadata: dict, image_path: str, audio_path: str = None) -> str:
+    return job_queue.enqueue("enrich_person", {
+        "collection": collection,
+        "point_id": point_id,
+        "person_id": metadata["name"].replace(" ", "_"),
+        "name": metadata["name"],
+        "relation": metadata.get("relation"),
+        "notes": metadata.get("notes", ""),
+        "image_path": image_path,
+        "audio_path": audio_path,
+    })
@@ -1,37 +1,49 @@
-print("DEBUG: Importing OpenCV...", flush=True)
-import cv2
-print("DEBUG: Importing Keras-Facenet...", flush=True)
-from keras_facenet import FaceNet
-print("DEBUG: Importing PIL/Numpy...", flush=True)
+# OpenCV / Keras-FaceNet are imported when the model loads, so API workers that
+# proxy to the model server (MODEL_SERVER_SOCKET) never pull TensorFlow in.
 from PIL import Image
 import numpy as np
 import os
+import time
+from app.core.metrics import timed, record_model_load
+from app.services.model_client import use_model_server, RemoteFaceService
+from app.core.logging import get_logger
+from app.core.tracing import traced
+
+logger = get_logger(__name__)
 
 class FaceService:
     def __init__(self, model_name="Facenet512"):
-        print("DEBUG: Loading OpenCV and Keras-Facenet...", flush=True)
+        logger.info("Loading OpenCV and Keras-Facenet...")
+        start = time.perf_counter()
+        import cv2
+        from keras_facenet import FaceNet
         # Load Haar Cascade
         self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
         self.embedder = FaceNet()
         self.model_name = model_name
-        print("DEBUG: Face Models Loaded.", flush=True)
+        record_model_load("facenet", time.perf_counter() - start)
+        logger.info("Face models loaded")
 
+    @traced("face.generate_embedding", service="face")
     def generate_embedding(self, image_path: str) -> list:
+        import cv2
         try:
             # OpenCV reads in BGR, Keras-FaceNet expects RGB
-            img_bgr = cv2.imread(image_path)
+            with timed("face.decode"):
+                img_bgr = cv2.imread(image_path)
             if img_bgr is None:
-                print(f"Could not read image: {image_path}")
+                logger.warning("Could not read image: %s", image_path)
                 return []
             
             img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
             gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
             
             # Detect
-            faces = self.face_cascade.detectMultiScale(gray, 1.1, 4)
+            with timed("face.detect"):
+                faces = self.face_cascade.detectMultiScale(gray, 1.1, 4)
             
             if len(faces) == 0:
-                print(f"No face detected (OpenCV) in {image_path}")
+                logger.info("No face detected (OpenCV) in %s", image_path)
                 return []
 
             # Take largest face
@@ -48,11 +60,12 @@ class FaceService:
             face = np.expand_dims(face, axis=0) # (1, 160, 160, 3)
             
             # Embed
-            embedding = self.embedder.embeddings(face)[0]
+            with timed("face.embed"):
+                embedding = self.embedder.embeddings(face)[0]
             return embedding.tolist()
             
         except Exception as e:
-            print(f"Error generating embedding: {e}")
+            logger.exception("Error generating embedding: %s", e)
             return []
 
     def verify(self, img1_path, img2_path):
@@ -78,4 +91,4 @@ class FaceService:
             "race": "unknown"
         }]
 
-face_service = FaceService()
+face_service = RemoteFaceService() if use_model_server() else FaceService()
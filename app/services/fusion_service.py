@@ -0,0 +1,176 @@
+"""
+Multimodal identity fusion: face, voice and conversation context.
+
+Each modality's best similarity per person is turned into log-odds with a
+logistic calibration (slope * (score - midpoint); the midpoint is the score
+at which that modality alone is 50/50). Log-odds of independent evidence add
+up, and the conversation context (the person currently being talked about)
+adds a fixed prior boost. The sum is squashed back into one probability per
+candidate.
+
+Modalities run cheapest first (FUSION_ORDER). As soon as the leading
+candidate is decisive (probability >= FUSION_DECISIVE and ahead of the
+runner-up by FUSION_MARGIN log-odds) the remaining, more expensive
+modalities are skipped.
+"""
+import math
+import time
+
+from app.core.config import settings
+from app.core.tracing import traced
+
+MAX_LOGIT = 8.0
+
+
+def person_key(payload: dict) -> str:
+    """Identity shared by face, patient and voice records of one person."""
+    return payload.get("person_id") or (payload.get("name") or "").replace(" ", "_")
+
+
+def sigmoid(x: float) -> float:
+    return 1.0 / (1.0 + math.exp(-x))
+
+
+class Calibration:
+    def __init__(self, slope: float, midpoint: float):
+        self.slope = slope
+        self.midpoint = midpoint
+
+    def logit(self, score: float) -> float:
+        return max(-MAX_LOGIT, min(MAX_LOGIT, self.slope * (score - self.midpoint)))
+
+    def probability(self, score: float) -> float:
+        return sigmoid(self.logit(score))
+
+
+class FaceModality:
+    name = "face"
+
+    def __init__(self):
+        self.calibration = Calibration(settings.FUSION_FACE_SLOPE, settings.FUSION_FACE_MIDPOINT)
+
+    def candidates(self, image_path: str, limit: int):
+        """[(payload, score)] of the nearest enrolled faces, or None when no face is visible."""
+        from app.services.face_service import face_service
+        from app.services.memory_service import memory_service
+        embedding = face_service.generate_embedding(image_path)
+        if not embedding:
+            return None
+        return [(m.payload, m.score) for m in memory_service.search_face(embedding, limit=limit)]
+
+
+class VoiceModality:
+    name = "voice"
+
+    def __init__(self):
+        self.calibration = Calibration(settings.FUSION_VOICE_SLOPE, settings.FUSION_VOICE_MIDPOINT)
+
+    def candidates(self, audio_path: str, limit: int):
+        """[(payload, score)] of the nearest enrolled voices, or None when there is no usable speech."""
+        from app.services.speaker_service import speaker_service
+        from app.services.memory_service import memory_service
+        embedding = speaker_service.generate_embedding(audio_path)
+        if not embedding:
+            return None
+        return [(m.payload, m.score) for m in memory_service.search_voice(embedding, limit=limit)]
+
+
+class FusionRecognizer:
+    def __init__(self, modalities: dict = None):
+        self.modalities = modalities or {"face": FaceModality(), "voice": VoiceModality()}
+
+    @traced("fusion.recognize", service="fusion")
+    def recognize(self, inputs: dict, context: dict = None) -> dict:
+        """
+        inputs: {"face": image_path, "voice": audio_path} (any subset).
+        context: the conversation context (person currently being discussed), optional.
+        """
+        order = [m.strip() for m in settings.FUSION_ORDER.split(",")]
+        order = [m for m in order if m in self.modalities] + [m for m in self.modalities if m not in order]
+        available = [m for m in order if inputs.get(m)]
+        if not available:
+            return {"status": "no_input", "person": None, "modalities": {}, "skipped": []}
+
+        context_key = person_key(context) if context else None
+        people = {}  # key -> {"payload": ..., "scores": {modality: best score}}
+        floors = {}  # modality -> lowest score it returned (stand-in for people it didn't return)
+        report = {}
+        decided_by = None
+
+        for i, name in enumerate(available):
+            modality = self.modalities[name]
+            started = time.perf_counter()
+            found = modality.candidates(inputs[name], settings.FUSION_TOP_K)
+            report[name] = {"ms": round((time.perf_counter() - started) * 1000, 1)}
+            if not found:
+                report[name]["signal"] = False
+                continue
+
+            floors[name] = min(score for _, score in found)
+            for payload, score in found:
+                entry = people.setdefault(person_key(payload), {"payload": payload, "scores": {}})
+                if score > entry["scores"].get(name, -1.0):
+                    entry["scores"][name] = score
+            best = max(found, key=lambda f: f[1])
+            report[name].update({"signal": True, "score": best[1], "probability": modality.calibration.probability(best[1])})
+
+            ranked = self._rank(people, floors, context_key)
+            if self._decisive(ranked) and i < len(available) - 1:
+                decided_by = name
+                break
+
+        skipped = available[available.index(decided_by) + 1:] if decided_by else []
+        result = {"modalities": report, "skipped": skipped, "decided_by": decided_by}
+
+        ranked = self._rank(people, floors, context_key)
+        if not ranked:
+            return {"status": "unknown", "person": None, **result}
+
+        logit, key = ranked[0]
+        runner_up = ranked[1][0] if len(ranked) > 1 else -MAX_LOGIT * len(self.modalities)
+        probability = sigmoid(logit)
+        if probability >= settings.FUSION_ACCEPT and logit - runner_up >= settings.FUSION_MARGIN:
+            status = "identified"
+        elif probability >= 1.0 - settings.FUSION_ACCEPT:
+            status = "uncertain"
+        else:
+            return {"status": "unknown", "person": None, **result}
+
+        payload = people[key]["payload"]
+        return {
+            "status": status,
+            "person": {
+                "name": payload.get("name", "Unknown"),
+                "relation": payload.get("relation", "Unknown"),
+                "confidence": probability,
+                "id": key,
+                "notes": payload.get("notes", ""),
+                "image": payload.get("image_base64"),
+                "audio": payload.get("audio_base64"),
+                "scores": people[key]["scores"],
+                "from_context": key == context_key,
+            },
+            **result
+        }
+
+    def _rank(self, people: dict, floors: dict, context_key: str = None) -> list:
+        """[(fused log-odds, key)] best first."""
+        ranked = []
+        for key, entry in people.items():
+            logit = settings.FUSION_CONTEXT_BOOST if key == context_key else 0.0
+            for name, floor in floors.items():
+                score = entry["scores"].get(name, floor)
+                logit += self.modalities[name].calibration.logit(score)
+            ranked.append((logit, key))
+        ranked.sort(reverse=True)
+        return ranked
+
+    @staticmethod
+    def _decisive(ranked: list) -> bool:
+        if not ranked:
+            return False
+        margin = ranked[0][0] - ranked[1][0] if len(ranked) > 1 else float("inf")
+        return sigmoid(ranked[0][0]) >= settings.FUSION_DECISIVE and margin >= settings.FUSION_MARGIN
+
+
+fusion_recognizer = FusionRecognizer()
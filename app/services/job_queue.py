@@ -0,0 +1,293 @@
+"""
+Persistent background job queue (SQLite) with worker threads.
+
+Slow side work (avatar generation, thumbnails, semantic indexing, audio) is
+enqueued instead of being done inline in the request. Claiming is a single
+atomic UPDATE, so several API processes can share one queue file. A claim
+records the worker process and a lease (JOB_LEASE_SECONDS) that a heartbeat
+thread renews while the job runs, up to the job's timeout (JOB_TIMEOUT, or per
+kind). A job whose lease expired, because its process died or it overran the
+timeout, is claimed again by any worker; a hung handler can't be interrupted,
+so if it ever returns its outcome is discarded. Jobs of live processes are
+never taken over, even when another process (re)starts. A failed job is
+retried after JOB_RETRY_DELAY, doubling per attempt.
+
+Handlers are registered per job kind and receive a `Job`; they may be plain
+functions or coroutines (each worker thread runs its own event loop). A job
+records the request id of the request that enqueued it, and its logs carry it.
+
+The SQLite connection and the worker id belong to a process and are created on
+first use: with GUNICORN_PRELOAD=1 the module-level queue is built in the
+master, and each forked worker then opens its own connection and gets its own
+id instead of sharing the master's.
+"""
+import asyncio
+import inspect
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from app.core.config import settings
+from app.core.logging import get_logger, request_id_var
+
+logger = get_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,          -- queued | running | done | failed
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    request_id TEXT,
+    worker TEXT,                   -- process that claimed it
+    lease_until REAL,              -- claim expires unless the worker's heartbeat renews it
+    run_after REAL,                -- retry backoff: not claimed before this
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, created_at);
+"""
+
+
+class Job:
+    def __init__(self, queue, row: dict):
+        self.queue = queue
+        self.id = row["id"]
+        self.kind = row["kind"]
+        self.payload = json.loads(row["payload"])
+        self.attempts = row["attempts"]  # Also identifies this claim of the job
+        self.request_id = row.get("request_id")
+
+    def progress(self, fraction: float, message: str = None):
+        self.queue._update(self.id, progress=fraction, message=message)
+
+
+class JobQueue:
+    def __init__(self, path: str = None, workers: int = None):
+        self.path = path or settings.JOB_QUEUE_PATH
+        self.workers = workers or settings.JOB_WORKERS
+        self.handlers = {}
+        self.timeouts = {}
+        self.lease = settings.JOB_LEASE_SECONDS
+        self.retry_delay = settings.JOB_RETRY_DELAY
+        self.retry_max_delay = settings.JOB_RETRY_MAX_DELAY
+        self._pid = None
+        self._conn = None
+
+    def _process(self):
+        """Set up this process's state: on first use, and again in a child forked after that."""
+        if self._pid == os.getpid():
+            return
+        # Nothing is inherited across a fork: the parent's connection, locks and threads aren't ours
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._threads = []
+        self._stopping = False
+        self._stopped = threading.Event()
+        self._deadlines = {}  # (job id, attempt) -> when the heartbeat stops renewing its lease
+        self._worker_id = f"{socket.gethostname()}:{self._pid}:{uuid.uuid4().hex[:8]}"
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        columns = {r["name"] for r in self._conn.execute("PRAGMA table_info(jobs)")}
+        # Queue files from before request ids / leases / backoff
+        for column, kind in (("request_id", "TEXT"), ("worker", "TEXT"), ("lease_until", "REAL"), ("run_after", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+
+    @contextmanager
+    def _db(self):
+        self._process()
+        with self._lock:
+            yield self._conn
+
+    @property
+    def worker_id(self) -> str:
+        """Identifies this process's claims: host, pid and a random suffix (pids get reused)."""
+        self._process()
+        return self._worker_id
+
+    # --- Registration / producers ---
+
+    def handler(self, kind: str, timeout: float = None):
+        def register(fn):
+            self.handlers[kind] = fn
+            self.timeouts[kind] = timeout or settings.JOB_TIMEOUT
+            return fn
+        return register
+
+    def enqueue(self, kind: str, payload: dict) -> str:
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        with self._db() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, payload, status, request_id, created_at, updated_at) "
+                "VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), request_id_var.get(), now, now),
+            )
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def get(self, job_id: str):
+        with self._db() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "progress": row["progress"],
+            "message": row["message"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "attempts": row["attempts"],
+            "request_id": row["request_id"],
+            "worker": row["worker"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+
+    def depth(self) -> int:
+        """Number of jobs waiting to run."""
+        with self._db() as conn:
+            return conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+
+    # --- Workers ---
+
+    def start(self):
+        self._process()
+        if self._threads:
+            return
+        self._stopping = False
+        self._stopped.clear()
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        t = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+        t.start()
+        self._threads.append(t)
+        logger.info("Job queue started (%d workers, %s)", self.workers, self.path)
+
+    def stop(self):
+        self._process()
+        self._stopping = True
+        self._stopped.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for t in self._threads:
+            t.join(timeout=5)
+        self._threads = []
+
+    def _claim(self):
+        now = time.time()
+        with self._db() as conn:
+            # Crash recovery: jobs whose worker stopped renewing the lease (NULL: claimed before
+            # leases existed) go back in line, or fail if that was their last attempt
+            recovered = conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+                "error = 'Worker lost (lease expired)', lease_until = NULL, updated_at = ? "
+                "WHERE status = 'running' AND COALESCE(lease_until, 0) < ?",
+                (settings.JOB_MAX_ATTEMPTS, now, now),
+            ).rowcount
+            row = conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, worker = ?, lease_until = ?, updated_at = ? "
+                "WHERE id = (SELECT id FROM jobs WHERE status = 'queued' AND COALESCE(run_after, 0) <= ? "
+                "ORDER BY created_at LIMIT 1) AND status = 'queued' RETURNING *",
+                (self.worker_id, now + self.lease, now, now),
+            ).fetchone()
+        if recovered:
+            logger.warning("Recovered %d job(s) whose worker's lease expired", recovered)
+        return Job(self, dict(row)) if row else None
+
+    def _heartbeat(self):
+        """Renew the leases of this process's running jobs, until their timeout or stop()."""
+        while not self._stopped.wait(timeout=self.lease / 3):
+            now = time.time()
+            with self._db() as conn:
+                for (job_id, attempt), deadline in list(self._deadlines.items()):
+                    if deadline <= now:
+                        # Hung: let the lease run out so another worker takes the job over
+                        self._deadlines.pop((job_id, attempt), None)
+                        logger.warning("Job %s overran its timeout; no longer renewing its lease", job_id,
+                                       extra={"job_id": job_id})
+                        continue
+                    conn.execute(
+                        "UPDATE jobs SET lease_until = ? WHERE id = ? AND attempts = ? AND worker = ? "
+                        "AND status = 'running'",
+                        (now + self.lease, job_id, attempt, self.worker_id),
+                    )
+
+    def _update(self, job_id: str, **fields):
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{k} = ?" for k in fields)
+        with self._db() as conn:
+            conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def _finish(self, job: Job, **fields):
+        """Record the outcome, unless the lease was lost and another worker has claimed the job since."""
+        fields.update(updated_at=time.time(), lease_until=None)
+        columns = ", ".join(f"{k} = ?" for k in fields)
+        with self._db() as conn:
+            owned = conn.execute(
+                f"UPDATE jobs SET {columns} WHERE id = ? AND worker = ? AND attempts = ?",
+                (*fields.values(), job.id, self.worker_id, job.attempts),
+            ).rowcount
+        if not owned:
+            logger.warning("Job %s %s finished after losing its lease; outcome discarded", job.kind, job.id)
+
+    def _worker(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            while not self._stopping:
+                job = self._claim()
+                if job is None:
+                    with self._wakeup:
+                        self._wakeup.wait(timeout=1.0)
+                    continue
+                self._run(loop, job)
+        finally:
+            loop.close()
+
+    def _run(self, loop, job: Job):
+        handler = self.handlers.get(job.kind)
+        if handler is None:
+            self._finish(job, status="failed", error=f"No handler for job kind '{job.kind}'")
+            return
+        token = request_id_var.set(job.request_id)
+        self._deadlines[job.id, job.attempts] = time.time() + self.timeouts.get(job.kind, settings.JOB_TIMEOUT)
+        try:
+            result = handler(job)
+            if inspect.isawaitable(result):
+                result = loop.run_until_complete(result)
+            self._finish(job, status="done", progress=1.0, result=json.dumps(result) if result is not None else None)
+        except Exception as e:
+            logger.warning("Job %s %s failed (attempt %d): %s", job.kind, job.id, job.attempts, e,
+                           extra={"job_id": job.id, "job_kind": job.kind})
+            if job.attempts < settings.JOB_MAX_ATTEMPTS:
+                delay = min(self.retry_delay * 2 ** (job.attempts - 1), self.retry_max_delay)
+                self._finish(job, status="queued", error=str(e), run_after=time.time() + delay)
+            else:
+                self._finish(job, status="failed", error=str(e))
+        finally:
+            self._deadlines.pop((job.id, job.attempts), None)
+            request_id_var.reset(token)
+
+
+job_queue = JobQueue()
@@ -0,0 +1,201 @@
+"""
+Pluggable LLM backends for LLMService.
+
+- groq:     Llama 3 over the Groq API (default when GROQ_API_KEY is set)
+- llamacpp: local GGUF model via llama-cpp-python (offline kiosks, LLM_MODEL_PATH)
+- stub:     deterministic template answers, no model (tests, demos)
+
+All backends take OpenAI-style chat messages and are async: network calls go
+through the shared pooled HTTP client, local inference runs in a worker thread
+so it never blocks the event loop.
+"""
+import asyncio
+import json
+import os
+import re
+
+from starlette.concurrency import iterate_in_threadpool
+
+from app.core.config import settings
+from app.core.http_client import http_client
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class LLMBackend:
+    name = "base"
+
+    async def complete(self, messages: list, max_tokens: int = 100, temperature: float = 0.7) -> str:
+        raise NotImplementedError
+
+    async def stream(self, messages: list, max_tokens: int = 100, temperature: float = 0.7):
+        """Yields text chunks. Backends without native streaming yield the whole answer once."""
+        yield await self.complete(messages, max_tokens=max_tokens, temperature=temperature)
+
+
+class GroqBackend(LLMBackend):
+    """Groq's OpenAI-compatible chat API over the shared keep-alive client (retries + circuit breaker)."""
+    name = "groq"
+
+    def __init__(self, api_key: str, model: str = None):
+        self.url = f"{settings.GROQ_BASE_URL}/chat/completions"
+        self.headers = {"Authorization": f"Bearer {api_key}"}
+        self.model = model or settings.LLM_MODEL
+
+    def _body(self, messages, max_tokens, temperature, stream=False) -> dict:
+        return {
+            "messages": messages,
+            "model": self.model,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": stream,
+        }
+
+    async def complete(self, messages, max_tokens=100, temperature=0.7):
+        response = await http_client.request(
+            "POST", self.url, headers=self.headers, json=self._body(messages, max_tokens, temperature),
+            idempotent=True,  # A completion creates nothing, so a retry is safe
+        )
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"]["content"]
+
+    async def stream(self, messages, max_tokens=100, temperature=0.7):
+        async with http_client.stream(
+            "POST", self.url, headers=self.headers, json=self._body(messages, max_tokens, temperature, stream=True)
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                # Server-sent events: "data: {...}" ... "data: [DONE]"
+                if not line.startswith("data: "):
+                    continue
+                data = line[len("data: "):]
+                if data.strip() == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                delta = chunk["choices"][0]["delta"].get("content") if chunk.get("choices") else None
+                if delta:
+                    yield delta
+
+
+class LlamaCppBackend(LLMBackend):
+    name = "llamacpp"
+
+    def __init__(self, model_path: str):
+        from llama_cpp import Llama  # Optional dependency: pip install llama-cpp-python
+        logger.info("Loading local model %s...", model_path)
+        self.llm = Llama(
+            model_path=model_path,
+            n_ctx=settings.LLM_CONTEXT,
+            n_threads=settings.LLM_THREADS,
+            verbose=False,
+        )
+
+    async def complete(self, messages, max_tokens=100, temperature=0.7):
+        out = await asyncio.to_thread(
+            self.llm.create_chat_completion, messages=messages, max_tokens=max_tokens, temperature=temperature
+        )
+        return out["choices"][0]["message"]["content"]
+
+    async def stream(self, messages, max_tokens=100, temperature=0.7):
+        chunks = self.llm.create_chat_completion(
+            messages=messages, max_tokens=max_tokens, temperature=temperature, stream=True
+        )
+        async for chunk in iterate_in_threadpool(chunks):
+            delta = chunk["choices"][0]["delta"].get("content")
+            if delta:
+                yield delta
+
+
+class StubBackend(LLMBackend):
+    """Answers from the 'Memory: Name=..., Relation=..., Notes=...' context line, deterministically."""
+    name = "stub"
+
+    CONTEXT_FIELD = re.compile(r"(Name|Relation|Notes|Location)=([^,\n]*)")
+
+    async def complete(self, messages, max_tokens=100, temperature=0.7):
+        prompt = messages[-1]["content"] if messages else ""
+        fields = dict(self.CONTEXT_FIELD.findall(prompt))
+        name = fields.get("Name", "").strip()
+        if not name:
+            return "I am listening."
+        answer = f"That is {name}"
+        relation = fields.get("Relation", "").strip()
+        if relation and relation != "Unspecified":
+            answer += f", your {relation}"
+        answer += "."
+        notes = fields.get("Notes", "").strip()
+        if notes:
+            answer += f" {notes}"
+        return answer
+
+
+class ChainBackend(LLMBackend):
+    """Try backends in order (e.g. Groq, then the local model when offline or the circuit is open)."""
+
+    def __init__(self, backends: list):
+        self.backends = backends
+        self.name = "+".join(b.name for b in backends)
+
+    async def complete(self, messages, max_tokens=100, temperature=0.7):
+        error = None
+        for backend in self.backends:
+            try:
+                return await backend.complete(messages, max_tokens=max_tokens, temperature=temperature)
+            except Exception as e:
+                logger.warning("%s failed (%s), trying next backend", backend.name, e)
+                error = e
+        raise error
+
+    async def stream(self, messages, max_tokens=100, temperature=0.7):
+        error = None
+        for backend in self.backends:
+            produced = False
+            try:
+                async for delta in backend.stream(messages, max_tokens=max_tokens, temperature=temperature):
+                    produced = True
+                    yield delta
+                return
+            except Exception as e:
+                if produced:
+                    raise
+                logger.warning("%s failed (%s), trying next backend", backend.name, e)
+                error = e
+        raise error
+
+
+def create_backend(name: str = None, api_key: str = None):
+    """
+    Build the backend named by LLM_BACKEND. 'auto' uses Groq when a key is set and
+    the local model when present, chained in that order. None -> rule-based fallback.
+    """
+    name = (name or settings.LLM_BACKEND).lower()
+    api_key = api_key or settings.GROQ_API_KEY or os.getenv("GROQ_API_KEY")
+    model_path = settings.LLM_MODEL_PATH
+
+    if name == "auto":
+        candidates = []
+        if api_key:
+            candidates.append("groq")
+        if model_path and os.path.exists(model_path):
+            candidates.append("llamacpp")
+        backends = [b for b in (create_backend(c, api_key) for c in candidates) if b]
+        if not backends:
+            return None
+        return backends[0] if len(backends) == 1 else ChainBackend(backends)
+
+    try:
+        if name == "groq":
+            if not api_key:
+                logger.warning("LLM_BACKEND=groq but no GROQ_API_KEY")
+                return None
+            return GroqBackend(api_key)
+        if name == "llamacpp":
+            return LlamaCppBackend(model_path)
+        if name == "stub":
+            return StubBackend()
+    except Exception as e:
+        logger.error("Failed to init %s backend: %s", name, e)
+        return None
+
+    raise ValueError(f"Unknown LLM_BACKEND: {name}")
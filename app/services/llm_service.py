@@ -1,75 +1,161 @@
+import hashlib
 import os
-from groq import Groq
+import time
 from app.core.config import settings
+from app.services.llm_backends import create_backend
+from app.services.response_cache import ResponseCache, SemanticResponseCache
+from app.core.metrics import timed, record_cache, STAGE_SECONDS
+from app.core.logging import get_logger
+from app.core.tracing import span, set_attributes
+
+logger = get_logger(__name__)
 
 class LLMService:
-    def __init__(self):
+    def __init__(self, backend=None, embedder=None):
         self.api_key = settings.GROQ_API_KEY or os.getenv("GROQ_API_KEY")
-        print(f"DEBUG LLM: API Key Loaded? {bool(self.api_key)}")
-        if self.api_key:
-             print(f"DEBUG LLM: Key starts with {self.api_key[:4]}...")
-        
-        self.client = None
-        if self.api_key:
-            try:
-                self.client = Groq(api_key=self.api_key)
-                print("DEBUG LLM: Groq Client Initialized")
-            except Exception as e:
-                print(f"DEBUG LLM: Failed to init Groq: {e}")
-        
-    def generate_response(self, user_text: str, context: dict = None) -> str:
+        self.backend = backend or create_backend(api_key=self.api_key)
+        logger.info("LLM backend: %s (API key configured: %s)", self.backend.name if self.backend else "fallback", bool(self.api_key))
+
+        self.cache = ResponseCache()
+        self.semantic_cache = SemanticResponseCache() if settings.LLM_SEMANTIC_CACHE_ENABLED else None
+        self._embedder = embedder
+
+    def _embed(self, text: str):
+        if self._embedder is None:
+            # Reuse the MiniLM encoder already loaded for semantic memory
+            from app.services.semantic_memory import semantic_memory
+            self._embedder = semantic_memory.encoder.encode
+        return self._embedder(text)
+
+    @staticmethod
+    def context_fingerprint(context: dict = None) -> str:
+        """Identifies the prompt context an answer was built from; part of every cache key."""
+        return hashlib.sha1(LLMService._context_str(context).encode("utf-8")).hexdigest()[:16]
+
+    def _cached(self, person: str, user_text: str, fingerprint: str):
+        """Exact (person + context + normalized question) hit, then a near-duplicate question about the same person."""
+        cached = self.cache.get(person, user_text, fingerprint)
+        record_cache("llm_exact", cached is not None)
+        if cached is not None or self.semantic_cache is None:
+            return cached, None
+        with timed("text.embed"):
+            embedding = self._embed(user_text)
+        cached = self.semantic_cache.get(person, embedding, fingerprint)
+        record_cache("llm_semantic", cached is not None)
+        return cached, embedding
+
+    def _remember(self, person: str, user_text: str, fingerprint: str, embedding, text: str):
+        self.cache.put(person, user_text, text, fingerprint)
+        if self.semantic_cache is not None and embedding is not None:
+            self.semantic_cache.put(person, embedding, text, fingerprint)
+
+    def forget(self, person: str):
+        """Free cached answers about `person` early (this process only; changed context already misses the caches)."""
+        self.cache.invalidate(person)
+        if self.semantic_cache is not None:
+            self.semantic_cache.invalidate(person)
+
+    SYSTEM_PROMPT = (
+        "You are an empathetic memory assistant for an elderly person with dementia. "
+        "Your goal is to be kind, patient, and helpful. "
+        "Use the provided CONTEXT to answer the user's question. "
+        "Keep answers short (1-2 sentences) and conversational. "
+        "If the context provides a name and relation, use them warmly. "
+        "Do NOT mention 'database' or 'records'. Speak naturally. "
+        "The Context includes 'Has Audio' and 'Has Image' flags. "
+        "Use them: If user asks about voice and Has Audio=False, say you don't recall their voice. "
+        "If user asks about appearance and Has Image=False, say you don't have a photo. "
+        "Otherwise, focus on the identity and notes."
+    )
+
+    @staticmethod
+    def _context_str(context: dict = None) -> str:
+        context_str = "No specific memory found."
+        if context:
+            name = context.get("name", "Unknown")
+            relation = context.get("relation", "Unspecified")
+            notes = context.get("notes", "")
+            location = context.get("location", "")
+            has_audio = context.get("has_audio", False)
+            has_image = context.get("has_image", False)
+            context_str = f"Memory: Name={name}, Relation={relation}, Notes={notes}, Location={location}, Has Audio={has_audio}, Has Image={has_image}"
+        return context_str
+
+    def _build_messages(self, user_text: str, context: dict = None) -> list:
+        return [
+            {"role": "system", "content": self.SYSTEM_PROMPT},
+            {"role": "user", "content": f"Context: {self._context_str(context)}\n\nUser: {user_text}"}
+        ]
+
+    async def generate_response(self, user_text: str, context: dict = None) -> str:
         """
-        Generates a conversational response using Groq (Llama3).
+        Generates a conversational response with the configured backend (Groq / local / stub).
+        Repeat questions about the same person are served from the response caches.
         """
-        if not self.client:
-            print("DEBUG LLM: No Client, using Fallback")
+        if not self.backend:
+            logger.debug("No LLM backend, using fallback")
             return self._fallback_response(context)
+
+        person = context.get("name") if context else None
+        fingerprint = self.context_fingerprint(context)
+        cached, embedding = self._cached(person, user_text, fingerprint)
+        set_attributes(**{"llm.cache_hit": cached is not None})
+        if cached is not None:
+            return cached
             
         try:
-            print("DEBUG LLM: Sending request to Groq...")
-            # Construct System Prompt
-            system_prompt = (
-                "You are an empathetic memory assistant for an elderly person with dementia. "
-                "Your goal is to be kind, patient, and helpful. "
-                "Use the provided CONTEXT to answer the user's question. "
-                "Keep answers short (1-2 sentences) and conversational. "
-                "If the context provides a name and relation, use them warmly. "
-                "Do NOT mention 'database' or 'records'. Speak naturally. "
-                "The Context includes 'Has Audio' and 'Has Image' flags. "
-                "Use them: If user asks about voice and Has Audio=False, say you don't recall their voice. "
-                "If user asks about appearance and Has Image=False, say you don't have a photo. "
-                "Otherwise, focus on the identity and notes."
-            )
-            
-            # Construct Context String
-            context_str = "No specific memory found."
-            if context:
-                name = context.get("name", "Unknown")
-                relation = context.get("relation", "Unspecified")
-                notes = context.get("notes", "")
-                location = context.get("location", "")
-                has_audio = context.get("has_audio", False)
-                has_image = context.get("has_image", False)
-                context_str = f"Memory: Name={name}, Relation={relation}, Notes={notes}, Location={location}, Has Audio={has_audio}, Has Image={has_image}"
-            
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Context: {context_str}\n\nUser: {user_text}"}
-            ]
-            
-            chat_completion = self.client.chat.completions.create(
-                messages=messages,
-                model="llama-3.1-8b-instant",
-                temperature=0.7,
-                max_tokens=100,
-            )
-            
-            return chat_completion.choices[0].message.content
+            logger.debug("Sending request to %s", self.backend.name)
+            messages = self._build_messages(user_text, context)
+            with span("llm.complete", service="llm", backend=self.backend.name,
+                      **{"llm.prompt_chars": sum(len(m["content"]) for m in messages)}) as current, \
+                    timed(f"llm.{self.backend.name}"):
+                text = await self.backend.complete(messages, max_tokens=100, temperature=0.7)
+                current.set_attribute("llm.response_chars", len(text or ""))
+            self._remember(person, user_text, fingerprint, embedding, text)
+            return text
             
         except Exception as e:
-            print(f"LLM Error: {e}")
+            logger.error("LLM error: %s", e)
             return self._fallback_response(context)
 
+    async def stream_response(self, user_text: str, context: dict = None):
+        """
+        Same as generate_response, but yields text chunks as the backend produces them.
+        Falls back to the rule-based response (one chunk) if the LLM is unavailable
+        or fails before producing anything.
+        """
+        if not self.backend:
+            yield self._fallback_response(context)
+            return
+
+        person = context.get("name") if context else None
+        fingerprint = self.context_fingerprint(context)
+        cached, embedding = self._cached(person, user_text, fingerprint)
+        set_attributes(**{"llm.cache_hit": cached is not None})
+        if cached is not None:
+            yield cached
+            return
+
+        produced = []
+        started = time.perf_counter()
+        messages = self._build_messages(user_text, context)
+        try:
+            with span("llm.stream", service="llm", backend=self.backend.name,
+                      **{"llm.prompt_chars": sum(len(m["content"]) for m in messages)}) as current:
+                async for delta in self.backend.stream(messages, max_tokens=100, temperature=0.7):
+                    if not produced:
+                        first_token = time.perf_counter() - started
+                        STAGE_SECONDS.labels(f"llm.{self.backend.name}.first_token").observe(first_token)
+                        current.set_attribute("llm.first_token_seconds", round(first_token, 4))
+                    produced.append(delta)
+                    yield delta
+                current.set_attribute("llm.response_chars", sum(len(d) for d in produced))
+            self._remember(person, user_text, fingerprint, embedding, "".join(produced))
+        except Exception as e:
+            logger.error("LLM stream error: %s", e)
+            if not produced:
+                yield self._fallback_response(context)
+
     def _fallback_response(self, context: dict) -> str:
         """Rule-based responses when LLM is offline."""
         if not context:
@@ -0,0 +1,29 @@
+import base64
+import io
+from PIL import Image
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+def encode_image_base64(image_path: str):
+    """Resize and encode image to base64 for storage."""
+    try:
+        with Image.open(image_path) as img:
+            # Resize to thumbnail to save space (e.g., 300px max)
+            img.thumbnail((300, 300))
+            buffered = io.BytesIO()
+            img.convert("RGB").save(buffered, format="JPEG", quality=70)
+            img_str = base64.b64encode(buffered.getvalue()).decode("utf-8")
+            return f"data:image/jpeg;base64,{img_str}"
+    except Exception as e:
+        logger.warning("Error encoding image: %s", e)
+        return None
+
+def encode_audio_base64(audio_path: str):
+    """Raw base64 of a voice sample (played back by the frontend)."""
+    try:
+        with open(audio_path, "rb") as f:
+            return base64.b64encode(f.read()).decode("utf-8")
+    except Exception as e:
+        logger.warning("Error encoding audio: %s", e)
+        return None
@@ -1,58 +1,75 @@
-from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams, Distance, PointStruct, Filter, FieldCondition, MatchValue, MatchText
+from qdrant_client.models import PointStruct, Filter, FieldCondition, MatchValue, PointIdsList
 from app.core.config import settings
+from app.services.embedding_projection import object_vector_size, object_projection_version
+from app.services.vector_index import get_vector_client, search_params, ensure_collection, alias_target
+from app.services.model_versions import model_version, vector_name, generation_name, VectorNames
+import hashlib
 import uuid
+from app.core.logging import get_logger
+from app.core.tracing import traced, set_attributes
+
+logger = get_logger(__name__)
 
 class MemoryService:
+    # Collection name -> vector size
+    COLLECTIONS = {
+        "faces": 512,
+        "objects": object_vector_size(), # 1280 (MobileNetV2) unless projected
+        "patients": 512, # Caregiver Data, same as Faces
+        "voices": 192, # ECAPA speaker embeddings of enrolled voice samples
+    }
+
     def __init__(self):
-        print("DEBUG: Initializing MemoryService (Qdrant)...", flush=True)
-        if settings.QDRANT_MODE == "local":
-            self.client = QdrantClient(path=settings.QDRANT_PATH)
-        else:
-            self.client = QdrantClient(
-                url=settings.get_qdrant_url(),
-                api_key=settings.QDRANT_API_KEY
-            )
-            
+        logger.info("Initializing MemoryService (%s)...", settings.QDRANT_MODE)
+        self.client = get_vector_client()
+        self.vectors = VectorNames(self.client)
         self._ensure_collections()
 
     def _ensure_collections(self):
-        # 1. FACES
-        try:
-            self.client.get_collection("faces")
-        except Exception:
-            self.client.recreate_collection(
-                collection_name="faces",
-                vectors_config=VectorParams(size=512, distance=Distance.COSINE)
-            )
+        # New collections are created versioned (generation + alias); existing ones are left as they are
+        for name, size in self.COLLECTIONS.items():
+            version = model_version(name)
+            ensure_collection(self.client, name, generation_name(name, version), {vector_name(version): size})
 
-        # 2. OBJECTS
-        try:
-             self.client.get_collection("objects")
-        except Exception:
-             self.client.recreate_collection(
-                collection_name="objects",
-                vectors_config=VectorParams(size=1280, distance=Distance.COSINE)
-             )
-             
-        # 3. PATIENTS (Caregiver Data)
-        try:
-            self.client.get_collection("patients")
-        except Exception:
-            self.client.recreate_collection(
-                collection_name="patients",
-                vectors_config=VectorParams(size=512, distance=Distance.COSINE) # Same as Faces
-            )
+        # Keyword index on name: per-label filtering (object dedup / caps) and per-person lookups (semantic re-index)
+        for name in self.COLLECTIONS:
+            try:
+                self.client.create_payload_index(collection_name=name, field_name="name", field_schema="keyword")
+            except Exception as e:
+                logger.debug("Index creation note: %s", e)
+
+    def drop_collection(self, name: str):
+        """Delete a collection with every generation behind its alias (clean-slate reseeds)."""
+        target = alias_target(self.client, name)
+        if target:
+            self.client.delete_collection(target)
+        self.client.delete_collection(name)
+        self.vectors.forget(name)
+
+    def _upsert(self, collection: str, point_id: str, embedding: list, payload: dict):
+        """Store one point, tagged with the model version and under its vector name."""
+        payload = {**payload, "model_version": model_version(collection)}
+        self.vectors.retry(collection, lambda: self.client.upsert(
+            collection_name=collection,
+            points=[PointStruct(id=point_id, vector=self.vectors.vector(collection, embedding), payload=payload)],
+            wait=True
+        ))
+
+    def _query(self, collection: str, embedding: list, limit: int, query_filter=None):
+        return self.vectors.retry(collection, lambda: self.client.query_points(
+            collection_name=collection,
+            query=embedding,
+            using=self.vectors.using(collection),
+            query_filter=query_filter,
+            limit=limit,
+            search_params=search_params()
+        ).points)
 
     def store_face_memory(self, person_id: str, embedding: list, metadata: dict):
         from datetime import datetime
         point_id = str(uuid.uuid4())
         if "timestamp" not in metadata: metadata["timestamp"] = datetime.now().isoformat()
-        self.client.upsert(
-            collection_name="faces",
-            points=[PointStruct(id=point_id, vector=embedding, payload={"person_id": person_id, **metadata})],
-            wait=True
-        )
+        self._upsert("faces", point_id, embedding, {"person_id": person_id, **metadata})
         return point_id
 
     def store_patient_memory(self, person_id: str, embedding: list, metadata: dict):
@@ -60,42 +77,175 @@ class MemoryService:
         from datetime import datetime
         point_id = str(uuid.uuid4())
         if "timestamp" not in metadata: metadata["timestamp"] = datetime.now().isoformat()
-        self.client.upsert(
-            collection_name="patients",
-            points=[PointStruct(id=point_id, vector=embedding, payload={"person_id": person_id, **metadata})],
-            wait=True
-        )
+        self._upsert("patients", point_id, embedding, {"person_id": person_id, **metadata})
         return point_id
 
+    def update_payload(self, collection_name: str, point_id, metadata: dict):
+        """Merge fields into a stored point's payload (e.g. enrichment results)."""
+        self.client.set_payload(collection_name=collection_name, payload=metadata, points=[point_id], wait=True)
+
+    PEOPLE_COLLECTIONS = ("faces", "patients")
+
+    @traced("memory.person_records", service="memory")
+    def person_records(self, name: str) -> list:
+        """Payloads of every face/patient record enrolled under `name` (oldest first)."""
+        name_filter = Filter(must=[FieldCondition(key="name", match=MatchValue(value=name))])
+        records = []
+        for collection in self.PEOPLE_COLLECTIONS:
+            offset = None
+            while True:
+                batch, offset = self.client.scroll(
+                    collection_name=collection, scroll_filter=name_filter, limit=256, offset=offset,
+                    with_payload=["name", "relation", "notes", "age", "timestamp"], with_vectors=False
+                )
+                records.extend(p.payload for p in batch if p.payload)
+                if offset is None:
+                    break
+        records.sort(key=lambda p: p.get("timestamp", ""))
+        return records
+
+    def person_names(self) -> list:
+        """Distinct names across faces and patients (full scan, for backfills)."""
+        names = set()
+        for collection in self.PEOPLE_COLLECTIONS:
+            offset = None
+            while True:
+                batch, offset = self.client.scroll(
+                    collection_name=collection, limit=256, offset=offset,
+                    with_payload=["name"], with_vectors=False
+                )
+                names.update(p.payload.get("name") for p in batch if p.payload and p.payload.get("name"))
+                if offset is None:
+                    break
+        return sorted(names)
+
+    def update_person(self, person_id: str, metadata: dict) -> int:
+        """Merge metadata edits into every record of `person_id` (faces, patients, voices). Returns records touched."""
+        id_filter = Filter(must=[FieldCondition(key="person_id", match=MatchValue(value=person_id))])
+        touched = 0
+        for collection in self.PEOPLE_COLLECTIONS + ("voices",):
+            count = self.client.count(collection_name=collection, count_filter=id_filter).count
+            if count:
+                self.client.set_payload(collection_name=collection, payload=metadata, points=id_filter, wait=True)
+                touched += count
+        return touched
+
+    def person_name(self, person_id: str):
+        """Current display name stored for `person_id`, or None if unknown."""
+        id_filter = Filter(must=[FieldCondition(key="person_id", match=MatchValue(value=person_id))])
+        for collection in self.PEOPLE_COLLECTIONS:
+            batch, _ = self.client.scroll(
+                collection_name=collection, scroll_filter=id_filter, limit=1, with_payload=["name"], with_vectors=False
+            )
+            if batch:
+                return batch[0].payload.get("name")
+        return None
+
+    @traced("memory.search_face", service="memory")
     def search_face(self, embedding: list, limit=1):
         # Search BOTH faces and patients collections for recognition
         # Merge results manually
-        res1 = self.client.query_points(collection_name="faces", query=embedding, limit=limit).points
-        res2 = self.client.query_points(collection_name="patients", query=embedding, limit=limit).points
+        res1 = self._query("faces", embedding, limit)
+        res2 = self._query("patients", embedding, limit)
         
         all_res = res1 + res2
         all_res.sort(key=lambda x: x.score, reverse=True)
         return all_res[:limit]
 
+    @staticmethod
+    def voice_point_id(person_id: str, audio: bytes) -> str:
+        """Stable id of a person's voice sample: the same clip enrolled twice (retried job, bulk script) is one point."""
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"voice/{person_id}/{hashlib.sha1(audio).hexdigest()}"))
+
+    def store_voice_memory(self, person_id: str, embedding: list, metadata: dict, point_id: str = None):
+        """Speaker embedding of an enrolled voice sample (metadata mirrors the face record)."""
+        from datetime import datetime
+        point_id = point_id or str(uuid.uuid4())
+        if "timestamp" not in metadata: metadata["timestamp"] = datetime.now().isoformat()
+        self._upsert("voices", point_id, embedding, {"person_id": person_id, **metadata})
+        return point_id
+
+    @traced("memory.search_voice", service="memory")
+    def search_voice(self, embedding: list, limit=1):
+        return self._query("voices", embedding, limit)
+
     def store_object_memory(self, object_id: str, embedding: list, metadata: dict):
         from datetime import datetime
         point_id = str(uuid.uuid4())
         if "timestamp" not in metadata: metadata["timestamp"] = datetime.now().isoformat()
-        self.client.upsert(
-            collection_name="objects",
-            points=[PointStruct(id=point_id, vector=embedding, payload={"object_id": object_id, **metadata})],
-            wait=True
-        )
+        metadata.setdefault("projection_version", object_projection_version())
+        self._upsert("objects", point_id, embedding, {"object_id": object_id, **metadata})
         return point_id
 
+    @traced("memory.search_object", service="memory")
     def search_object(self, embedding: list, limit=1):
-        response = self.client.query_points(
-            collection_name="objects",
-            query=embedding,
-            limit=limit
+        return self._query("objects", embedding, limit)
+
+    AUTO_ENROLLED = Filter(should=[
+        FieldCondition(key="source", match=MatchValue(value="auto")),
+        # Points auto-enrolled before 'source' was recorded
+        FieldCondition(key="notes", match=MatchValue(value="Auto-enrolled from observation.")),
+    ])
+
+    def find_similar_object(self, embedding: list, name: str):
+        """Nearest stored point carrying the same label, or None."""
+        points = self._query(
+            "objects", embedding, 1,
+            query_filter=Filter(must=[FieldCondition(key="name", match=MatchValue(value=name))])
+        )
+        return points[0] if points else None
+
+    def refresh_object(self, point_id, metadata: dict):
+        """Update payload fields (e.g. last seen) of an existing object point in place."""
+        self.client.set_payload(collection_name="objects", payload=metadata, points=[point_id], wait=True)
+
+    def mark_object_seen(self, point, metadata: dict = None) -> bool:
+        """
+        Record a sighting of an existing object point (last seen now, seen_count + 1), so the cap keeps it.
+        Plain sightings are written at most every OBJECT_SEEN_UPDATE_SECONDS per point, from the payload
+        the caller read, so seen_count is approximate: it counts recorded sightings, and concurrent ones
+        can overwrite each other. Returns whether anything was written.
+        """
+        from datetime import datetime, timedelta
+        now = datetime.now()
+        payload = point.payload or {}
+        last_seen = payload.get("last_seen")
+        if not metadata and last_seen:
+            try:
+                if now - datetime.fromisoformat(last_seen) < timedelta(seconds=settings.OBJECT_SEEN_UPDATE_SECONDS):
+                    return False
+            except ValueError:
+                pass
+        self.refresh_object(point.id, {
+            "last_seen": now.isoformat(),
+            "seen_count": payload.get("seen_count", 1) + 1,
+            **(metadata or {}),
+        })
+        return True
+
+    def enforce_object_cap(self, name: str, cap: int):
+        """Evict least-recently-seen auto-enrolled points of `name` beyond `cap`. Returns number evicted."""
+        label_filter = Filter(
+            must=[FieldCondition(key="name", match=MatchValue(value=name)), self.AUTO_ENROLLED]
         )
-        return response.points
+        points, offset = [], None
+        while True:
+            batch, offset = self.client.scroll(
+                collection_name="objects", scroll_filter=label_filter, limit=256, offset=offset,
+                with_payload=["last_seen", "timestamp"], with_vectors=False
+            )
+            points.extend(batch)
+            if offset is None:
+                break
+
+        if len(points) <= cap:
+            return 0
+        points.sort(key=lambda p: (p.payload or {}).get("last_seen") or (p.payload or {}).get("timestamp", ""))
+        evict = [p.id for p in points[:len(points) - cap]]
+        self.client.delete(collection_name="objects", points_selector=PointIdsList(points=evict), wait=True)
+        return len(evict)
 
+    @traced("memory.search_by_text", service="memory")
     def search_by_text(self, text_query: str):
         import difflib
         try:
@@ -107,6 +257,7 @@ class MemoryService:
                 except Exception: pass
             
             # ... Fuzzy Search Logic ...
+            set_attributes(**{"query.chars": len(text_query), "points.scanned": len(points)})
             query = text_query.lower()
             candidates = []
             max_score = 0.0
@@ -139,11 +290,12 @@ class MemoryService:
             
             if max_score > 0.4:
                 candidates.sort(key=lambda x: x.payload.get("timestamp", ""), reverse=True)
+                set_attributes(matches=len(candidates[:5]))
                 return candidates[:5]
             return []
 
         except Exception as e:
-            print(f"Fuzzy search error: {e}")
+            logger.warning("Fuzzy search error: %s", e)
             return []
 
 memory_service = MemoryService()
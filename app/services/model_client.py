@@ -0,0 +1,127 @@
+"""
+Proxies for the models hosted by the local model server (app/model_server.py).
+
+With MODEL_SERVER_SOCKET set, API workers don't load FaceNet, YOLO,
+MobileNetV2, MiniLM, Whisper or ECAPA themselves: each service module swaps
+its singleton for the proxy below, which forwards over a Unix socket to the
+one process that holds the weights. The proxies mirror the methods the rest
+of the app calls, so endpoints and jobs are unchanged.
+"""
+import json
+import os
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+from app.core.config import settings
+from app.core.logging import get_logger, request_id_var
+from app.core.tracing import inject_headers
+
+logger = get_logger(__name__)
+
+# Set by the model server itself, so its own imports load the real models
+MODEL_SERVER_ENV = "MASTHISHQ_MODEL_SERVER"
+
+
+def use_model_server() -> bool:
+    return bool(settings.MODEL_SERVER_SOCKET) and os.getenv(MODEL_SERVER_ENV) != "1"
+
+
+class ModelServerClient:
+    def __init__(self, socket_path: str = None):
+        self.socket_path = socket_path or settings.MODEL_SERVER_SOCKET
+        self._client = None
+
+    @property
+    def client(self) -> httpx.Client:
+        # Sync client: the services it stands in for are synchronous. Safe to share across threads.
+        if self._client is None:
+            self._client = httpx.Client(
+                transport=httpx.HTTPTransport(uds=self.socket_path),
+                base_url="http://model-server",
+                timeout=settings.MODEL_SERVER_TIMEOUT,
+            )
+        return self._client
+
+    @staticmethod
+    def _files(paths: list) -> list:
+        return [("files", (Path(p).name, Path(p).read_bytes())) for p in paths]
+
+    @staticmethod
+    def _headers() -> dict:
+        request_id = request_id_var.get()
+        return inject_headers({"X-Request-ID": request_id} if request_id else {})
+
+    def post(self, route: str, paths: list = None, **kwargs) -> dict:
+        files = self._files(paths) if paths else None
+        response = self.client.post(route, files=files, headers=self._headers(), **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    def stream(self, route: str, paths: list):
+        """NDJSON response, one decoded line at a time."""
+        with self.client.stream("POST", route, files=self._files(paths), headers=self._headers()) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+
+
+model_server = ModelServerClient()
+
+
+class RemoteFaceService:
+    def generate_embedding(self, image_path: str) -> list:
+        try:
+            return model_server.post("/face/embed", [image_path])["embedding"]
+        except Exception as e:
+            logger.error("Error generating embedding (model server): %s", e)
+            return []
+
+
+class RemoteObjectDetector:
+    def detect_objects(self, image_path: str):
+        return model_server.post("/object/detect", [image_path])["detections"]
+
+    def generate_embedding(self, image_path: str, project: bool = True):
+        return model_server.post("/object/embed", [image_path], params={"project": project})["embedding"]
+
+
+class RemoteTextEncoder:
+    """Stands in for SentenceTransformer: encode(str) -> 1-D array, encode(list) -> 2-D array."""
+
+    def encode(self, sentences, batch_size: int = 32, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        embeddings = np.asarray(
+            model_server.post("/text/embed", json={"texts": texts, "batch_size": batch_size})["embeddings"],
+            dtype=np.float32,
+        )
+        return embeddings[0] if single else embeddings
+
+
+class RemoteSpeakerService:
+    def embed_batch(self, audio_paths: list) -> list:
+        return model_server.post("/speaker/embed", audio_paths)["embeddings"]
+
+    def generate_embedding(self, audio_path: str) -> list:
+        return self.embed_batch([audio_path])[0]
+
+
+class RemoteVoiceService:
+    def stream(self, audio_path: str):
+        for item in model_server.stream("/voice/transcribe", [audio_path]):
+            yield item["event"], item["data"]
+
+    def transcribe_detailed(self, audio_path: str) -> dict:
+        for event, data in self.stream(audio_path):
+            if event == "done":
+                return data
+
+    def transcribe(self, audio_path: str) -> str:
+        try:
+            return self.transcribe_detailed(audio_path)["text"]
+        except Exception as e:
+            logger.error("Error transcribing audio (model server): %s", e)
+            return ""
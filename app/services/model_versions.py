@@ -0,0 +1,92 @@
+"""
+Which embedding model produced a vector.
+
+Every point carries a `model_version` payload tag, and collections store
+vectors under a name derived from that version. A collection is physically
+`<name>__<vector name>` (one generation per model version) behind an alias
+`<name>`, so the services keep using the plain name. Queries name the vector
+of the model this process runs: a collection without it fails loudly instead
+of comparing embeddings from two different models.
+
+Collections created before versioning have a single unnamed vector ("legacy")
+and keep working until they are re-embedded (app/services/reembedding.py).
+"""
+import re
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.services.embedding_projection import object_projection_version
+
+logger = get_logger(__name__)
+
+
+def model_version(collection: str) -> str:
+    """Version of the model this process embeds `collection` with."""
+    if collection in ("faces", "patients"):
+        return settings.FACE_MODEL_VERSION
+    if collection == "objects":
+        return f"{settings.OBJECT_MODEL_VERSION}-{object_projection_version()}"
+    if collection == "voices":
+        return settings.SPEAKER_MODEL_VERSION or settings.SPEAKER_MODEL
+    if collection == "text_knowledge":
+        from app.services.text_encoder import TEXT_MODEL
+        return settings.TEXT_MODEL_VERSION or TEXT_MODEL
+    raise ValueError(f"No embedding model for collection {collection}")
+
+
+def vector_name(version: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", version.lower()).strip("-")
+
+
+def generation_name(collection: str, version: str) -> str:
+    """Physical collection holding `collection` as embedded by `version`."""
+    return f"{collection}__{vector_name(version)}"
+
+
+class VectorNames:
+    """
+    The vector name each collection is read and written with: this process's model
+    version, or None while the collection is legacy (unnamed). Cached per collection;
+    `retry` re-reads it once when a call fails, e.g. after another process switched
+    the alias to a re-embedded generation.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._stored = {}
+
+    def stored(self, collection: str):
+        """Vector names in the collection (None for a legacy unnamed vector)."""
+        if collection not in self._stored:
+            from app.services.vector_index import stored_vector_names
+            names = stored_vector_names(self.client, collection)
+            current = vector_name(model_version(collection))
+            if names is not None and current not in names:
+                logger.error("Collection %s has no %s vectors (stored: %s); re-embed it", collection, current, sorted(names))
+            self._stored[collection] = names
+        return self._stored[collection]
+
+    def using(self, collection: str):
+        return None if self.stored(collection) is None else vector_name(model_version(collection))
+
+    def vector(self, collection: str, embedding: list):
+        """`embedding` as the `vector` of a PointStruct for this collection."""
+        name = self.using(collection)
+        return embedding if name is None else {name: embedding}
+
+    def forget(self, collection: str = None):
+        if collection is None:
+            self._stored.clear()
+        else:
+            self._stored.pop(collection, None)
+
+    def retry(self, collection: str, call):
+        """`call()`, once more with re-read vector names if it fails and they changed."""
+        try:
+            return call()
+        except Exception:
+            before = self._stored.pop(collection, None)
+            if self.stored(collection) == before:
+                raise
+            logger.info("Vectors of %s changed (%s -> %s), retrying", collection, before, self._stored[collection])
+            return call()
@@ -0,0 +1,114 @@
+"""
+k-NN object recognition with score-weighted per-category voting.
+
+Instead of trusting the single nearest point, retrieve a few neighbours and
+let categories vote. Votes are normalised by how many gallery images a
+category has (cached per-category stats), so a category enrolled with 10
+images doesn't win just by volume. A small first probe usually settles it;
+only ambiguous queries pay for the full top-k.
+"""
+import time
+from collections import defaultdict
+
+from app.core.config import settings
+from app.services.memory_service import memory_service
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class ObjectKNNClassifier:
+    def __init__(self, memory=memory_service):
+        self.memory = memory
+        self._stats = {}
+        self._stats_at = 0.0
+
+    # --- Per-category statistics ---
+
+    def category_stats(self) -> dict:
+        """{category: number of gallery points}, refreshed every OBJECT_STATS_TTL seconds."""
+        if self._stats and time.time() - self._stats_at < settings.OBJECT_STATS_TTL:
+            return self._stats
+
+        counts = defaultdict(int)
+        offset = None
+        try:
+            while True:
+                points, offset = self.memory.client.scroll(
+                    collection_name="objects", limit=512, offset=offset, with_payload=["name"], with_vectors=False
+                )
+                for p in points:
+                    counts[(p.payload or {}).get("name", "Unknown")] += 1
+                if offset is None:
+                    break
+        except Exception as e:
+            logger.warning("Object stats refresh failed: %s", e)
+            return self._stats
+
+        self._stats = dict(counts)
+        self._stats_at = time.time()
+        return self._stats
+
+    def invalidate(self):
+        self._stats_at = 0.0
+
+    # --- Voting ---
+
+    def _vote(self, hits: list, stats: dict):
+        weights = defaultdict(float)
+        best = {}
+        for h in hits:
+            if h.score <= 0:
+                continue
+            name = (h.payload or {}).get("name", "Unknown")
+            weights[name] += h.score ** 2
+            if name not in best or h.score > best[name].score:
+                best[name] = h
+
+        # Normalise by the number of votes a category could possibly cast
+        k = len(hits)
+        for name in weights:
+            weights[name] /= min(stats.get(name, 1), k) or 1
+
+        total = sum(weights.values())
+        if not total:
+            return None
+        winner = max(weights, key=weights.get)
+        return {
+            "name": winner,
+            "point": best[winner],
+            "score": best[winner].score,
+            "share": weights[winner] / total,
+            "votes": sum(1 for h in hits if (h.payload or {}).get("name", "Unknown") == winner),
+        }
+
+    def _decisive(self, result: dict, stats: dict, k: int) -> bool:
+        if result["share"] < settings.OBJECT_KNN_DOMINANCE:
+            return False
+        # Every neighbour the category could supply agrees
+        return result["votes"] >= min(stats.get(result["name"], 1), k)
+
+    def classify(self, embedding: list):
+        """
+        Returns {"name", "point", "score", "share", "votes", "searched"} or None.
+        `score` is the best similarity within the winning category.
+        """
+        stats = self.category_stats()
+
+        initial_k = settings.OBJECT_KNN_INITIAL_K
+        hits = self.memory.search_object(embedding, limit=initial_k)
+        result = self._vote(hits, stats)
+        if result is None:
+            return None
+        if self._decisive(result, stats, initial_k) or len(hits) < initial_k:
+            result["searched"] = len(hits)
+            return result
+
+        hits = self.memory.search_object(embedding, limit=settings.OBJECT_KNN_K)
+        result = self._vote(hits, stats)
+        if result is not None:
+            result["searched"] = initial_k + len(hits)
+        return result
+
+
+object_classifier = ObjectKNNClassifier()
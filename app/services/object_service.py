@@ -1,12 +1,17 @@
 
-from ultralytics import YOLO
+# ultralytics / TensorFlow are imported when the models load, so API workers that
+# proxy to the model server (MODEL_SERVER_SOCKET) never pull them in.
 import numpy as np
 from PIL import Image
 import os
-import tensorflow as tf
-from tensorflow.keras.applications.mobilenet_v2 import MobileNetV2, preprocess_input
-from tensorflow.keras.preprocessing import image as keras_image
-from tensorflow.keras.models import Model
+from app.services.embedding_projection import object_projection
+from app.services.model_client import use_model_server, RemoteObjectDetector
+from app.core.metrics import timed, record_model_load
+from app.core.logging import get_logger
+from app.core.tracing import traced
+import time
+
+logger = get_logger(__name__)
 
 # Global model instance (lazy load)
 _embedding_model = None
@@ -14,17 +19,26 @@ _embedding_model = None
 def get_embedding_model():
     global _embedding_model
     if _embedding_model is None:
-        print("🧠 Loading MobileNetV2 for Objects...")
+        from tensorflow.keras.applications.mobilenet_v2 import MobileNetV2
+        from tensorflow.keras.models import Model
+        logger.info("Loading MobileNetV2 for objects...")
+        start = time.perf_counter()
         base = MobileNetV2(weights='imagenet', include_top=False, pooling='avg')
         _embedding_model = Model(inputs=base.input, outputs=base.output)
+        record_model_load("mobilenet_v2", time.perf_counter() - start)
     return _embedding_model
 
 class ObjectDetector:
     def __init__(self, model_path="yolov8n.pt"):
-        print(f"DEBUG: Loading YOLO model '{model_path}'...", flush=True)
+        from ultralytics import YOLO
+        logger.info("Loading YOLO model '%s'...", model_path)
+        start = time.perf_counter()
         self.detector = YOLO(model_path)
-        print("DEBUG: YOLO loaded.", flush=True)
+        record_model_load("yolo", time.perf_counter() - start)
+        logger.info("YOLO loaded")
     
+    @traced("object.detect_objects", service="object")
+    @timed("object.yolo")
     def detect_objects(self, image_path: str):
         """Returns YOLO detections."""
         results = self.detector(image_path)
@@ -38,8 +52,16 @@ class ObjectDetector:
                 })
         return detections
 
-    def generate_embedding(self, image_path: str):
-        """Generates 1280-d embedding for the full image (or crop)."""
+    @traced("object.generate_embedding", service="object")
+    @timed("object.embed")
+    def generate_embedding(self, image_path: str, project: bool = True):
+        """
+        Generates the object embedding for the full image (or crop).
+        1280-d MobileNetV2 features, reduced by the fitted projection when enabled
+        (project=False returns the raw features, e.g. for fitting).
+        """
+        from tensorflow.keras.applications.mobilenet_v2 import preprocess_input
+        from tensorflow.keras.preprocessing import image as keras_image
         model = get_embedding_model()
         
         # Load and preprocess
@@ -50,7 +72,9 @@ class ObjectDetector:
         
         # Predict
         embedding = model.predict(x, verbose=0)
+        if project and object_projection is not None:
+            embedding = object_projection.transform(embedding)
         return embedding[0].tolist() # List of floats
 
 # Global instance
-detector = ObjectDetector()
+detector = RemoteObjectDetector() if use_model_server() else ObjectDetector()
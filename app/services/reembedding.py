@@ -0,0 +1,318 @@
+"""
+Online re-embedding of a collection with the model version this process runs.
+
+    enqueue_reembedding("faces")   # job queue; or scripts/reembed_collections.py
+
+The collection keeps serving from its current generation (through the alias)
+while the generation `<name>__<version>` is built next to it:
+
+1. Copy: the current points are scrolled in REEMBED_BATCH batches. Each vector is
+   recomputed from the stored source: the enrolled photo (source_path / image_path /
+   image), else the image_base64 thumbnail; the clip (source_path) for voices; the
+   text for text_knowledge. It is written with the payload and the new
+   `model_version` tag. With REEMBED_KEEP_PREVIOUS the old named vectors are copied
+   too, so workers still running the old model keep working after the switch.
+2. Catch up: enrollments, edits and deletions made during the copy are replayed
+   (new points embedded, payloads synced, removed points deleted) until a pass
+   finds nothing, at most REEMBED_MAX_CATCHUP_PASSES times.
+3. Switch: the alias moves to the new generation in one atomic update, then one
+   more catch-up picks up writes that raced it. The old generation is kept for
+   rollback unless drop_previous.
+
+A collection created before versioning is first moved, vectors untouched, into
+the generation `<name>__legacy` behind the alias (vector_index.promote_legacy),
+so it is kept for rollback like any other generation.
+
+Points whose source is gone are reported; the switch is refused while there are
+any, unless allow_missing (they are left out of the new generation, and stay in
+the previous one until it is dropped). A collection already on this version only
+gets its stale points (written by workers on the old model) re-embedded in place.
+"""
+import base64
+import tempfile
+import threading
+import uuid
+from pathlib import Path
+
+from qdrant_client.models import PointStruct, PointIdsList, Filter, FieldCondition, MatchValue
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.services.job_queue import job_queue
+from app.services.model_versions import model_version, vector_name, generation_name
+from app.services.vector_index import collection_params, alias_target, stored_vectors, switch_alias, promote_legacy
+
+logger = get_logger(__name__)
+
+COLLECTIONS = ("faces", "patients", "objects", "voices", "text_knowledge")
+IMAGE_KEYS = ("source_path", "image_path", "image")
+
+
+def _files(payloads: list, keys: tuple, tmp_dir: str = None) -> list:
+    """Source file per payload (None if none is left); image_base64 thumbnails are written to tmp_dir."""
+    paths = []
+    for payload in payloads:
+        payload = payload or {}
+        path = next((payload[k] for k in keys if isinstance(payload.get(k), str) and Path(payload[k]).is_file()), None)
+        if path is None and tmp_dir and payload.get("image_base64"):
+            path = str(Path(tmp_dir) / f"{uuid.uuid4().hex}.jpg")
+            Path(path).write_bytes(base64.b64decode(payload["image_base64"].split(",", 1)[-1]))
+        paths.append(path)
+    return paths
+
+
+def embedder(collection: str):
+    """payloads -> embeddings with this process's model (None where the source is gone or embedding failed)."""
+    if collection == "text_knowledge":
+        from app.services.semantic_memory import semantic_memory
+
+        def embed(payloads):
+            texts = [(p or {}).get("text") for p in payloads]
+            encoded = iter(semantic_memory.encoder.encode([t for t in texts if t], batch_size=64) if any(texts) else [])
+            return [next(encoded).tolist() if t else None for t in texts]
+        return embed
+
+    if collection == "voices":
+        from app.services.speaker_service import speaker_service
+
+        def embed(payloads):
+            paths = _files(payloads, ("source_path",))
+            embedded = iter(speaker_service.embed_batch([p for p in paths if p]) if any(paths) else [])
+            return [(next(embedded) or None) if p else None for p in paths]
+        return embed
+
+    if collection == "objects":
+        from app.services.object_service import detector
+        generate = detector.generate_embedding
+    else:
+        from app.services.face_service import face_service
+        generate = face_service.generate_embedding
+
+    def embed(payloads):
+        with tempfile.TemporaryDirectory() as tmp:
+            return [(generate(path) or None) if path else None for path in _files(payloads, IMAGE_KEYS, tmp)]
+    return embed
+
+
+class Reembedder:
+    def __init__(self, client, collection: str, size: int, version: str, embed,
+                 keep_previous: bool = None, batch: int = None, progress=None):
+        self.client = client
+        self.collection = collection
+        self.size = size
+        self.version = version
+        self.name = vector_name(version)
+        self.embed = embed
+        if keep_previous is None:
+            # The embedded index holds one vector per collection
+            keep_previous = settings.REEMBED_KEEP_PREVIOUS and settings.QDRANT_MODE != "embedded"
+        self.keep_previous = keep_previous
+        self.batch = batch or settings.REEMBED_BATCH
+        self.progress = progress or (lambda fraction, message=None: None)
+        self.keep = {}
+        self.missing = set()  # ids of points that could not be re-embedded
+        self.stats = {"reembedded": 0, "payloads_synced": 0, "deleted": 0, "catch_up_passes": 0}
+
+    def run(self, drop_previous: bool = False, allow_missing: bool = False) -> dict:
+        if alias_target(self.client, self.collection) is None:
+            self.progress(0.0, "moving the legacy collection behind an alias")
+            promote_legacy(self.client, self.collection, self.batch, settings.REEMBED_MAX_CATCHUP_PASSES)
+        source = alias_target(self.client, self.collection)
+        target = generation_name(self.collection, self.version)
+        stored = stored_vectors(self.client, self.collection)
+        if source == target:
+            return self._refresh_in_place(source, stored)
+
+        if self.keep_previous and stored:
+            self.keep = {name: size for name, size in stored.items() if name != self.name}
+        if self.client.collection_exists(target):
+            self.client.delete_collection(target)  # Left over from an interrupted run
+        self.client.create_collection(collection_name=target, **collection_params({self.name: self.size, **self.keep}))
+        self.client.create_payload_index(collection_name=target, field_name="name", field_schema="keyword")
+
+        total = self.client.count(collection_name=source).count
+        logger.info("Re-embedding %s: %d points, %s -> %s", self.collection, total, source, target)
+        copied, offset = 0, None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=source, limit=self.batch, offset=offset,
+                with_payload=True, with_vectors=list(self.keep) or False
+            )
+            self._write(target, points)
+            copied += len(points)
+            self.progress(0.8 * copied / max(total, 1), f"re-embedded {copied}/{total}")
+            if offset is None:
+                break
+
+        for _ in range(settings.REEMBED_MAX_CATCHUP_PASSES):
+            self.progress(0.9, "catching up")
+            if not self._catch_up(source, target):
+                break
+
+        if self.missing and not allow_missing:
+            self.client.delete_collection(target)
+            raise RuntimeError(
+                f"{len(self.missing)} points of {self.collection} could not be re-embedded (source gone or nothing "
+                f"detected in it, e.g. {min(self.missing)}); re-enroll them or pass allow_missing"
+            )
+
+        switch_alias(self.client, self.collection, target)
+        logger.info("Switched %s to %s", self.collection, target)
+        # Writes that went to the old generation while the alias moved
+        self._catch_up(source, target)
+        if drop_previous:
+            self.client.delete_collection(source)
+        self.progress(1.0, "switched")
+        return self._summary(source, target, switched=True, dropped_previous=drop_previous)
+
+    def _refresh_in_place(self, collection: str, stored: dict) -> dict:
+        """Already on this version: re-embed only the points written with another model."""
+        self.keep = {name: size for name, size in (stored or {}).items() if name != self.name}
+        stale = Filter(must_not=[FieldCondition(key="model_version", match=MatchValue(value=self.version))])
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=collection, scroll_filter=stale, limit=self.batch, offset=offset,
+                with_payload=True, with_vectors=list(self.keep) or False
+            )
+            self._write(collection, points)
+            if offset is None:
+                break
+        self.progress(1.0, "up to date")
+        return self._summary(collection, collection, switched=False, dropped_previous=False)
+
+    def _write(self, target: str, points: list):
+        """Re-embed `points` and upsert them (payload, new vector and the kept ones) into `target`."""
+        if not points:
+            return
+        structs = []
+        for point, embedding in zip(points, self.embed([p.payload for p in points])):
+            if not embedding:
+                self.missing.add(str(point.id))
+                continue
+            self.missing.discard(str(point.id))
+            old = point.vector if isinstance(point.vector, dict) else {}
+            vector = {self.name: embedding, **{name: old[name] for name in self.keep if name in old}}
+            structs.append(PointStruct(id=point.id, vector=vector, payload={**(point.payload or {}), "model_version": self.version}))
+        if structs:
+            self.client.upsert(collection_name=target, points=structs, wait=True)
+        self.stats["reembedded"] += len(structs)
+
+    def _payloads(self, collection: str) -> dict:
+        payloads, offset = {}, None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=collection, limit=256, offset=offset, with_payload=True, with_vectors=False
+            )
+            payloads.update((p.id, p.payload or {}) for p in points)
+            if offset is None:
+                return payloads
+
+    def _catch_up(self, source: str, target: str) -> int:
+        """Replay writes made to `source` since it was copied. Returns the number of changes."""
+        self.stats["catch_up_passes"] += 1
+        current, copied = self._payloads(source), self._payloads(target)
+
+        added = [pid for pid in current if pid not in copied and str(pid) not in self.missing]
+        for start in range(0, len(added), self.batch):
+            self._write(target, self.client.retrieve(
+                collection_name=source, ids=added[start:start + self.batch],
+                with_payload=True, with_vectors=list(self.keep) or False
+            ))
+
+        edited = 0
+        for pid, payload in current.items():
+            if pid not in copied:
+                continue
+            changes = {k: v for k, v in payload.items() if k != "model_version" and (k not in copied[pid] or copied[pid][k] != v)}
+            if changes:
+                self.client.set_payload(collection_name=target, payload=changes, points=[pid], wait=True)
+                edited += 1
+        self.stats["payloads_synced"] += edited
+
+        removed = [pid for pid in copied if pid not in current]
+        if removed:
+            self.client.delete(collection_name=target, points_selector=PointIdsList(points=removed), wait=True)
+        self.stats["deleted"] += len(removed)
+        return len(added) + edited + len(removed)
+
+    def _summary(self, source: str, target: str, switched: bool, dropped_previous: bool) -> dict:
+        return {
+            "collection": self.collection,
+            "version": self.version,
+            "from": source,
+            "to": target,
+            "switched": switched,
+            "kept_vectors": sorted(self.keep),
+            **self.stats,
+            "missing": len(self.missing),
+            "missing_ids": sorted(self.missing)[:20],
+            "dropped_previous": dropped_previous,
+        }
+
+
+_running = set()
+_running_lock = threading.Lock()
+
+
+def _service(collection: str):
+    if collection == "text_knowledge":
+        from app.services.semantic_memory import semantic_memory
+        return semantic_memory, 384
+    from app.services.memory_service import memory_service
+    return memory_service, memory_service.COLLECTIONS[collection]
+
+
+def reembed(collection: str, drop_previous: bool = False, allow_missing: bool = False, progress=None) -> dict:
+    """Re-embed `collection` with this process's model and switch to it (blocking)."""
+    if collection not in COLLECTIONS:
+        raise ValueError(f"Unknown collection {collection}")
+    with _running_lock:
+        if collection in _running:
+            raise RuntimeError(f"{collection} is already being re-embedded")
+        _running.add(collection)
+    try:
+        service, size = _service(collection)
+        result = Reembedder(
+            service.client, collection, size, model_version(collection), embedder(collection), progress=progress
+        ).run(drop_previous=drop_previous, allow_missing=allow_missing)
+        service.vectors.forget(collection)
+        return result
+    finally:
+        with _running_lock:
+            _running.discard(collection)
+
+
+@job_queue.handler("reembed_collection", timeout=settings.REEMBED_JOB_TIMEOUT)
+def reembed_collection(job):
+    p = job.payload
+    return reembed(p["collection"], p.get("drop_previous", False), p.get("allow_missing", False), progress=job.progress)
+
+
+def enqueue_reembedding(collection: str, drop_previous: bool = False, allow_missing: bool = False) -> str:
+    if collection not in COLLECTIONS:
+        raise ValueError(f"Unknown collection {collection}")
+    return job_queue.enqueue("reembed_collection", {
+        "collection": collection,
+        "drop_previous": drop_previous,
+        "allow_missing": allow_missing,
+    })
+
+
+def embedding_status(collection: str) -> dict:
+    """Which generation serves `collection`, the vectors it stores, and points not embedded by this process's model."""
+    service, _ = _service(collection)
+    client = service.client
+    version = model_version(collection)
+    stored = stored_vectors(client, collection)
+    stale = Filter(must_not=[FieldCondition(key="model_version", match=MatchValue(value=version))])
+    return {
+        "collection": collection,
+        "generation": alias_target(client, collection) or collection,
+        "legacy": stored is None,
+        "vectors": sorted(stored or {}),
+        "model_version": version,
+        "current": stored is not None and vector_name(version) in stored,
+        "points": client.count(collection_name=collection).count,
+        "stale_points": client.count(collection_name=collection, count_filter=stale).count,
+    }
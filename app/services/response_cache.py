@@ -0,0 +1,124 @@
+"""
+Caches for generated chat responses.
+
+The answer to "who is she?" about the same person rarely changes, so repeat
+questions are served without another generation. `ResponseCache` is keyed by
+the person the answer is about, a fingerprint of the prompt context (notes,
+location, has_audio / has_image: whatever the answer was built from) and the
+normalized question, so an edit or a new sighting is never answered from an
+entry built on the old context. `SemanticResponseCache` also catches
+rephrasings ("who's she" / "who is this lady") by query-embedding similarity
+within the same person and context. The context is read from the shared
+vector store on every request, so this holds across worker processes too;
+`invalidate` only frees memory early. Both expire entries after a TTL and
+evict LRU once full.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from app.core.config import settings
+
+
+def normalize_question(text: str) -> str:
+    text = re.sub(r"[^\w\s]", " ", (text or "").lower())
+    return " ".join(text.split())
+
+
+class ResponseCache:
+    def __init__(self, max_size: int = None, ttl: int = None):
+        self.max_size = max_size or settings.LLM_CACHE_SIZE
+        self.ttl = ttl or settings.LLM_CACHE_TTL
+        self._entries = OrderedDict()  # key -> (expires_at, response)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(person: str, question: str, context: str = "") -> tuple:
+        return ((person or "").lower(), context, normalize_question(question))
+
+    def get(self, person: str, question: str, context: str = ""):
+        key = self.key(person, question, context)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, response = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return response
+
+    def put(self, person: str, question: str, response: str, context: str = ""):
+        key = self.key(person, question, context)
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, person: str = None):
+        """Drop entries about `person` (frees memory early; changed context already misses), or everything."""
+        with self._lock:
+            if person is None:
+                self._entries.clear()
+                return
+            person = person.lower()
+            for key in [k for k in self._entries if k[0] == person]:
+                del self._entries[key]
+
+
+class SemanticResponseCache:
+    def __init__(self, max_size: int = None, ttl: int = None, threshold: float = None):
+        self.max_size = max_size or settings.LLM_SEMANTIC_CACHE_SIZE
+        self.ttl = ttl or settings.LLM_CACHE_TTL
+        self.threshold = threshold or settings.LLM_SEMANTIC_CACHE_THRESHOLD
+        self._entries = OrderedDict()  # id -> (person, context, unit embedding, expires_at, response)
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(embedding) -> np.ndarray:
+        v = np.asarray(embedding, dtype=np.float32)
+        return v / max(float(np.linalg.norm(v)), 1e-12)
+
+    def get(self, person: str, embedding, context: str = ""):
+        person = (person or "").lower()
+        query = self._unit(embedding)
+        now = time.time()
+        best_id, best_score = None, self.threshold
+        with self._lock:
+            for entry_id, (p, ctx, vec, expires_at, _) in list(self._entries.items()):
+                if expires_at < now:
+                    del self._entries[entry_id]
+                    continue
+                if p != person or ctx != context:
+                    continue
+                score = float(vec @ query)
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+            if best_id is None:
+                return None
+            self._entries.move_to_end(best_id)
+            return self._entries[best_id][4]
+
+    def put(self, person: str, embedding, response: str, context: str = ""):
+        with self._lock:
+            self._entries[self._next_id] = (
+                (person or "").lower(), context, self._unit(embedding), time.time() + self.ttl, response
+            )
+            self._next_id += 1
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, person: str = None):
+        with self._lock:
+            if person is None:
+                self._entries.clear()
+                return
+            person = person.lower()
+            for entry_id in [i for i, e in self._entries.items() if e[0] == person]:
+                del self._entries[entry_id]
@@ -0,0 +1,95 @@
+"""
+Incremental semantic indexing: keeps `text_knowledge` in step with enrollments
+and metadata edits, so chat sees new people without a full migration.
+
+`schedule(name)` only records the name. Once a name has been quiet for
+SEMANTIC_INDEX_DEBOUNCE seconds it is flushed into a "semantic_reindex" job,
+together with every other name that is due (coalesced, up to
+SEMANTIC_INDEX_BATCH per job). A burst of enrollments of the same person
+therefore costs one re-index, and a bulk import costs one encode per batch.
+The job rebuilds each person's facts from all of their stored records.
+"""
+import threading
+import time
+
+from app.core.config import settings
+from app.services.job_queue import job_queue
+
+
+class SemanticIndexer:
+    def __init__(self, queue=None, debounce: float = None, batch_size: int = None):
+        self.queue = queue or job_queue
+        self.debounce = settings.SEMANTIC_INDEX_DEBOUNCE if debounce is None else debounce
+        self.batch_size = batch_size or settings.SEMANTIC_INDEX_BATCH
+        self._pending = {}  # name -> time of last schedule()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def schedule(self, *names):
+        """Mark people as changed; their re-index is enqueued after the debounce window."""
+        with self._lock:
+            now = time.monotonic()
+            for name in names:
+                if name:
+                    self._pending[name] = now
+            if self._pending and self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="semantic-indexer", daemon=True)
+                self._thread.start()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self) -> list:
+        """Enqueue everything pending right now (shutdown, tests). Returns job ids."""
+        with self._lock:
+            names = list(self._pending)
+            self._pending.clear()
+        return self._enqueue(names)
+
+    def _due(self) -> list:
+        with self._lock:
+            now = time.monotonic()
+            due = [n for n, t in self._pending.items() if now - t >= self.debounce]
+            for name in due:
+                del self._pending[name]
+            if not self._pending and not due:
+                self._thread = None
+            return due
+
+    def _run(self):
+        while True:
+            time.sleep(max(self.debounce / 4, 0.05))
+            with self._lock:
+                if self._thread is not threading.current_thread():
+                    return
+            due = self._due()
+            if due:
+                self._enqueue(due)
+            elif self._thread is None:
+                return
+
+    def _enqueue(self, names: list) -> list:
+        return [
+            self.queue.enqueue("semantic_reindex", {"names": names[i:i + self.batch_size]})
+            for i in range(0, len(names), self.batch_size)
+        ]
+
+
+@job_queue.handler("semantic_reindex")
+def semantic_reindex(job):
+    from app.services.memory_service import memory_service
+    from app.services.semantic_memory import semantic_memory
+    from app.services.llm_service import llm_service
+
+    names = job.payload["names"]
+    people = {name: memory_service.person_records(name) for name in names}
+    job.progress(0.5, "records loaded")
+    indexed = semantic_memory.reindex_people(people)
+    # Answers built on the old notes can no longer be hit (context is in the key); free them here
+    for name in names:
+        llm_service.forget(name)
+    return {"people": len(names), "facts": indexed}
+
+
+semantic_indexer = SemanticIndexer()
@@ -1,36 +1,35 @@
-
-from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams, Distance, PointStruct, Filter, FieldCondition, MatchValue
-from sentence_transformers import SentenceTransformer
-from app.core.config import settings
+from qdrant_client.models import PointStruct, Filter, FieldCondition, MatchValue, FilterSelector
+from qdrant_client.models import VectorParams, Distance, PointStruct, Filter, FieldCondition, MatchValue, FilterSelector
+from app.services.text_encoder import load_text_encoder
+from app.services.vector_index import get_vector_client, search_params, ensure_collection
+from app.services.model_versions import model_version, vector_name, generation_name, VectorNames
 import uuid
+from app.core.metrics import timed
+import logging
+from app.core.logging import get_logger, log_sampled
+from app.core.tracing import traced, span, set_attributes
+
+logger = get_logger(__name__)
 
 class SemanticMemoryService:
     def __init__(self):
         # Local model, small and fast
-        print("DEBUG: Loading Sentence Transformer...", flush=True)
-        self.encoder = SentenceTransformer('all-MiniLM-L6-v2') 
+        logger.info("Loading sentence transformer...")
+        self.encoder = load_text_encoder()
         
-        if settings.QDRANT_MODE == "local":
-            self.client = QdrantClient(path=settings.QDRANT_PATH)
-        else:
-            self.client = QdrantClient(
-                url=settings.get_qdrant_url(),
-                api_key=settings.QDRANT_API_KEY
-            )
-            
+        self.client = get_vector_client()
+        self.vectors = VectorNames(self.client)
+
         self.collection_name = "text_knowledge"
         self._ensure_collection()
 
     def _ensure_collection(self):
-        try:
-            self.client.get_collection(self.collection_name)
-        except Exception:
-            # all-MiniLM-L6-v2 outputs 384 dimensions
-            self.client.recreate_collection(
-                collection_name=self.collection_name,
-                vectors_config=VectorParams(size=384, distance=Distance.COSINE)
-            )
+        # all-MiniLM-L6-v2 outputs 384 dimensions
+        version = model_version(self.collection_name)
+        ensure_collection(
+            self.client, self.collection_name,
+            generation_name(self.collection_name, version), {vector_name(version): 384}
+        )
         
         # Ensure Payload Index for filtering by name
         try:
@@ -41,52 +40,94 @@ class SemanticMemoryService:
             )
         except Exception as e:
             # Index might already exist
-            print(f"Index creation note: {e}")
+            logger.debug("Index creation note: %s", e)
+
+    @staticmethod
+    def latest_relation(records: list):
+        return next((r.get("relation") for r in reversed(records) if r.get("relation")), None)
+
+    @classmethod
+    def person_texts(cls, name: str, records: list) -> list:
+        """
+        Semantic sentences for one person from all of their enrolled records
+        (latest relation wins; every distinct note is kept).
+        """
+        relation = cls.latest_relation(records)
+        texts = []
+        if relation:
+            texts.append(f"{name} is my {relation}.")
+        seen = set()
+        for r in records:
+            notes = (r.get("notes") or "").strip()
+            if notes and notes not in seen:
+                seen.add(notes)
+                texts.append(f"Notes about {name}: {notes}")
+        return texts
+
+    def reindex_people(self, people: dict) -> int:
+        """
+        Replace the semantic facts of each person with ones built from `people`
+        ({name: [payload, ...]}). One batched encode and one upsert for the lot;
+        a name with no records is simply removed. Idempotent.
+        """
+        points_meta = []
+        for name, records in people.items():
+            self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=FilterSelector(filter=Filter(
+                    must=[FieldCondition(key="name", match=MatchValue(value=name))]
+                )),
+                wait=True
+            )
+            relation = self.latest_relation(records)
+            for txt in self.person_texts(name, records):
+                points_meta.append((txt, name, relation))
+
+        if not points_meta:
+            return 0
+
+        with timed("text.embed_batch"):
+            embeddings = self.encoder.encode([m[0] for m in points_meta], batch_size=64)
+        version = model_version(self.collection_name)
+
+        def upsert():
+            points = [
+                PointStruct(
+                    # Deterministic id: re-indexing the same fact overwrites instead of duplicating
+                    id=str(uuid.uuid5(uuid.NAMESPACE_URL, f"{name}\n{txt}")),
+                    vector=self.vectors.vector(self.collection_name, embedding.tolist()),
+                    payload={
+                        "text": txt,
+                        "name": name,
+                        "relation": relation,
+                        "type": "person_bio",
+                        "model_version": version
+                    }
+                )
+                for (txt, name, relation), embedding in zip(points_meta, embeddings)
+            ]
+            self.client.upsert(collection_name=self.collection_name, points=points, wait=True)
+
+        self.vectors.retry(self.collection_name, upsert)
+        logger.info("Indexed %d semantic facts about %d people", len(points_meta), len(people))
+        return len(points_meta)
 
     def learn_person(self, person_data: dict):
         """
-        Converts person data into semantic text memories.
+        Converts person data into semantic text memories (replaces what was known about them).
         """
-        name = person_data.get("name")
-        relation = person_data.get("relation")
-        notes = person_data.get("notes", "")
-        
-        # Create meaningful sentences
-        texts = [
-            f"{name} is my {relation}.",
-            f"Notes about {name}: {notes}"
-        ]
-        
-        points = []
-        for txt in texts:
-            if not txt.strip(): continue
-            embedding = self.encoder.encode(txt).tolist()
-            
-            points.append(PointStruct(
-                id=str(uuid.uuid4()),
-                vector=embedding,
-                payload={
-                    "text": txt,
-                    "name": name,
-                    "relation": relation,
-                    "type": "person_bio"
-                }
-            ))
-            
-        self.client.upsert(
-            collection_name=self.collection_name,
-            points=points
-        )
-        print(f"Learned {len(points)} semantic facts about {name}")
+        return self.reindex_people({person_data.get("name"): [person_data]})
 
+    @traced("semantic.search_knowledge", service="semantic_memory")
     def search_knowledge(self, query: str, context_name: str = None, limit=3):
         """
         Hybrid Search:
         1. Semantic Vector Search
         2. Optional Metadata Filter (if context_name provided)
         """
-        embedding = self.encoder.encode(query).tolist()
-        print(f"DEBUG: Executing query_points for '{query}'...")
+        with span("text.encode", service="semantic_memory", **{"text.chars": len(query)}), timed("text.embed"):
+            embedding = self.encoder.encode(query).tolist()
+        log_sampled(logger, logging.DEBUG, "Executing query_points for %r", query)
         
         query_filter = None
         if context_name:
@@ -97,13 +138,16 @@ class SemanticMemoryService:
                 ]
             )
             
-        res = self.client.query_points(
+        res = self.vectors.retry(self.collection_name, lambda: self.client.query_points(
             collection_name=self.collection_name,
             query=embedding,
+            using=self.vectors.using(self.collection_name),
             query_filter=query_filter,
-            limit=limit
-        )
+            limit=limit,
+            search_params=search_params()
+        ))
         
+        set_attributes(filtered=context_name is not None, matches=len(res.points))
         return [match.payload for match in res.points]
 
 # Global Instance (Lazy load might be better to avoid startup lag, but simplified here)
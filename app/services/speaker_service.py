@@ -0,0 +1,93 @@
+"""
+Speaker embeddings for voice-based recognition (when the camera can't see the face).
+
+ECAPA-TDNN trained on VoxCeleb (speechbrain), 192-d, L2-normalized so cosine
+similarity is a dot product like the face collections. The model loads on
+first use. `embed_batch` pads clips into one forward pass for bulk ingest.
+"""
+import threading
+import time
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import timed, record_model_load
+from app.services.voice_service import load_audio, detect_speech, SAMPLE_RATE
+from app.services.model_client import use_model_server, RemoteSpeakerService
+from app.core.logging import get_logger
+from app.core.tracing import traced, set_attributes
+
+logger = get_logger(__name__)
+
+SPEAKER_VECTOR_SIZE = 192
+
+
+class SpeakerService:
+    def __init__(self, model_source: str = None):
+        self.model_source = model_source or settings.SPEAKER_MODEL
+        self._model = None
+        self._lock = threading.Lock()
+        self.load_seconds = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from speechbrain.inference.speaker import EncoderClassifier
+                    logger.info("Loading speaker model %s...", self.model_source)
+                    start = time.perf_counter()
+                    self._model = EncoderClassifier.from_hparams(
+                        source=self.model_source,
+                        savedir=f"models/{self.model_source.split('/')[-1]}",
+                        run_opts={"device": "cpu"},
+                    )
+                    self.load_seconds = time.perf_counter() - start
+                    record_model_load("ecapa", self.load_seconds)
+                    logger.info("Speaker model loaded (%.1fs)", self.load_seconds)
+        return self._model
+
+    @staticmethod
+    def _speech(path: str) -> np.ndarray:
+        """Decoded clip with leading/trailing silence removed (speaker identity lives in the voiced part)."""
+        audio = load_audio(path)
+        chunks = detect_speech(audio)
+        if chunks:
+            audio = np.concatenate([audio[s:e] for s, e in chunks])
+        return audio[:int(settings.SPEAKER_MAX_SECONDS * SAMPLE_RATE)]
+
+    @traced("speaker.embed_batch", service="speaker")
+    def embed_batch(self, audio_paths: list) -> list:
+        """One embedding (list of floats) per path; [] for unreadable or too-short clips."""
+        import torch
+
+        clips = []
+        for path in audio_paths:
+            try:
+                clips.append(self._speech(path))
+            except Exception as e:
+                logger.warning("Speaker embedding: could not read %s: %s", path, e)
+                clips.append(np.zeros(0, dtype=np.float32))
+
+        results = [[] for _ in audio_paths]
+        usable = [i for i, c in enumerate(clips) if len(c) >= settings.SPEAKER_MIN_SECONDS * SAMPLE_RATE]
+        set_attributes(clips=len(audio_paths), usable=len(usable))
+        for start in range(0, len(usable), settings.SPEAKER_BATCH_SIZE):
+            batch = usable[start:start + settings.SPEAKER_BATCH_SIZE]
+            longest = max(len(clips[i]) for i in batch)
+            wavs = np.zeros((len(batch), longest), dtype=np.float32)
+            for row, i in enumerate(batch):
+                wavs[row, :len(clips[i])] = clips[i]
+            lengths = torch.tensor([len(clips[i]) / longest for i in batch])
+            with torch.no_grad(), timed("speaker.embed"):
+                emb = self.model.encode_batch(torch.from_numpy(wavs), wav_lens=lengths).squeeze(1).numpy()
+            emb /= np.linalg.norm(emb, axis=1, keepdims=True) + 1e-9
+            for row, i in enumerate(batch):
+                results[i] = emb[row].tolist()
+        return results
+
+    def generate_embedding(self, audio_path: str) -> list:
+        return self.embed_batch([audio_path])[0]
+
+
+speaker_service = RemoteSpeakerService() if use_model_server() else SpeakerService()
@@ -0,0 +1,16 @@
+"""MiniLM sentence encoder, shared by semantic memory and the LLM semantic cache."""
+import time
+from app.core.metrics import record_model_load
+from app.services.model_client import use_model_server, RemoteTextEncoder
+
+TEXT_MODEL = "all-MiniLM-L6-v2" # 384 dimensions
+
+def load_text_encoder():
+    """Local SentenceTransformer, or the model-server proxy when MODEL_SERVER_SOCKET is set."""
+    if use_model_server():
+        return RemoteTextEncoder()
+    start = time.perf_counter()
+    from sentence_transformers import SentenceTransformer
+    encoder = SentenceTransformer(TEXT_MODEL)
+    record_model_load("minilm", time.perf_counter() - start)
+    return encoder
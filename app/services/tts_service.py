@@ -1,56 +1,153 @@
-
-import edge_tts
-import pygame
 import asyncio
+import hashlib
+import io
 import os
-import time
+import threading
+from pathlib import Path
+
+from app.core.config import settings
+from app.core.metrics import timed, record_cache
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
 
 # Voice Configuration
 # en-IN-NeerjaNeural (Female)
 # en-IN-PrabhatNeural (Male)
 VOICE = "en-IN-NeerjaNeural"
 
-class TTSService:
-    def __init__(self):
+
+def greeting(name: str, relation: str = None, notes: str = None) -> str:
+    """What the kiosk says on recognizing someone (also pre-synthesized at enrollment)."""
+    text = f"Hello {name}."
+    if notes:
+        text += f" {notes}"
+    elif relation and relation != "Unknown":
+        text += f" You are a {relation}."
+    return text
+
+
+class AudioCache:
+    """
+    Size-bounded LRU of synthesized audio on disk, keyed by sha256(voice + text).
+    Recency is the file mtime (touched on every hit), so the cache survives restarts.
+    The directory is only created by the first write, not by importing the service.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.dir = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = sum(p.stat().st_size for p in self.dir.glob("*.mp3"))
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(text: str, voice: str) -> str:
+        return hashlib.sha256(f"{voice}\n{text}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        path = self.dir / f"{key}.mp3"
         try:
-            pygame.mixer.init()
-        except Exception as e:
-            print(f"⚠️ Audio Init Failed (No device?): {e}")
+            data = path.read_bytes()
+            os.utime(path)  # Mark as recently used
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes):
+        path = self.dir / f"{key}.mp3"
+        self.dir.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        with self._lock:
+            old = path.stat().st_size if path.exists() else 0
+            os.replace(tmp, path)  # Atomic: readers never see a half-written file
+            self._size += len(data) - old
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        files = sorted(self.dir.glob("*.mp3"), key=lambda p: p.stat().st_mtime)
+        for path in files:
+            if self._size <= self.max_bytes * 0.9:  # Leave headroom so we don't evict on every put
+                break
+            size = path.stat().st_size
+            path.unlink(missing_ok=True)
+            self._size -= size
+
+
+class TTSService:
+    def __init__(self, voice: str = VOICE):
+        self.voice = voice
+        self.cache = AudioCache(settings.TTS_CACHE_DIR, settings.TTS_CACHE_MAX_MB * 1024 * 1024)
+        self._mixer = None
+
+    async def synthesize(self, text: str, voice: str = None) -> bytes:
+        """MP3 bytes for `text`, from the cache or synthesized in memory (no temp files)."""
+        voice = voice or self.voice
+        key = self.cache.key(text, voice)
+        data = self.cache.get(key)
+        record_cache("tts", data is not None)
+        if data is not None:
+            return data
+
+        import edge_tts
+        buffer = io.BytesIO()
+        with timed("tts.synthesize"):
+            async for chunk in edge_tts.Communicate(text, voice).stream():
+                if chunk["type"] == "audio":
+                    buffer.write(chunk["data"])
+        data = buffer.getvalue()
+        if data:
+            self.cache.put(key, data)
+        return data
+
+    async def presynthesize(self, texts: list, voice: str = None) -> int:
+        """Warm the cache (e.g. greetings at enrollment). Returns how many were newly synthesized."""
+        misses = self.cache.misses
+        for text in texts:
+            await self.synthesize(text, voice)
+        return self.cache.misses - misses
+
+    def _init_mixer(self):
+        if self._mixer is None:
+            try:
+                import pygame
+                pygame.mixer.init()
+                self._mixer = pygame.mixer
+            except Exception as e:
+                logger.warning("Audio init failed (no device?): %s", e)
+                self._mixer = False
+        return self._mixer
 
     async def speak(self, text: str):
-        """Generates and plays audio for the given text."""
-        print(f"🗣️ Speaking: {text}")
+        """Synthesizes (or fetches from cache) and plays audio for the given text on the local device."""
+        logger.debug("Speaking: %s", text)
         if not text:
             return
 
-        filename = f"speech_{int(time.time())}.mp3"
         try:
-            communicate = edge_tts.Communicate(text, VOICE)
-            await communicate.save(filename)
-            
+            data = await self.synthesize(text)
+
             # Play
-            if pygame.mixer.get_init():
-                pygame.mixer.music.load(filename)
-                pygame.mixer.music.play()
-                
+            mixer = self._init_mixer()
+            if mixer:
+                mixer.music.load(io.BytesIO(data), "mp3")
+                mixer.music.play()
+
                 # Wait until finished
-                # Note: This blocks the async loop logic if we just loop. 
                 # We use asyncio.sleep to yield.
-                while pygame.mixer.music.get_busy():
+                while mixer.music.get_busy():
                     await asyncio.sleep(0.1)
-                    
-                pygame.mixer.music.unload()
+
+                mixer.music.unload()
             else:
-                print("🔇 Audio mixer not initialized, skipping playback.")
+                logger.info("Audio mixer not initialized, skipping playback")
 
         except Exception as e:
-            print(f"❌ TTS Error: {e}")
-        finally:
-            # Cleanup
-            if os.path.exists(filename):
-                try:
-                    os.remove(filename)
-                except: 
-                    pass
+            logger.exception("TTS error: %s", e)
 
 tts_service = TTSService()
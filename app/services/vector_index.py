@@ -0,0 +1,764 @@
+"""
+In-process vector engine (QDRANT_MODE=embedded).
+
+Each collection keeps its vectors in one contiguous float32 matrix backed by a
+memory-mapped file, so search is a single matrix-vector product instead of the
+per-point Python loops of qdrant-client's local mode. Above
+VECTOR_INDEX_HNSW_THRESHOLD points an HNSW graph (hnswlib, optional) takes over
+unfiltered queries.
+
+`LocalVectorClient` implements the subset of the QdrantClient API used by
+MemoryService / SemanticMemoryService, so the services don't know which
+backend they talk to, including aliases and one named vector per collection.
+Single process only: the files are not locked.
+
+Also home to `get_vector_client()` (backend selection by QDRANT_MODE), the
+Settings-driven collection / search parameters shared by all services and the
+alias helpers behind versioned collections (see model_versions).
+"""
+import json
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import Distance, QueryResponse, Record, ScoredPoint
+from qdrant_client.models import (
+    VectorParams, VectorParamsDiff, HnswConfigDiff, SearchParams, QuantizationSearchParams,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType,
+    ProductQuantization, ProductQuantizationConfig, CompressionRatio,
+    BinaryQuantization, BinaryQuantizationConfig, Disabled,
+    Filter, FilterSelector, PointIdsList, PointStruct,
+    CreateAlias, CreateAliasOperation, DeleteAlias, DeleteAliasOperation,
+)
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import InstrumentedVectorClient
+
+try:
+    import hnswlib
+except ImportError:  # Optional: exact search only
+    hnswlib = None
+
+logger = get_logger(__name__)
+
+
+def _match_condition(payload: dict, cond) -> bool:
+    value = payload.get(cond.key)
+    match = cond.match
+    if match is None:
+        return False
+    if hasattr(match, "value"):
+        return value == match.value
+    if hasattr(match, "any"):
+        return value in match.any
+    if hasattr(match, "text"):
+        return isinstance(value, str) and match.text.lower() in value.lower()
+    return False
+
+
+def payload_matches(payload: dict, query_filter) -> bool:
+    """Evaluate a qdrant `Filter` (must / should / must_not of field matches)."""
+    if query_filter is None:
+        return True
+    payload = payload or {}
+
+    def check(cond):
+        if hasattr(cond, "must") or hasattr(cond, "should"):
+            return payload_matches(payload, cond)
+        return _match_condition(payload, cond)
+
+    if query_filter.must and not all(check(c) for c in query_filter.must):
+        return False
+    if query_filter.should and not any(check(c) for c in query_filter.should):
+        return False
+    if query_filter.must_not and any(check(c) for c in query_filter.must_not):
+        return False
+    return True
+
+
+class VectorCollection:
+    """One collection: float32 memmap + append-only payload log + optional HNSW."""
+
+    def __init__(self, root: Path, name: str, size: int = None, distance: str = Distance.COSINE,
+                 vector_name: str = None):
+        self.dir = root / name
+        self.name = name
+        self.lock = threading.RLock()
+        self._hnsw = None
+
+        meta_path = self.dir / "meta.json"
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text())
+            self.size = meta["size"]
+            self.distance = meta["distance"]
+            self.capacity = meta["capacity"]
+            self.count = meta["count"]
+            self.vector_name = meta.get("vector_name")
+        else:
+            if size is None:
+                raise ValueError(f"Collection {name} not found")
+            self.dir.mkdir(parents=True, exist_ok=True)
+            self.size = size
+            self.distance = distance
+            self.capacity = 1024
+            self.count = 0
+            self.vector_name = vector_name  # None = one unnamed vector
+
+        if self.distance not in (Distance.COSINE, Distance.DOT):
+            raise ValueError(f"Unsupported distance for embedded index: {self.distance}")
+
+        self._open_vectors()
+        self._load_payloads()
+        self._write_meta()
+
+    # --- Storage ---
+
+    @property
+    def _vectors_path(self):
+        return self.dir / "vectors.f32"
+
+    @property
+    def _payloads_path(self):
+        return self.dir / "payloads.jsonl"
+
+    def _open_vectors(self):
+        path = self._vectors_path
+        nbytes = self.capacity * self.size * 4
+        if not path.exists() or path.stat().st_size < nbytes:
+            with open(path, "ab") as f:
+                f.truncate(nbytes)
+        self.vectors = np.memmap(path, dtype=np.float32, mode="r+", shape=(self.capacity, self.size))
+
+    def _grow(self, needed: int):
+        if needed <= self.capacity:
+            return
+        self.vectors.flush()
+        del self.vectors
+        while self.capacity < needed:
+            self.capacity *= 2
+        self._open_vectors()
+        self.alive = np.concatenate([self.alive, np.zeros(self.capacity - len(self.alive), dtype=bool)])
+
+    def _write_meta(self):
+        meta = {"size": self.size, "distance": self.distance, "capacity": self.capacity, "count": self.count,
+                "vector_name": self.vector_name}
+        (self.dir / "meta.json").write_text(json.dumps(meta))
+
+    def _load_payloads(self):
+        self.ids = [None] * self.count
+        self.payloads = [None] * self.count
+        self.alive = np.zeros(self.capacity, dtype=bool)
+        self.id_to_row = {}
+        if not self._payloads_path.exists():
+            return
+        lines = 0
+        torn = 0
+        with open(self._payloads_path, "r", encoding="utf-8") as f:
+            for line in f:
+                lines += 1
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    torn += 1
+                    continue
+                row = entry["row"]
+                if row >= self.count:
+                    # Logged by an upsert that crashed before meta.json counted the row: never committed
+                    torn += 1
+                    continue
+                if entry.get("deleted"):
+                    self.id_to_row.pop(entry["id"], None)
+                    self.alive[row] = False
+                    self.payloads[row] = None
+                    continue
+                self.ids[row] = entry["id"]
+                self.payloads[row] = entry["payload"]
+                self.id_to_row[entry["id"]] = row
+                self.alive[row] = True
+        if torn:
+            logger.warning("Collection %s: dropped %d uncommitted payload log entries", self.name, torn)
+        # Rewriting also removes torn entries, whose rows the next upserts reuse
+        if torn or lines > 2 * max(len(self.id_to_row), 1024):
+            self.compact()
+
+    def _append_log(self, entries: list):
+        with open(self._payloads_path, "a", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+
+    def compact(self):
+        """Rewrite vectors and payload log without deleted rows."""
+        with self.lock:
+            rows = np.flatnonzero(self.alive[:self.count])
+            kept = np.array(self.vectors[rows])
+            ids = [self.ids[r] for r in rows]
+            payloads = [self.payloads[r] for r in rows]
+
+            self.count = len(rows)
+            self.vectors[:self.count] = kept
+            self.vectors.flush()
+            self.ids, self.payloads = ids, payloads
+            self.alive[:] = False
+            self.alive[:self.count] = True
+            self.id_to_row = {pid: i for i, pid in enumerate(ids)}
+
+            tmp = self._payloads_path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                for i, (pid, payload) in enumerate(zip(ids, payloads)):
+                    f.write(json.dumps({"id": pid, "row": i, "payload": payload}) + "\n")
+            tmp.replace(self._payloads_path)
+            self._write_meta()
+            self._hnsw = None
+
+    def flush(self):
+        with self.lock:
+            self.vectors.flush()
+            self._write_meta()
+
+    # --- Writes ---
+
+    def _prepare(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.size)
+        if self.distance == Distance.COSINE:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.maximum(norms, 1e-12)
+        return vectors
+
+    def upsert(self, ids: list, vectors, payloads: list):
+        vectors = self._prepare(vectors)
+        with self.lock:
+            rows = []
+            log = []
+            for pid, payload in zip(ids, payloads):
+                row = self.id_to_row.get(pid)
+                if row is None:
+                    row = self.count
+                    self._grow(row + 1)
+                    self.ids.append(pid)
+                    self.payloads.append(None)
+                    self.count += 1
+                    self.id_to_row[pid] = row
+                self.ids[row] = pid
+                self.payloads[row] = payload or {}
+                self.alive[row] = True
+                rows.append(row)
+                log.append({"id": pid, "row": row, "payload": payload or {}})
+
+            self.vectors[rows] = vectors
+            self._append_log(log)
+            self._write_meta()
+            if self._hnsw is not None:
+                self._hnsw_add(np.array(rows))
+
+    def set_payload(self, ids: list, payload: dict):
+        """Merge `payload` into existing points (like qdrant set_payload)."""
+        with self.lock:
+            log = []
+            for pid in ids:
+                row = self.id_to_row.get(pid)
+                if row is None:
+                    continue
+                self.payloads[row] = {**(self.payloads[row] or {}), **payload}
+                log.append({"id": pid, "row": row, "payload": self.payloads[row]})
+            self._append_log(log)
+
+    def delete(self, ids: list):
+        with self.lock:
+            log = []
+            for pid in ids:
+                row = self.id_to_row.pop(pid, None)
+                if row is None:
+                    continue
+                self.alive[row] = False
+                self.payloads[row] = None
+                log.append({"id": pid, "row": row, "deleted": True})
+                if self._hnsw is not None:
+                    self._hnsw.mark_deleted(row)
+            self._append_log(log)
+
+    # --- Reads ---
+
+    def rows_matching(self, query_filter) -> np.ndarray:
+        alive = np.flatnonzero(self.alive[:self.count])
+        if query_filter is None:
+            return alive
+        return np.array([r for r in alive if payload_matches(self.payloads[r], query_filter)], dtype=np.int64)
+
+    def search(self, query, limit: int, query_filter=None):
+        """Returns [(row, score)] best first."""
+        query = self._prepare(query)[0]
+        with self.lock:
+            n_alive = len(self.id_to_row)
+            if n_alive == 0:
+                return []
+            if query_filter is None and self._use_hnsw(n_alive):
+                return self._search_hnsw(query, limit, n_alive)
+
+            rows = self.rows_matching(query_filter)
+            if len(rows) == 0:
+                return []
+            if len(rows) == self.count:
+                scores = self.vectors[:self.count] @ query
+            else:
+                scores = self.vectors[rows] @ query
+            k = min(limit, len(rows))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(int(rows[i]), float(scores[i])) for i in top]
+
+    # --- HNSW ---
+
+    def _use_hnsw(self, n_alive: int) -> bool:
+        if hnswlib is None or n_alive < settings.VECTOR_INDEX_HNSW_THRESHOLD:
+            return False
+        if self._hnsw is None:
+            self._build_hnsw()
+        return True
+
+    def _build_hnsw(self):
+        space = "ip"
+        index = hnswlib.Index(space=space, dim=self.size)
+        index.init_index(
+            max_elements=self.capacity,
+            ef_construction=settings.VECTOR_INDEX_HNSW_EF_CONSTRUCTION,
+            M=settings.VECTOR_INDEX_HNSW_M,
+            allow_replace_deleted=False,
+        )
+        index.set_ef(settings.VECTOR_INDEX_HNSW_EF_SEARCH)
+        self._hnsw = index
+        self._hnsw_add(np.flatnonzero(self.alive[:self.count]))
+
+    def _hnsw_add(self, rows: np.ndarray):
+        if len(rows) == 0:
+            return
+        if self.capacity > self._hnsw.get_max_elements():
+            self._hnsw.resize_index(self.capacity)
+        self._hnsw.add_items(np.asarray(self.vectors[rows]), rows)
+
+    def _search_hnsw(self, query, limit: int, n_alive: int):
+        k = min(limit, n_alive)
+        self._hnsw.set_ef(max(settings.VECTOR_INDEX_HNSW_EF_SEARCH, k))
+        labels, distances = self._hnsw.knn_query(query, k=k)
+        # hnswlib 'ip' distance is 1 - dot
+        return [(int(r), float(1.0 - d)) for r, d in zip(labels[0], distances[0])]
+
+
+class LocalVectorClient:
+    """QdrantClient-compatible facade over `VectorCollection`s stored under `path`."""
+
+    def __init__(self, path: str = None):
+        self.root = Path(path or settings.VECTOR_INDEX_PATH)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._collections = {}
+        self._lock = threading.Lock()
+        self._aliases_path = self.root / "aliases.json"
+        self._aliases = json.loads(self._aliases_path.read_text()) if self._aliases_path.exists() else {}
+
+    def _resolve(self, name: str) -> str:
+        return self._aliases.get(name, name)
+
+    def _get(self, name: str) -> VectorCollection:
+        with self._lock:
+            name = self._resolve(name)
+            col = self._collections.get(name)
+            if col is None:
+                if not (self.root / name / "meta.json").exists():
+                    raise ValueError(f"Collection {name} not found")
+                col = VectorCollection(self.root, name)
+                self._collections[name] = col
+            return col
+
+    # --- Collections ---
+
+    def collection_exists(self, collection_name: str) -> bool:
+        return (self.root / self._resolve(collection_name) / "meta.json").exists()
+
+    def get_collection(self, collection_name: str):
+        col = self._get(collection_name)
+        vectors = SimpleNamespace(size=col.size, distance=col.distance)
+        return SimpleNamespace(
+            points_count=len(col.id_to_row),
+            config=SimpleNamespace(params=SimpleNamespace(
+                vectors=vectors if col.vector_name is None else {col.vector_name: vectors}
+            )),
+        )
+
+    def create_collection(self, collection_name: str, vectors_config, **kwargs):
+        if self.collection_exists(collection_name):
+            raise ValueError(f"Collection {collection_name} already exists")
+        vector_name = None
+        if isinstance(vectors_config, dict):
+            if len(vectors_config) != 1:
+                raise ValueError("The embedded index stores one named vector per collection")
+            (vector_name, vectors_config), = vectors_config.items()
+        with self._lock:
+            self._collections[collection_name] = VectorCollection(
+                self.root, collection_name, vectors_config.size, vectors_config.distance, vector_name
+            )
+        return True
+
+    def recreate_collection(self, collection_name: str, vectors_config, **kwargs):
+        self.delete_collection(collection_name)
+        return self.create_collection(collection_name, vectors_config, **kwargs)
+
+    def delete_collection(self, collection_name: str, **kwargs):
+        # Like Qdrant: an alias name deletes nothing; deleting a collection drops its aliases
+        import shutil
+        with self._lock:
+            self._collections.pop(collection_name, None)
+            if (self.root / collection_name).exists():
+                shutil.rmtree(self.root / collection_name)
+            if collection_name in self._aliases.values():
+                self._aliases = {a: c for a, c in self._aliases.items() if c != collection_name}
+                self._write_aliases()
+        return True
+
+    # --- Aliases ---
+
+    def _write_aliases(self):
+        tmp = self._aliases_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._aliases))
+        tmp.replace(self._aliases_path)
+
+    def get_aliases(self):
+        return SimpleNamespace(aliases=[
+            SimpleNamespace(alias_name=alias, collection_name=name) for alias, name in sorted(self._aliases.items())
+        ])
+
+    def update_collection_aliases(self, change_aliases_operations: list, **kwargs):
+        """Applies all operations at once (one file replace), like Qdrant's atomic alias update."""
+        with self._lock:
+            aliases = dict(self._aliases)
+            for op in change_aliases_operations:
+                if isinstance(op, DeleteAliasOperation):
+                    aliases.pop(op.delete_alias.alias_name, None)
+                elif isinstance(op, CreateAliasOperation):
+                    alias, name = op.create_alias.alias_name, op.create_alias.collection_name
+                    if not (self.root / name / "meta.json").exists():
+                        raise ValueError(f"Collection {name} not found")
+                    if (self.root / alias / "meta.json").exists():
+                        raise ValueError(f"Alias {alias} would shadow a collection")
+                    aliases[alias] = name
+            self._aliases = aliases
+            self._write_aliases()
+        return True
+
+    def update_collection(self, collection_name: str, **kwargs):
+        # Quantization / HNSW / on-disk settings don't apply to the embedded index.
+        self._get(collection_name)
+        return True
+
+    def create_payload_index(self, collection_name: str, field_name: str, field_schema=None, **kwargs):
+        # Filters are evaluated on the (already in-memory) payloads; nothing to build.
+        self._get(collection_name)
+        return True
+
+    # --- Points ---
+
+    @staticmethod
+    def _check_vector_name(col: VectorCollection, name):
+        if name != col.vector_name:
+            raise ValueError(f"Vector {name!r} not found in {col.name} (stores {col.vector_name!r})")
+
+    def _unpack(self, col: VectorCollection, vector):
+        if isinstance(vector, dict):
+            if col.vector_name not in vector:
+                self._check_vector_name(col, next(iter(vector), None))
+            return vector[col.vector_name]
+        self._check_vector_name(col, None)
+        return vector
+
+    def _pack(self, col: VectorCollection, row: int):
+        vector = col.vectors[row].tolist()
+        return vector if col.vector_name is None else {col.vector_name: vector}
+
+    def upsert(self, collection_name: str, points: list, wait: bool = True, **kwargs):
+        if not points:
+            return True
+        col = self._get(collection_name)
+        col.upsert(
+            ids=[str(p.id) for p in points],
+            vectors=np.array([self._unpack(col, p.vector) for p in points], dtype=np.float32),
+            payloads=[p.payload for p in points],
+        )
+        return True
+
+    def query_points(self, collection_name: str, query, query_filter=None, limit: int = 10,
+                     with_payload=True, with_vectors=False, using: str = None, **kwargs):
+        col = self._get(collection_name)
+        self._check_vector_name(col, using)
+        hits = col.search(np.asarray(query, dtype=np.float32), limit, query_filter)
+        points = [
+            ScoredPoint(
+                id=col.ids[row],
+                version=0,
+                score=score,
+                payload=col.payloads[row] if with_payload else None,
+                vector=self._pack(col, row) if with_vectors else None,
+            )
+            for row, score in hits
+        ]
+        return QueryResponse(points=points)
+
+    def scroll(self, collection_name: str, scroll_filter=None, limit: int = 10, offset=None,
+               with_payload=True, with_vectors=False, **kwargs):
+        """
+        Like QdrantClient.scroll, except that the returned offset is a position among the matching
+        points, not a point id: pass it back unchanged, and don't expect it to survive deletes.
+        """
+        col = self._get(collection_name)
+        with col.lock:
+            rows = col.rows_matching(scroll_filter)
+            start = int(offset or 0)
+            page = rows[start:start + limit]
+            records = [
+                Record(
+                    id=col.ids[r],
+                    payload=col.payloads[r] if with_payload else None,
+                    vector=self._pack(col, r) if with_vectors else None,
+                )
+                for r in page
+            ]
+        next_offset = start + limit if start + limit < len(rows) else None
+        return records, next_offset
+
+    def retrieve(self, collection_name: str, ids: list, with_payload=True, with_vectors=False, **kwargs):
+        col = self._get(collection_name)
+        with col.lock:
+            rows = [col.id_to_row[str(i)] for i in ids if str(i) in col.id_to_row]
+            return [
+                Record(
+                    id=col.ids[r],
+                    payload=col.payloads[r] if with_payload else None,
+                    vector=self._pack(col, r) if with_vectors else None,
+                )
+                for r in rows
+            ]
+
+    def _selected_ids(self, col: VectorCollection, selector) -> list:
+        if isinstance(selector, PointIdsList):
+            return [str(i) for i in selector.points]
+        if isinstance(selector, FilterSelector):
+            selector = selector.filter
+        if isinstance(selector, Filter):
+            return [col.ids[r] for r in col.rows_matching(selector)]
+        return [str(i) for i in selector]
+
+    def set_payload(self, collection_name: str, payload: dict, points, wait: bool = True, **kwargs):
+        col = self._get(collection_name)
+        with col.lock:
+            col.set_payload(self._selected_ids(col, points), payload)
+        return True
+
+    def delete(self, collection_name: str, points_selector, wait: bool = True, **kwargs):
+        col = self._get(collection_name)
+        with col.lock:
+            col.delete(self._selected_ids(col, points_selector))
+        return True
+
+    def count(self, collection_name: str, count_filter=None, **kwargs):
+        col = self._get(collection_name)
+        with col.lock:
+            return SimpleNamespace(count=len(col.rows_matching(count_filter)))
+
+    def close(self):
+        for col in self._collections.values():
+            col.flush()
+
+
+_client = None
+
+
+def get_vector_client():
+    """
+    Process-wide vector store client selected by QDRANT_MODE.
+    Shared so that services using on-disk modes don't fight over the same folder.
+    Every call is timed (qdrant.<method> in /metrics).
+    """
+    global _client
+    if _client is None:
+        if settings.QDRANT_MODE == "embedded":
+            client = LocalVectorClient(settings.VECTOR_INDEX_PATH)
+        elif settings.QDRANT_MODE == "local":
+            client = QdrantClient(path=settings.QDRANT_PATH)
+        else:
+            client = QdrantClient(
+                url=settings.get_qdrant_url(),
+                api_key=settings.QDRANT_API_KEY
+            )
+        _client = InstrumentedVectorClient(client)
+    return _client
+
+
+# --- Collection configuration (Settings-driven) ---
+
+def quantization_config():
+    mode = settings.QDRANT_QUANTIZATION.lower()
+    always_ram = settings.QDRANT_QUANTIZATION_ALWAYS_RAM
+    if mode == "scalar":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=always_ram)
+        )
+    if mode == "product":
+        return ProductQuantization(
+            product=ProductQuantizationConfig(
+                compression=CompressionRatio(settings.QDRANT_PRODUCT_COMPRESSION), always_ram=always_ram
+            )
+        )
+    if mode == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=always_ram))
+    if mode != "none":
+        raise ValueError(f"Unknown QDRANT_QUANTIZATION: {settings.QDRANT_QUANTIZATION}")
+    return None
+
+
+def hnsw_config():
+    return HnswConfigDiff(m=settings.QDRANT_HNSW_M, ef_construct=settings.QDRANT_HNSW_EF_CONSTRUCT)
+
+
+def collection_params(size, distance=Distance.COSINE) -> dict:
+    """kwargs for create_collection / recreate_collection; `size` is an int, or {vector name: size}."""
+    def params(dim):
+        return VectorParams(size=dim, distance=distance, on_disk=settings.QDRANT_ON_DISK_VECTORS)
+    return {
+        "vectors_config": {name: params(dim) for name, dim in size.items()} if isinstance(size, dict) else params(size),
+        "hnsw_config": hnsw_config(),
+        "quantization_config": quantization_config(),
+    }
+
+
+def collection_update_params(vector_names=None) -> dict:
+    """kwargs for update_collection: brings an existing collection to the current Settings."""
+    return {
+        "vectors_config": {name: VectorParamsDiff(on_disk=settings.QDRANT_ON_DISK_VECTORS) for name in vector_names or [""]},
+        "hnsw_config": hnsw_config(),
+        "quantization_config": quantization_config() or Disabled.DISABLED,
+    }
+
+
+# --- Versioned collections: one physical generation per model version behind an alias ---
+
+def stored_vectors(client, name: str):
+    """{vector name: size} of a collection (or alias); None when it has a single unnamed vector."""
+    vectors = client.get_collection(name).config.params.vectors
+    return {n: v.size for n, v in vectors.items()} if isinstance(vectors, dict) else None
+
+
+def stored_vector_names(client, name: str):
+    vectors = stored_vectors(client, name)
+    return None if vectors is None else set(vectors)
+
+
+def alias_target(client, alias: str):
+    """Physical collection behind `alias`, or None if it is not an alias."""
+    for description in client.get_aliases().aliases:
+        if description.alias_name == alias:
+            return description.collection_name
+    return None
+
+
+def ensure_collection(client, name: str, generation: str, vectors: dict) -> bool:
+    """
+    Unless `name` exists, alias it to `generation` ({vector name: size}). An existing
+    generation (or `<name>__legacy`, while promote_legacy swaps it in) is reused, never
+    recreated. True if a collection was created.
+    """
+    try:
+        client.get_collection(name)
+        return False
+    except Exception:
+        pass
+    existing = next((g for g in (generation, legacy_generation(name)) if client.collection_exists(g)), None)
+    if existing is None:
+        client.create_collection(collection_name=generation, **collection_params(vectors))
+    try:
+        client.update_collection_aliases(change_aliases_operations=[
+            CreateAliasOperation(create_alias=CreateAlias(collection_name=existing or generation, alias_name=name)),
+        ])
+    except Exception:
+        if alias_target(client, name) is None:
+            raise  # Not another process creating the same alias
+    return existing is None
+
+
+def switch_alias(client, alias: str, collection: str):
+    """Point `alias` at `collection` in one atomic alias update."""
+    operations = []
+    if alias_target(client, alias) is not None:
+        operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)))
+    elif client.collection_exists(alias):
+        raise ValueError(f"{alias} is a legacy collection, not an alias; promote_legacy() it first")
+    operations.append(CreateAliasOperation(create_alias=CreateAlias(collection_name=collection, alias_name=alias)))
+    client.update_collection_aliases(change_aliases_operations=operations)
+
+
+def legacy_generation(name: str) -> str:
+    return f"{name}__legacy"
+
+
+def _points(client, name: str, batch: int) -> dict:
+    points, offset = {}, None
+    while True:
+        page, offset = client.scroll(collection_name=name, limit=batch, offset=offset, with_payload=True, with_vectors=True)
+        points.update((p.id, p) for p in page)
+        if offset is None:
+            return points
+
+
+def promote_legacy(client, name: str, batch: int = 256, max_passes: int = 5) -> str:
+    """
+    Move a collection created before versioning behind an alias, keeping its data.
+
+    Its points, raw vectors included, are copied into `<name>__legacy`; passes repeat
+    until one finds no write made during the copy. Then the physical collection is
+    replaced by the alias: a name cannot be both, so this delete + alias create is the
+    one non-atomic step: calls made in that instant fail, they are not written elsewhere.
+    Returns the generation behind `name` (unchanged if it is already an alias).
+    """
+    target = alias_target(client, name)
+    if target is not None:
+        return target
+    generation = legacy_generation(name)
+    vectors = client.get_collection(name).config.params.vectors
+    if client.collection_exists(generation):
+        client.delete_collection(generation)  # Left over from an interrupted promotion
+    client.create_collection(collection_name=generation, **collection_params(vectors.size, vectors.distance))
+    client.create_payload_index(collection_name=generation, field_name="name", field_schema="keyword")
+
+    copied = {}
+    for _ in range(max_passes):
+        current = _points(client, name, batch)
+        changed = [
+            p for pid, p in current.items()
+            if pid not in copied or (copied[pid].payload, copied[pid].vector) != (p.payload, p.vector)
+        ]
+        removed = [pid for pid in copied if pid not in current]
+        for start in range(0, len(changed), batch):
+            client.upsert(collection_name=generation, wait=True, points=[
+                PointStruct(id=p.id, vector=p.vector, payload=p.payload) for p in changed[start:start + batch]
+            ])
+        if removed:
+            client.delete(collection_name=generation, points_selector=PointIdsList(points=removed), wait=True)
+        copied = current
+        if not changed and not removed:
+            break
+    logger.info("Moving legacy collection %s behind an alias (%d points in %s)", name, len(copied), generation)
+    client.delete_collection(name)
+    switch_alias(client, name, generation)
+    return generation
+
+
+def search_params():
+    """Per-query params: HNSW ef and quantized search with rescoring."""
+    quantization = None
+    if settings.QDRANT_QUANTIZATION.lower() != "none":
+        quantization = QuantizationSearchParams(
+            rescore=settings.QDRANT_RESCORE,
+            oversampling=settings.QDRANT_OVERSAMPLING,
+        )
+    if quantization is None and settings.QDRANT_HNSW_EF_SEARCH is None:
+        return None
+    return SearchParams(hnsw_ef=settings.QDRANT_HNSW_EF_SEARCH, quantization=quantization)
@@ -15,6 +15,12 @@ import NavBar from './components/SideNav'; // Imported as NavBar
 
 const API_BASE = import.meta.env.VITE_API_BASE || "http://localhost:8000/api/v1";
 
+// One conversation per browser tab: the server keeps "who are we talking about" per X-Session-ID
+const SESSION_ID = sessionStorage.getItem('sessionId') ||
+  (window.crypto?.randomUUID ? window.crypto.randomUUID() : Math.random().toString(36).slice(2));
+sessionStorage.setItem('sessionId', SESSION_ID);
+axios.defaults.headers.common['X-Session-ID'] = SESSION_ID;
+
 
 
 function App() {
@@ -0,0 +1,61 @@
+"""
+Multi-worker deployment without N copies of the models.
+
+    # Recommended: one model-server process, started and stopped with gunicorn
+    MODEL_SERVER_SOCKET=/tmp/masthishq-models.sock gunicorn -c gunicorn.conf.py app.main:app
+
+    # Alternative: load models in the master and fork (copy-on-write sharing)
+    GUNICORN_PRELOAD=1 gunicorn -c gunicorn.conf.py app.main:app
+
+With MODEL_SERVER_SOCKET set, the API workers import no ML framework at all;
+FaceNet, YOLO, MobileNetV2, MiniLM, Whisper and ECAPA live only in
+app/model_server.py. Preload shares the weights across forks but TF / torch
+thread pools created before fork() are not fork-safe, so prefer the model
+server when workers run inference.
+"""
+import gc
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", max(2, multiprocessing.cpu_count())))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = 120
+preload_app = os.getenv("GUNICORN_PRELOAD") == "1"
+
+MODEL_SERVER_SOCKET = os.getenv("MODEL_SERVER_SOCKET")
+_model_server = None
+
+
+def on_starting(server):
+    """Start the model server before any worker so they can connect to the socket."""
+    global _model_server
+    if not MODEL_SERVER_SOCKET or os.getenv("MODEL_SERVER_EXTERNAL") == "1":
+        return
+    if os.path.exists(MODEL_SERVER_SOCKET):
+        os.unlink(MODEL_SERVER_SOCKET)  # Stale socket from a previous run
+    _model_server = subprocess.Popen([sys.executable, "-m", "app.model_server"])
+    deadline = time.time() + float(os.getenv("MODEL_SERVER_START_TIMEOUT", "600"))
+    while not os.path.exists(MODEL_SERVER_SOCKET):
+        if _model_server.poll() is not None:
+            raise RuntimeError("Model server exited during startup")
+        if time.time() > deadline:
+            raise RuntimeError("Model server did not open its socket in time")
+        time.sleep(0.5)
+    server.log.info(f"Model server ready on {MODEL_SERVER_SOCKET} (pid {_model_server.pid})")
+
+
+def when_ready(server):
+    if preload_app:
+        # Everything imported so far (models included) is moved out of the GC's reach,
+        # so collections in the workers don't touch, and thereby copy, those pages.
+        gc.freeze()
+
+
+def on_exit(server):
+    if _model_server is not None:
+        _model_server.terminate()
+        _model_server.wait(timeout=30)
@@ -0,0 +1,408 @@
+"""
+Reproducible latency benchmarks for the recognition, object and chat hot paths.
+
+    python scripts/benchmark_suite.py --out bench.json                        # sizes 10 .. 100k
+    python scripts/benchmark_suite.py --sizes 1000 --only search --out a.json
+    python scripts/benchmark_suite.py --compare baseline.json bench.json      # exit 1 on regression
+
+Everything runs in-process against an embedded vector store in a temp dir
+(QDRANT_MODE=embedded), seeded with synthetic clustered embeddings and
+payloads (a few photos per identity, ~20 object categories), with the stub
+LLM backend, so numbers depend only on the code and the machine. Scenarios:
+
+    search.face, search.object, classify.object, search_by_text    per gallery size
+    embed.face, embed.object, embed.text                           once (model cost)
+    endpoint.recognize_person, endpoint.find_object, endpoint.chat_query   per size, via TestClient
+
+Model-backed scenarios need the ML stack (TensorFlow, keras-facenet,
+ultralytics, sentence-transformers) and are reported as skipped without it.
+Images are synthetic unless --face-image / --object-image point at fixtures.
+Each result has n, throughput (calls/s) and mean / p50 / p95 / p99 in ms.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000]
+RELATIONS = ["Son", "Daughter", "Friend", "Neighbour", "Doctor", "Nurse", "Grandson", "Sister"]
+OBJECT_LABELS = [
+    "keys", "wallet", "glasses", "phone", "remote", "medicine", "watch", "cup", "book", "umbrella",
+    "hearing aid", "charger", "bag", "slippers", "comb", "pen", "mug", "bottle", "hat", "scarf",
+]
+QUESTIONS = ["Who is {name}?", "Tell me about {name}", "Where does {name} live?", "Show me photos of {name}"]
+
+
+def configure_environment(workdir: str):
+    """Must run before any app import: Settings are read from the environment once."""
+    os.environ.update({
+        "QDRANT_MODE": "embedded",
+        "VECTOR_INDEX_PATH": os.path.join(workdir, "vector_index"),
+        "JOB_QUEUE_PATH": os.path.join(workdir, "jobs.sqlite3"),
+        "TTS_CACHE_DIR": os.path.join(workdir, "tts_cache"),
+        "LLM_BACKEND": "stub",
+        "TRACING_EXPORTER": "none",
+        "LOG_LEVEL": "WARNING",
+    })
+
+
+# --- Measurement ---
+
+def summarize(latencies_ms: list, total_s: float) -> dict:
+    lat = np.asarray(latencies_ms)
+    return {
+        "n": len(lat),
+        "throughput_per_s": round(len(lat) / total_s, 2) if total_s else None,
+        "mean_ms": round(float(lat.mean()), 3),
+        "p50_ms": round(float(np.percentile(lat, 50)), 3),
+        "p95_ms": round(float(np.percentile(lat, 95)), 3),
+        "p99_ms": round(float(np.percentile(lat, 99)), 3),
+    }
+
+
+def measure(fn, iterations: int, warmup: int = 3) -> dict:
+    """fn(i) called `iterations` times after `warmup` untimed calls."""
+    for i in range(warmup):
+        fn(i)
+    latencies = []
+    start = time.perf_counter()
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        fn(i)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+# --- Synthetic data ---
+
+def person_name(i: int) -> str:
+    return f"Person {i:05d}"
+
+
+def clustered(rng, centers: np.ndarray, labels: np.ndarray, noise: float = 0.3) -> np.ndarray:
+    vecs = centers[labels] + noise * rng.normal(size=(len(labels), centers.shape[1])).astype(np.float32)
+    return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+
+class Gallery:
+    """Synthetic faces / patients / objects at one size; keeps the cluster centers to draw queries from."""
+
+    def __init__(self, size: int, face_dim: int, object_dim: int, seed: int = 0):
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.identities = max(size // 3, 1)  # ~3 photos per person
+        self.face_centers = self.rng.normal(size=(self.identities, face_dim)).astype(np.float32)
+        self.object_centers = self.rng.normal(size=(len(OBJECT_LABELS), object_dim)).astype(np.float32)
+
+    def seed(self, service, batch: int = 1000):
+        from qdrant_client.models import PointStruct
+
+        collections = {
+            "faces": (self.size, self.face_centers, self.identities),
+            "patients": (max(self.size // 10, 1), self.face_centers, self.identities),
+            "objects": (self.size, self.object_centers, len(OBJECT_LABELS)),
+        }
+        for name in collections:
+            service.drop_collection(name)
+        service._ensure_collections()  # Fresh versioned generations, as a new deployment gets them
+        client = service.client
+        for name, (count, centers, n_labels) in collections.items():
+            for start in range(0, count, batch):
+                labels = self.rng.integers(0, n_labels, size=min(batch, count - start))
+                vecs = clustered(self.rng, centers, labels)
+                points = [
+                    PointStruct(id=str(uuid.uuid4()), vector=service.vectors.vector(name, v.tolist()), payload=self.payload(name, int(label)))
+                    for v, label in zip(vecs, labels)
+                ]
+                client.upsert(collection_name=name, points=points, wait=True)
+
+    @staticmethod
+    def payload(collection: str, label: int) -> dict:
+        if collection == "objects":
+            return {"name": OBJECT_LABELS[label], "type": "object", "location": "on the table", "source": "enrolled"}
+        return {
+            "name": person_name(label),
+            "person_id": f"p{label:05d}",
+            "relation": RELATIONS[label % len(RELATIONS)],
+            "notes": f"Visits on {['Mondays', 'Sundays', 'weekends'][label % 3]}.",
+            "timestamp": datetime(2024, 1, 1 + label % 28).isoformat(),
+        }
+
+    def face_query(self, i: int) -> list:
+        label = np.array([i % self.identities])
+        return clustered(self.rng, self.face_centers, label)[0].tolist()
+
+    def object_query(self, i: int) -> list:
+        label = np.array([i % len(OBJECT_LABELS)])
+        return clustered(self.rng, self.object_centers, label)[0].tolist()
+
+    def question(self, i: int) -> str:
+        return QUESTIONS[i % len(QUESTIONS)].format(name=person_name((i * 7919) % self.identities))
+
+    def people(self, limit: int) -> dict:
+        """{name: [payload]} for the semantic index (capped: encoding is the slow part of seeding)."""
+        return {
+            person_name(i): [self.payload("faces", i)]
+            for i in range(min(self.identities, limit))
+        }
+
+
+def synthetic_image(kind: str, size: int = 320) -> bytes:
+    """A face-like (skin oval, eyes, mouth) or object-like (coloured shapes) JPEG."""
+    from PIL import Image, ImageDraw
+    img = Image.new("RGB", (size, size), (200, 210, 220))
+    draw = ImageDraw.Draw(img)
+    if kind == "face":
+        draw.ellipse((80, 50, 240, 270), fill=(224, 172, 105))
+        draw.ellipse((120, 120, 150, 140), fill=(40, 30, 30))
+        draw.ellipse((170, 120, 200, 140), fill=(40, 30, 30))
+        draw.rectangle((150, 150, 170, 190), fill=(200, 150, 90))
+        draw.arc((125, 190, 195, 230), 0, 180, fill=(120, 40, 40), width=5)
+    else:
+        draw.rectangle((90, 120, 230, 220), fill=(150, 40, 40))
+        draw.ellipse((110, 60, 210, 140), fill=(30, 90, 160))
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def image_bytes(path: str, kind: str) -> bytes:
+    return open(path, "rb").read() if path else synthetic_image(kind)
+
+
+# --- Runner ---
+
+class Suite:
+    def __init__(self, args, workdir: str):
+        self.args = args
+        self.workdir = workdir
+        self.results = []
+        self._client = None
+
+    def want(self, name: str) -> bool:
+        return not self.args.only or any(name.startswith(prefix) for prefix in self.args.only)
+
+    def record(self, name: str, size, fn, iterations: int = None, **extra):
+        if not self.want(name):
+            return
+        entry = {"name": name, "size": size, **extra}
+        try:
+            entry.update(measure(fn, iterations or self.args.iterations, warmup=self.args.warmup))
+        except ImportError as e:
+            entry["skipped"] = f"missing dependency: {e.name or e}"
+        except Exception as e:
+            entry["error"] = f"{type(e).__name__}: {e}"
+        self.results.append(entry)
+        if "p50_ms" in entry:
+            print(f"{name:>28} size={size!s:>7}  p50 {entry['p50_ms']:9.3f} ms  p95 {entry['p95_ms']:9.3f} ms  "
+                  f"p99 {entry['p99_ms']:9.3f} ms  {entry['throughput_per_s']:9.1f}/s", flush=True)
+        else:
+            print(f"{name:>28} size={size!s:>7}  {entry.get('skipped') or entry.get('error')}", flush=True)
+
+    def skip(self, name: str, size, reason: str):
+        if self.want(name):
+            self.results.append({"name": name, "size": size, "skipped": reason})
+            print(f"{name:>28} size={size!s:>7}  {reason}", flush=True)
+
+    @property
+    def client(self):
+        """TestClient over the full app (None if the app's model dependencies are missing)."""
+        if self._client is None:
+            try:
+                from fastapi.testclient import TestClient
+                from app.main import app
+                self._client = TestClient(app)
+            except ImportError as e:
+                self._client = f"missing dependency: {e.name or e}"
+        return self._client if not isinstance(self._client, str) else None
+
+    def run_models(self):
+        face_image = os.path.join(self.workdir, "face.jpg")
+        object_image = os.path.join(self.workdir, "object.jpg")
+        with open(face_image, "wb") as f:
+            f.write(image_bytes(self.args.face_image, "face"))
+        with open(object_image, "wb") as f:
+            f.write(image_bytes(self.args.object_image, "object"))
+
+        def embed_face(i):
+            from app.services.face_service import face_service
+            face_service.generate_embedding(face_image)
+
+        def embed_object(i):
+            from app.services.object_service import detector
+            detector.generate_embedding(object_image)
+
+        def embed_text(i):
+            from app.services.text_encoder import load_text_encoder
+            if not hasattr(embed_text, "encoder"):
+                embed_text.encoder = load_text_encoder()
+            embed_text.encoder.encode(QUESTIONS[i % len(QUESTIONS)].format(name=person_name(i)))
+
+        model_iterations = max(self.args.iterations // 5, 10)
+        self.record("embed.face", None, embed_face, model_iterations)
+        self.record("embed.object", None, embed_object, model_iterations)
+        self.record("embed.text", None, embed_text, model_iterations)
+
+    def run_size(self, size: int):
+        from app.services.memory_service import memory_service
+        from app.services.object_classifier import object_classifier
+
+        gallery = Gallery(size, memory_service.COLLECTIONS["faces"], memory_service.COLLECTIONS["objects"])
+        started = time.perf_counter()
+        gallery.seed(memory_service)
+        object_classifier.invalidate()
+        print(f"\n--- gallery size {size} (seeded in {time.perf_counter() - started:.1f}s) ---", flush=True)
+
+        self.record("search.face", size, lambda i: memory_service.search_face(gallery.face_query(i), limit=1))
+        self.record("search.object", size, lambda i: memory_service.search_object(gallery.object_query(i), limit=1))
+        self.record("classify.object", size, lambda i: object_classifier.classify(gallery.object_query(i)))
+        self.record("search_by_text", size, lambda i: memory_service.search_by_text(gallery.question(i)))
+
+        endpoints = [n for n in ("endpoint.recognize_person", "endpoint.find_object", "endpoint.chat_query") if self.want(n)]
+        if not endpoints:
+            return
+        client = self.client
+        if client is None:
+            for name in endpoints:
+                self.skip(name, size, self._client)
+            return
+
+        try:
+            from app.services.semantic_memory import semantic_memory
+            semantic_memory.reindex_people(gallery.people(self.args.max_text_people))
+        except Exception as e:
+            print(f"Semantic index seeding failed: {e}")
+
+        face = image_bytes(self.args.face_image, "face")
+        obj = image_bytes(self.args.object_image, "object")
+        prefix = "/api/v1"
+
+        def recognize(i):
+            r = client.post(f"{prefix}/recognize/person", files={"file": ("face.jpg", face, "image/jpeg")})
+            r.raise_for_status()
+
+        def find_object(i):
+            r = client.post(f"{prefix}/find/object", files={"file": ("object.jpg", obj, "image/jpeg")})
+            r.raise_for_status()
+
+        def chat(i):
+            r = client.post(f"{prefix}/chat/query", json={"text": gallery.question(i)},
+                            headers={"X-Session-ID": f"bench-{i % 8}"})
+            r.raise_for_status()
+
+        endpoint_iterations = max(self.args.iterations // 2, 10)
+        self.record("endpoint.recognize_person", size, recognize, endpoint_iterations)
+        self.record("endpoint.find_object", size, find_object, endpoint_iterations)
+        self.record("endpoint.chat_query", size, chat, endpoint_iterations)
+
+
+def git_revision() -> dict:
+    def git(*cmd):
+        try:
+            return subprocess.check_output(["git", *cmd], stderr=subprocess.DEVNULL, text=True).strip()
+        except Exception:
+            return None
+    return {"commit": git("rev-parse", "--short", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def run(args) -> dict:
+    with tempfile.TemporaryDirectory(prefix="masthishq-bench-") as workdir:
+        configure_environment(workdir)
+        suite = Suite(args, workdir)
+        if not args.skip_models:
+            suite.run_models()
+        for size in args.sizes:
+            suite.run_size(size)
+        if suite._client is not None and not isinstance(suite._client, str):
+            suite._client.close()
+        from app.services.job_queue import job_queue
+        job_queue.stop()
+
+    return {
+        "meta": {
+            **git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "sizes": args.sizes,
+            "iterations": args.iterations,
+        },
+        "results": suite.results,
+    }
+
+
+# --- Comparison ---
+
+def compare(baseline_path: str, current_path: str, tolerance: float, metric: str = "p95_ms", min_delta_ms: float = 0.1) -> int:
+    """
+    Print per-scenario changes; returns the number of regressions: metric worse by more
+    than `tolerance` (relative) and by more than `min_delta_ms` (sub-ms timings are noisy).
+    """
+    def load(path):
+        data = json.load(open(path))
+        return data["meta"], {(r["name"], r["size"]): r for r in data["results"] if metric in r}
+
+    base_meta, base = load(baseline_path)
+    cur_meta, cur = load(current_path)
+    print(f"{metric}: {base_meta.get('commit')} -> {cur_meta.get('commit')} (tolerance {tolerance:.0%})\n")
+    print(f"{'scenario':>28} {'size':>7} {'baseline':>11} {'current':>11} {'change':>8}")
+
+    regressions = 0
+    for key in sorted(set(base) & set(cur), key=lambda k: (k[0], k[1] or 0)):
+        before, after = base[key][metric], cur[key][metric]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > tolerance and after - before > min_delta_ms:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif change < -tolerance and before - after > min_delta_ms:
+            flag = "  faster"
+        print(f"{key[0]:>28} {key[1]!s:>7} {before:9.3f}ms {after:9.3f}ms {change:+7.1%}{flag}")
+    for key in sorted(set(base) ^ set(cur), key=lambda k: (k[0], k[1] or 0)):
+        print(f"{key[0]:>28} {key[1]!s:>7}  only in {'baseline' if key in base else 'current'}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency benchmarks for the recognition, object and chat paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Gallery sizes (points per collection)")
+    parser.add_argument("--iterations", type=int, default=200, help="Timed calls per search scenario")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--only", nargs="+", help="Scenario name prefixes, e.g. search endpoint.chat_query")
+    parser.add_argument("--skip-models", action="store_true", help="Skip the embed.* scenarios")
+    parser.add_argument("--max-text-people", type=int, default=2000, help="People indexed into text_knowledge for chat")
+    parser.add_argument("--face-image", help="Fixture image for face scenarios (default: synthetic)")
+    parser.add_argument("--object-image", help="Fixture image for object scenarios (default: synthetic)")
+    parser.add_argument("--out", help="Write results as JSON here")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="Compare two result files")
+    parser.add_argument("--metric", default="p95_ms", choices=["mean_ms", "p50_ms", "p95_ms", "p99_ms"])
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Relative slowdown counted as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=0.1, help="Ignore changes smaller than this")
+    args = parser.parse_args()
+
+    if args.compare:
+        regressions = compare(*args.compare, tolerance=args.tolerance, metric=args.metric, min_delta_ms=args.min_delta_ms)
+        print(f"\n{regressions} regression(s)")
+        sys.exit(1 if regressions else 0)
+
+    report = run(args)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
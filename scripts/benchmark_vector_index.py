@@ -0,0 +1,100 @@
+"""
+Benchmark the embedded vector index against qdrant-client local mode.
+
+    python scripts/benchmark_vector_index.py --sizes 1000 10000 100000 --dim 512
+
+Vectors are synthetic clustered embeddings (like a face gallery: a few images
+per identity). Reports ingest time, query latency p50/p95 and recall@10 of the
+embedded index against exact search.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import VectorParams, Distance, PointStruct
+
+from app.services.vector_index import LocalVectorClient
+
+
+def make_vectors(n, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(n // 5, 1), dim)).astype(np.float32)
+    labels = rng.integers(0, len(centers), size=n)
+    vecs = centers[labels] + 0.3 * rng.normal(size=(n, dim)).astype(np.float32)
+    return vecs
+
+
+def ingest(client, vecs, batch=1000):
+    client.create_collection("bench", vectors_config=VectorParams(size=vecs.shape[1], distance=Distance.COSINE))
+    t0 = time.perf_counter()
+    for i in range(0, len(vecs), batch):
+        chunk = vecs[i:i + batch]
+        client.upsert(
+            collection_name="bench",
+            points=[PointStruct(id=str(uuid.uuid4()), vector=v.tolist(), payload={"i": i + j}) for j, v in enumerate(chunk)],
+        )
+    return time.perf_counter() - t0
+
+
+def query(client, queries, k=10):
+    latencies, results = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        res = client.query_points(collection_name="bench", query=q.tolist(), limit=k).points
+        latencies.append((time.perf_counter() - t0) * 1000)
+        results.append([p.payload["i"] for p in res])
+    return np.array(latencies), results
+
+
+def exact_topk(vecs, queries, k=10):
+    normed = vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+    q = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    scores = q @ normed.T
+    return [list(np.argsort(-s)[:k]) for s in scores]
+
+
+def recall(results, truth):
+    hits = sum(len(set(r) & set(t)) for r, t in zip(results, truth))
+    return hits / sum(len(t) for t in truth)
+
+
+def run(sizes, dim, n_queries, skip_qdrant):
+    for n in sizes:
+        vecs = make_vectors(n, dim)
+        queries = make_vectors(n_queries, dim, seed=1)
+        truth = exact_topk(vecs, queries)
+        print(f"\n--- {n} points x {dim}d ---")
+
+        backends = [("embedded", lambda d: LocalVectorClient(d))]
+        if not skip_qdrant:
+            backends.append(("qdrant-local", lambda d: QdrantClient(path=d)))
+
+        for name, factory in backends:
+            with tempfile.TemporaryDirectory() as tmp:
+                client = factory(tmp)
+                ingest_s = ingest(client, vecs)
+                lat, res = query(client, queries)
+                print(
+                    f"{name:>13}: ingest {ingest_s:7.2f}s | "
+                    f"query p50 {np.percentile(lat, 50):7.2f}ms p95 {np.percentile(lat, 95):7.2f}ms | "
+                    f"recall@10 {recall(res, truth):.3f}"
+                )
+                client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--dim", type=int, default=512)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--skip-qdrant", action="store_true", help="Only run the embedded index")
+    args = parser.parse_args()
+    run(args.sizes, args.dim, args.queries, args.skip_qdrant)
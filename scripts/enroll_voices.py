@@ -0,0 +1,133 @@
+"""
+Bulk-enroll speaker embeddings into the `voices` collection.
+
+    # Voice samples already stored with face / patient records (audio_base64 payloads)
+    python scripts/enroll_voices.py --from-collections
+
+    # A dataset of per-person folders (metadata.json + *.wav), like seed_data.py
+    python scripts/enroll_voices.py --dataset Convolve/photo/voxceleb_data
+
+Clips are embedded in batches (SPEAKER_BATCH_SIZE per forward pass). Point ids
+are derived from the person and the audio bytes, so re-running is idempotent.
+"""
+import argparse
+import base64
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.config import settings
+from app.services.memory_service import memory_service
+from app.services.speaker_service import speaker_service
+
+AUDIO_EXTENSIONS = (".wav", ".webm", ".mp3", ".m4a", ".ogg", ".flac")
+
+
+def from_collections(tmp_dir: str) -> list:
+    """(audio_path, person_id, metadata) for every distinct stored voice sample."""
+    samples, seen = [], set()
+    for collection in memory_service.PEOPLE_COLLECTIONS:
+        offset = None
+        while True:
+            batch, offset = memory_service.client.scroll(
+                collection_name=collection, limit=256, offset=offset, with_payload=True, with_vectors=False
+            )
+            for point in batch:
+                payload = point.payload or {}
+                audio_b64 = payload.get("audio_base64")
+                if not audio_b64 or not payload.get("name"):
+                    continue
+                audio = base64.b64decode(audio_b64.split(",")[-1])
+                person_id = payload.get("person_id") or payload["name"].replace(" ", "_")
+                digest = hashlib.sha1(audio).hexdigest()
+                if (person_id, digest) in seen:
+                    continue  # Same clip copied onto several face records
+                seen.add((person_id, digest))
+                path = os.path.join(tmp_dir, f"{digest}.webm")
+                with open(path, "wb") as f:
+                    f.write(audio)
+                samples.append((path, person_id, {
+                    "name": payload["name"],
+                    "relation": payload.get("relation"),
+                    "notes": payload.get("notes", ""),
+                    "face_collection": collection,
+                    "face_point_id": str(point.id),
+                }))
+            if offset is None:
+                break
+    return samples
+
+
+def from_dataset(base_dir: str) -> list:
+    samples = []
+    for person_dir in sorted(Path(base_dir).iterdir()):
+        if not person_dir.is_dir():
+            continue
+        meta = {"name": f"Unknown ({person_dir.name})", "relation": "Unknown"}
+        if (person_dir / "metadata.json").exists():
+            with open(person_dir / "metadata.json") as f:
+                meta.update(json.load(f))
+        for audio_path in sorted(person_dir.iterdir()):
+            if audio_path.suffix.lower() in AUDIO_EXTENSIONS:
+                samples.append((str(audio_path), person_dir.name, {
+                    "name": meta["name"],
+                    "relation": meta.get("relation"),
+                    "notes": meta.get("notes", ""),
+                    "source_path": str(audio_path),
+                }))
+    return samples
+
+
+def enroll(samples: list) -> int:
+    stored = 0
+    started = time.perf_counter()
+    batch_size = settings.SPEAKER_BATCH_SIZE
+    for i in range(0, len(samples), batch_size):
+        batch = samples[i:i + batch_size]
+        embeddings = speaker_service.embed_batch([path for path, _, _ in batch])
+        for (path, person_id, meta), embedding in zip(batch, embeddings):
+            if not embedding:
+                print(f"   ! No usable speech in {path}")
+                continue
+            with open(path, "rb") as f:
+                audio = f.read()
+            memory_service.store_voice_memory(
+                person_id=person_id,
+                embedding=embedding,
+                metadata={**meta, "type": "voice"},
+                point_id=memory_service.voice_point_id(person_id, audio),  # Same id as the enrollment job
+            )
+            stored += 1
+        print(f"   + {min(i + batch_size, len(samples))}/{len(samples)} clips")
+    elapsed = time.perf_counter() - started
+    print(f"Stored {stored} voice embeddings in {elapsed:.1f}s ({elapsed / max(len(samples), 1) * 1000:.0f} ms/clip)")
+    return stored
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--from-collections", action="store_true", help="Embed audio_base64 stored on faces/patients")
+    parser.add_argument("--dataset", help="Per-person folders with metadata.json and audio clips")
+    args = parser.parse_args()
+
+    if not args.from_collections and not args.dataset:
+        parser.error("Pass --from-collections and/or --dataset")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        samples = []
+        if args.from_collections:
+            samples += from_collections(tmp_dir)
+        if args.dataset:
+            samples += from_dataset(args.dataset)
+        print(f"Found {len(samples)} voice clips.")
+        enroll(samples)
+
+
+if __name__ == "__main__":
+    main()
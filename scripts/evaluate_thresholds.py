@@ -0,0 +1,327 @@
+"""
+Match-threshold evaluation: ROC / EER from genuine and impostor pairs, plus embedding latency.
+
+    # Faces from the enrolled VoxCeleb layout (one folder per person, metadata.json optional)
+    python scripts/evaluate_thresholds.py --modality face --data Convolve/photo/voxceleb_data
+
+    # Compare in-process models with the model server, keep the report, write tuned thresholds
+    python scripts/evaluate_thresholds.py --backends local server --socket /tmp/masthishq-models.sock \\
+        --out thresholds-report.json --write thresholds.json
+    THRESHOLDS_FILE=thresholds.json uvicorn app.main:app
+
+Every image (or .wav, for --modality voice) under an identity folder is
+embedded once per backend. Genuine pairs are two samples of the same
+identity. Impostor pairs are sampled across identities. Both are scored with
+cosine similarity, which is the score the endpoints compare against their
+threshold.
+
+Reported per backend:
+  - ROC (FAR = impostor pairs above t, FRR = genuine pairs at or below t), AUC and the equal-error point
+  - recommended threshold: the lowest one with FAR <= --target-far (fewest wrong rejections in that budget)
+  - the current setting's FAR / FRR, and a leave-one-out gallery run, which is what /recognize/person does
+    (best match over everything else: correct, wrong person, rejected)
+  - failures to embed (no face found -> the kiosk resends the frame), embedding latency p50/p95/p99
+
+--write stores the recommended thresholds as {"FACE_MATCH_THRESHOLD": ...} for Settings.THRESHOLDS_FILE.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png")
+
+MODALITIES = {
+    # modality -> (sample suffixes, setting, model-server route)
+    "face": (IMAGE_SUFFIXES, "FACE_MATCH_THRESHOLD", "/face/embed"),
+    "object": (IMAGE_SUFFIXES, "OBJECT_MATCH_THRESHOLD", "/object/embed"),
+    "voice": ((".wav",), "SPEAKER_MATCH_THRESHOLD", "/speaker/embed"),
+}
+
+
+def load_identities(root: str, suffixes: tuple, min_samples: int = 1) -> dict:
+    """identity name -> sample paths, from one sub-folder per identity (name from metadata.json if present)."""
+    identities = {}
+    for folder in sorted(p for p in Path(root).iterdir() if p.is_dir()):
+        samples = sorted(str(p) for p in folder.iterdir() if p.suffix.lower() in suffixes)
+        if len(samples) < min_samples:
+            continue
+        name = folder.name
+        if (folder / "metadata.json").exists():
+            try:
+                name = json.loads((folder / "metadata.json").read_text()).get("name") or name
+            except ValueError:
+                pass
+        identities.setdefault(name, []).extend(samples)
+    return identities
+
+
+def make_embedder(modality: str, backend: str, socket: str = None):
+    """Callable path -> embedding (list, empty on failure) for 'local' (in-process) or 'server' models."""
+    route = MODALITIES[modality][2]
+    if backend == "server":
+        from app.services.model_client import ModelServerClient
+        client = ModelServerClient(socket)
+        if modality == "voice":
+            return lambda path: client.post(route, [path])["embeddings"][0]
+        return lambda path: client.post(route, [path])["embedding"]
+
+    from app.services.model_client import use_model_server
+    if modality == "face":
+        from app.services import face_service as module
+        service = module.FaceService() if use_model_server() else module.face_service
+    elif modality == "object":
+        from app.services import object_service as module
+        service = module.ObjectDetector() if use_model_server() else module.detector
+    else:
+        from app.services import speaker_service as module
+        service = module.SpeakerService() if use_model_server() else module.speaker_service
+    return service.generate_embedding
+
+
+def embed_all(embed, identities: dict) -> dict:
+    """Embeddings (L2-normalized), their labels, per-sample latency and the samples that failed."""
+    vectors, labels, latencies, failures = [], [], [], []
+    for name, paths in identities.items():
+        for path in paths:
+            start = time.perf_counter()
+            try:
+                embedding = embed(path)
+            except Exception as e:
+                print(f"   ! {path}: {e}")
+                embedding = []
+            latencies.append((time.perf_counter() - start) * 1000)
+            if embedding is None or len(embedding) == 0:
+                failures.append(path)
+                continue
+            vector = np.asarray(embedding, dtype=np.float32)
+            vectors.append(vector / (np.linalg.norm(vector) or 1.0))
+            labels.append(name)
+    return {
+        "vectors": np.stack(vectors) if vectors else np.zeros((0, 1), dtype=np.float32),
+        "labels": np.asarray(labels),
+        "latencies": latencies,
+        "failures": failures,
+    }
+
+
+def make_pairs(labels, max_genuine_per_identity: int, impostors: int, seed: int = 0) -> tuple:
+    """(genuine, impostor) index pairs as (n, 2) arrays."""
+    rng = random.Random(seed)
+    by_label = {}
+    for index, label in enumerate(labels):
+        by_label.setdefault(label, []).append(index)
+
+    genuine = []
+    for indices in by_label.values():
+        pairs = list(combinations(indices, 2))
+        if max_genuine_per_identity and len(pairs) > max_genuine_per_identity:
+            pairs = rng.sample(pairs, max_genuine_per_identity)
+        genuine.extend(pairs)
+
+    impostor = set()
+    n = len(labels)
+    if len(by_label) > 1:
+        # Cap at the number of distinct cross-identity pairs so a tiny set can't loop forever
+        possible = (n * n - sum(len(v) ** 2 for v in by_label.values())) // 2
+        while len(impostor) < min(impostors, possible):
+            a, b = rng.randrange(n), rng.randrange(n)
+            if labels[a] != labels[b]:
+                impostor.add((min(a, b), max(a, b)))
+    return np.asarray(genuine, dtype=np.int64).reshape(-1, 2), np.asarray(sorted(impostor), dtype=np.int64).reshape(-1, 2)
+
+
+def pair_scores(vectors: np.ndarray, pairs: np.ndarray) -> np.ndarray:
+    if len(pairs) == 0:
+        return np.zeros(0, dtype=np.float32)
+    return np.einsum("ij,ij->i", vectors[pairs[:, 0]], vectors[pairs[:, 1]])
+
+
+def rates_at(genuine: np.ndarray, impostor: np.ndarray, threshold: float) -> dict:
+    """A match is score > threshold, as in the endpoints."""
+    return {
+        "threshold": round(float(threshold), 4),
+        "far": round(float(np.mean(impostor > threshold)), 5) if len(impostor) else None,
+        "frr": round(float(np.mean(genuine <= threshold)), 5) if len(genuine) else None,
+    }
+
+
+def roc_curve(genuine: np.ndarray, impostor: np.ndarray) -> tuple:
+    """(thresholds, far, frr), thresholds ascending; the first one accepts every pair."""
+    thresholds = np.concatenate([[-1.0], np.unique(np.concatenate([genuine, impostor]))])
+    far = 1.0 - np.searchsorted(np.sort(impostor), thresholds, side="right") / len(impostor)
+    frr = np.searchsorted(np.sort(genuine), thresholds, side="right") / len(genuine)
+    return thresholds, far, frr
+
+
+def equal_error(thresholds, far, frr) -> dict:
+    index = int(np.argmin(np.abs(far - frr)))
+    return {"threshold": round(float(thresholds[index]), 4), "eer": round(float((far[index] + frr[index]) / 2), 5)}
+
+
+def auc(genuine: np.ndarray, impostor: np.ndarray) -> float:
+    """P(genuine score > impostor score), ties counting half."""
+    ranked = np.sort(impostor)
+    below = np.searchsorted(ranked, genuine, side="left")
+    equal = np.searchsorted(ranked, genuine, side="right") - below
+    return float(np.mean(below + 0.5 * equal) / len(impostor))
+
+
+def threshold_for_far(thresholds, far, target: float) -> float:
+    """Lowest threshold whose FAR is within the target (FAR only falls as the threshold rises)."""
+    index = int(np.argmax(far <= target))
+    return float(thresholds[index])
+
+
+def gallery_outcomes(vectors: np.ndarray, labels: np.ndarray, threshold: float) -> dict:
+    """Leave-one-out identification: each sample against every other one, best match decides."""
+    if len(labels) < 2:
+        return {}
+    similarities = vectors @ vectors.T
+    np.fill_diagonal(similarities, -np.inf)
+    best = similarities.argmax(axis=1)
+    scores = similarities[np.arange(len(labels)), best]
+    accepted = scores > threshold
+    correct = labels[best] == labels
+    return {
+        "threshold": round(float(threshold), 4),
+        "identified": round(float(np.mean(accepted & correct)), 4),
+        "wrong_person": round(float(np.mean(accepted & ~correct)), 4),
+        "rejected": round(float(np.mean(~accepted)), 4),
+    }
+
+
+def latency_summary(latencies: list) -> dict:
+    values = np.asarray(latencies) if latencies else np.zeros(1)
+    return {
+        "samples": len(latencies),
+        "mean_ms": round(float(values.mean()), 1),
+        "p50_ms": round(float(np.percentile(values, 50)), 1),
+        "p95_ms": round(float(np.percentile(values, 95)), 1),
+        "p99_ms": round(float(np.percentile(values, 99)), 1),
+    }
+
+
+def evaluate(embedded: dict, current: float, target_far: float, max_genuine: int, impostors: int,
+             seed: int = 0, roc_points: int = 50) -> dict:
+    vectors, labels = embedded["vectors"], embedded["labels"]
+    total = len(labels) + len(embedded["failures"])
+    report = {
+        "samples": total,
+        "identities": len(set(labels.tolist())),
+        "failure_to_embed": round(len(embedded["failures"]) / total, 4) if total else 0.0,
+        "failed": embedded["failures"],
+    }
+    genuine_pairs, impostor_pairs = make_pairs(labels.tolist(), max_genuine, impostors, seed)
+    genuine, impostor = pair_scores(vectors, genuine_pairs), pair_scores(vectors, impostor_pairs)
+    report.update({"genuine_pairs": len(genuine), "impostor_pairs": len(impostor)})
+    if not len(genuine) or not len(impostor):
+        report["error"] = "need at least two samples of one identity and two identities"
+        return report
+
+    thresholds, far, frr = roc_curve(genuine, impostor)
+    recommended = threshold_for_far(thresholds, far, target_far)
+    step = max(len(thresholds) // roc_points, 1)
+    report.update({
+        "genuine_scores": {"mean": round(float(genuine.mean()), 4), "p5": round(float(np.percentile(genuine, 5)), 4)},
+        "impostor_scores": {"mean": round(float(impostor.mean()), 4), "p95": round(float(np.percentile(impostor, 95)), 4)},
+        "auc": round(auc(genuine, impostor), 5),
+        "eer": equal_error(thresholds, far, frr),
+        "current": {**rates_at(genuine, impostor, current), "gallery": gallery_outcomes(vectors, labels, current)},
+        "recommended": {
+            **rates_at(genuine, impostor, recommended),
+            "target_far": target_far,
+            "gallery": gallery_outcomes(vectors, labels, recommended),
+        },
+        "roc": [
+            {"threshold": round(float(t), 4), "far": round(float(a), 5), "frr": round(float(r), 5)}
+            for t, a, r in zip(thresholds[::step], far[::step], frr[::step])
+        ],
+    })
+    return report
+
+
+def print_report(backend: str, setting: str, report: dict):
+    print(f"\n=== {backend}: {report['samples']} samples, {report['identities']} identities, "
+          f"{report['genuine_pairs']} genuine / {report['impostor_pairs']} impostor pairs ===")
+    latency = report["latency"]
+    print(f"embedding: p50 {latency['p50_ms']} ms, p95 {latency['p95_ms']} ms, p99 {latency['p99_ms']} ms; "
+          f"failed to embed {report['failure_to_embed']:.1%}")
+    if "error" in report:
+        print(f"! {report['error']}")
+        return
+    print(f"AUC {report['auc']}, EER {report['eer']['eer']:.2%} at {report['eer']['threshold']}")
+    for label in ("current", "recommended"):
+        r = report[label]
+        gallery = r["gallery"]
+        print(f"{label:>12} {setting}={r['threshold']}: FAR {r['far']:.2%}, FRR {r['frr']:.2%} | gallery: "
+              f"identified {gallery['identified']:.1%}, wrong person {gallery['wrong_person']:.1%}, "
+              f"rejected {gallery['rejected']:.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ROC / EER and threshold recommendation for match thresholds")
+    parser.add_argument("--modality", choices=sorted(MODALITIES), default="face")
+    parser.add_argument("--data", default="Convolve/photo/voxceleb_data", help="One sub-folder per identity")
+    parser.add_argument("--backends", nargs="+", choices=["local", "server"], default=["local"],
+                        help="'local' loads the models in-process, 'server' calls the model server")
+    parser.add_argument("--socket", help="Model server socket (default: MODEL_SERVER_SOCKET)")
+    parser.add_argument("--target-far", type=float, default=0.01, help="Impostor pairs allowed above the threshold")
+    parser.add_argument("--max-genuine", type=int, default=200, help="Genuine pairs per identity (0 = all)")
+    parser.add_argument("--impostors", type=int, default=20000, help="Impostor pairs sampled")
+    parser.add_argument("--limit", type=int, default=0, help="Samples per identity (0 = all)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Write the full report (including ROC points) as JSON here")
+    parser.add_argument("--write", help="Write the recommended threshold (first backend) for THRESHOLDS_FILE")
+    args = parser.parse_args()
+
+    from app.core.config import settings
+    suffixes, setting, _ = MODALITIES[args.modality]
+    identities = load_identities(args.data, suffixes)
+    if args.limit:
+        identities = {name: paths[:args.limit] for name, paths in identities.items()}
+    if not identities:
+        raise SystemExit(f"No {args.modality} samples under {args.data}")
+    print(f"{sum(map(len, identities.values()))} samples of {len(identities)} identities from {args.data}")
+
+    current = getattr(settings, setting)
+    results = {}
+    for backend in args.backends:
+        start = time.perf_counter()
+        embed = make_embedder(args.modality, backend, args.socket)
+        # The first call pays lazy model loading; keep it out of the latency figures
+        embed(next(iter(identities.values()))[0])
+        warmup_s = time.perf_counter() - start
+        embedded = embed_all(embed, identities)
+        report = evaluate(embedded, current, args.target_far, args.max_genuine, args.impostors, args.seed)
+        report["latency"] = {**latency_summary(embedded["latencies"]), "load_and_warmup_s": round(warmup_s, 2)}
+        print_report(backend, setting, report)
+        results[backend] = report
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"modality": args.modality, "data": args.data, "setting": setting, "backends": results},
+                      f, indent=2)
+        print(f"\nReport written to {args.out}")
+
+    if args.write:
+        first = results[args.backends[0]]
+        if "recommended" not in first:
+            raise SystemExit("No recommendation to write")
+        tuned = json.loads(Path(args.write).read_text()) if Path(args.write).exists() else {}
+        tuned[setting] = first["recommended"]["threshold"]
+        Path(args.write).write_text(json.dumps(tuned, indent=2) + "\n")
+        print(f"{setting}={tuned[setting]} written to {args.write} (set THRESHOLDS_FILE={args.write})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Fit the PCA projection for object embeddings and migrate the `objects` collection.
+
+    # Fit on the train_objects dataset (per-category folders), compare top-1 accuracy
+    python scripts/fit_object_projection.py --dataset path/to/MYNursingHome --dim 128
+
+    # Fit on the raw 1280-d vectors already in the collection, save and re-project them
+    python scripts/fit_object_projection.py --from-collection --dim 128 --save --migrate
+
+Then set OBJECT_PROJECTION_ENABLED=true so ingest and queries use the same projection.
+The projection is part of the object model version, so --migrate writes a new
+`objects` generation and switches the alias to it (see app/services/model_versions.py).
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from qdrant_client.models import PointStruct
+
+from app.core.config import settings
+from app.services.embedding_projection import PCAProjection
+from app.services.memory_service import memory_service
+from app.services.model_versions import vector_name, generation_name
+from app.services.vector_index import collection_params, promote_legacy, switch_alias
+
+RAW_DIM = 1280
+
+
+def load_dataset(base_dir: str, per_category: int):
+    from app.services.object_service import detector
+
+    X, labels = [], []
+    for cat in sorted(os.listdir(base_dir)):
+        cat_path = os.path.join(base_dir, cat)
+        if not os.path.isdir(cat_path):
+            continue
+        images = [f for f in sorted(os.listdir(cat_path)) if f.lower().endswith((".jpg", ".jpeg", ".png"))]
+        for img_name in images[:per_category]:
+            try:
+                X.append(detector.generate_embedding(os.path.join(cat_path, img_name), project=False))
+                labels.append(cat)
+            except Exception as e:
+                print(f"Error processing {img_name}: {e}")
+    return np.array(X, dtype=np.float32), labels
+
+
+def load_collection():
+    points, offset = [], None
+    while True:
+        batch, offset = memory_service.client.scroll(
+            collection_name="objects", limit=256, offset=offset, with_payload=True, with_vectors=True
+        )
+        points.extend(batch)
+        if offset is None:
+            break
+    for p in points:
+        # Named vectors: the raw one is whichever has the backbone's width
+        if isinstance(p.vector, dict):
+            p.vector = next((v for v in p.vector.values() if len(v) == RAW_DIM), next(iter(p.vector.values())))
+    return points
+
+
+def top1_accuracy(X, labels) -> float:
+    """Leave-one-out nearest neighbour accuracy under cosine similarity."""
+    Xn = X / np.maximum(np.linalg.norm(X, axis=1, keepdims=True), 1e-12)
+    sims = Xn @ Xn.T
+    np.fill_diagonal(sims, -np.inf)
+    nearest = sims.argmax(axis=1)
+    return float(np.mean([labels[i] == labels[j] for i, j in enumerate(nearest)]))
+
+
+def migrate(points, projection: PCAProjection):
+    version = f"{settings.OBJECT_MODEL_VERSION}-{projection.version}"
+    name, generation = vector_name(version), generation_name("objects", version)
+    print(f"Re-projecting {len(points)} points into a {projection.dim}-d '{generation}' collection...")
+    client = memory_service.client
+    client.recreate_collection(collection_name=generation, **collection_params({name: projection.dim}))
+    client.create_payload_index(collection_name=generation, field_name="name", field_schema="keyword")
+    batch = []
+    for p in points:
+        vector = projection.transform(np.array([p.vector]))[0].tolist()
+        payload = {**(p.payload or {}), "projection_version": projection.version, "model_version": version}
+        batch.append(PointStruct(id=p.id, vector={name: vector}, payload=payload))
+        if len(batch) == 256:
+            client.upsert(collection_name=generation, points=batch, wait=True)
+            batch = []
+    if batch:
+        client.upsert(collection_name=generation, points=batch, wait=True)
+    promote_legacy(client, "objects")  # A pre-versioning collection is kept as objects__legacy
+    switch_alias(client, "objects", generation)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dataset", help="train_objects layout: one folder per category")
+    parser.add_argument("--from-collection", action="store_true", help="Fit on raw vectors stored in 'objects'")
+    parser.add_argument("--per-category", type=int, default=10)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--whiten", action="store_true")
+    parser.add_argument("--save", action="store_true", help=f"Write to {settings.OBJECT_PROJECTION_PATH}")
+    parser.add_argument("--migrate", action="store_true", help="Re-project stored vectors (requires --from-collection)")
+    args = parser.parse_args()
+
+    points = None
+    if args.from_collection:
+        points = load_collection()
+        if not points:
+            print("'objects' collection is empty.")
+            return
+        if len(points[0].vector) != RAW_DIM:
+            print(f"Stored vectors are {len(points[0].vector)}-d, not raw {RAW_DIM}-d. Re-ingest with --dataset instead.")
+            return
+        X = np.array([p.vector for p in points], dtype=np.float32)
+        labels = [(p.payload or {}).get("name", "") for p in points]
+    elif args.dataset:
+        X, labels = load_dataset(args.dataset, args.per_category)
+    else:
+        parser.error("Pass --dataset DIR or --from-collection")
+
+    print(f"Fitting on {len(X)} embeddings, {len(set(labels))} categories.")
+    projection = PCAProjection.fit(X, args.dim, whiten=args.whiten)
+    Y = projection.transform(X)
+
+    print(f"Projection {projection.version}: {projection.source_dim} -> {projection.dim} "
+          f"({projection.explained_variance_ratio(X):.1%} variance kept)")
+    print(f"Top-1 (leave-one-out): raw {top1_accuracy(X, labels):.3f} | projected {top1_accuracy(Y, labels):.3f}")
+    print(f"Vector bytes per point: {projection.source_dim * 4} -> {projection.dim * 4}")
+
+    if args.save:
+        projection.save(settings.OBJECT_PROJECTION_PATH)
+        print(f"✅ Saved to {settings.OBJECT_PROJECTION_PATH}")
+
+    if args.migrate:
+        if points is None:
+            print("--migrate needs --from-collection (the stored raw vectors are re-projected).")
+            return
+        migrate(points, projection)
+        print("✅ Migrated. Set OBJECT_PROJECTION_ENABLED=true before restarting the API.")
+
+
+if __name__ == "__main__":
+    main()
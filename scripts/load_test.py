@@ -0,0 +1,257 @@
+"""
+Load test: simulated kiosks replaying realistic traffic against a running server.
+
+    # 8 kiosks for 60 s
+    python scripts/load_test.py --url http://localhost:8000 --kiosks 8 --duration 60
+
+    # Find the saturation point: 1, 2, 4 ... 64 kiosks, 30 s each
+    python scripts/load_test.py --ramp 1 2 4 8 16 32 64 --duration 30 --out load.json
+
+Each kiosk is one coroutine with its own X-Session-ID. It sends a camera frame
+to /recognize/person every --frame-interval seconds. Every --object-every
+frames it sends one to /find/object instead. Between frames, it asks a
+/chat/query question with probability --chat-prob, and rarely (--enroll-prob)
+enrolls a person. Think times are jittered (exponential around the
+configured mean), so kiosks don't march in lockstep.
+
+Reported per stage and per endpoint: requests, errors (HTTP >= 400, timeouts,
+connection errors), throughput, and p50/p95/p99 latency. A ramp stops at the
+saturation point: throughput gains under --saturation-gain, p95 above
+--slo-ms, or error rate above --max-error-rate.
+
+Images come from --images (a folder of .jpg/.png, e.g. enrolled photos) or are synthetic.
+"""
+import argparse
+import asyncio
+import io
+import json
+import random
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+QUESTIONS = [
+    "Who is this?", "Who is {name}?", "Where does he live?", "Tell me about her",
+    "Where are my keys?", "Show me photos of {name}", "What does she look like?",
+]
+NAMES = ["Asha", "Ravi", "Meera", "Arjun", "Kavya", "Rahul"]
+
+
+def synthetic_frame(seed: int, size: int = 480) -> bytes:
+    """A webcam-sized JPEG with a face-like oval; varied per seed so requests aren't byte-identical."""
+    from PIL import Image, ImageDraw
+    rng = random.Random(seed)
+    img = Image.new("RGB", (size, size), tuple(rng.randint(150, 230) for _ in range(3)))
+    draw = ImageDraw.Draw(img)
+    x, y = rng.randint(100, 180), rng.randint(60, 120)
+    draw.ellipse((x, y, x + 180, y + 240), fill=(224, 172, 105))
+    draw.ellipse((x + 45, y + 80, x + 75, y + 100), fill=(40, 30, 30))
+    draw.ellipse((x + 105, y + 80, x + 135, y + 100), fill=(40, 30, 30))
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=85)
+    return buffer.getvalue()
+
+
+def load_frames(folder: str, count: int = 16) -> list:
+    if folder:
+        paths = sorted(p for p in Path(folder).rglob("*") if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+        if not paths:
+            raise SystemExit(f"No images in {folder}")
+        return [p.read_bytes() for p in paths[:count]]
+    return [synthetic_frame(i) for i in range(count)]
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)  # endpoint -> ms (successful and failed requests)
+        self.errors = defaultdict(lambda: defaultdict(int))  # endpoint -> reason -> count
+
+    def add(self, endpoint: str, ms: float, error: str = None):
+        self.latencies[endpoint].append(ms)
+        if error:
+            self.errors[endpoint][error] += 1
+
+    @staticmethod
+    def _summary(latencies: list, errors: dict, seconds: float) -> dict:
+        lat = np.asarray(latencies) if latencies else np.zeros(1)
+        n = len(latencies)
+        failed = sum(errors.values())
+        return {
+            "requests": n,
+            "errors": failed,
+            "error_rate": round(failed / n, 4) if n else 0.0,
+            "throughput_per_s": round(n / seconds, 2),
+            "p50_ms": round(float(np.percentile(lat, 50)), 1),
+            "p95_ms": round(float(np.percentile(lat, 95)), 1),
+            "p99_ms": round(float(np.percentile(lat, 99)), 1),
+            "max_ms": round(float(lat.max()), 1),
+            "error_kinds": dict(errors),
+        }
+
+    def report(self, seconds: float) -> dict:
+        endpoints = {
+            name: self._summary(lat, self.errors[name], seconds)
+            for name, lat in sorted(self.latencies.items())
+        }
+        all_latencies = [ms for lat in self.latencies.values() for ms in lat]
+        all_errors = defaultdict(int)
+        for kinds in self.errors.values():
+            for kind, count in kinds.items():
+                all_errors[kind] += count
+        return {"total": self._summary(all_latencies, all_errors, seconds), "endpoints": endpoints}
+
+
+class Kiosk:
+    def __init__(self, index: int, client: httpx.AsyncClient, args, frames: list, stats: Stats):
+        self.index = index
+        self.client = client
+        self.args = args
+        self.frames = frames
+        self.stats = stats
+        self.session_id = f"loadtest-{index}-{uuid.uuid4().hex[:6]}"
+        self.rng = random.Random(args.seed + index)
+        self.frame_count = 0
+
+    def think(self, mean: float) -> float:
+        return self.rng.expovariate(1 / mean) if mean > 0 else 0.0
+
+    async def call(self, endpoint: str, method: str, path: str, **kwargs):
+        start = time.perf_counter()
+        error = None
+        try:
+            response = await self.client.request(
+                method, f"{self.args.prefix}{path}", headers={"X-Session-ID": self.session_id}, **kwargs
+            )
+            if response.status_code >= 400:
+                error = f"http_{response.status_code}"
+        except httpx.TimeoutException:
+            error = "timeout"
+        except httpx.TransportError as e:
+            error = type(e).__name__
+        self.stats.add(endpoint, (time.perf_counter() - start) * 1000, error)
+
+    def frame(self) -> tuple:
+        data = self.frames[(self.index + self.frame_count) % len(self.frames)]
+        return ("frame.jpg", data, "image/jpeg")
+
+    async def step(self):
+        self.frame_count += 1
+        if self.args.object_every and self.frame_count % self.args.object_every == 0:
+            await self.call("find_object", "POST", "/find/object", files={"file": self.frame()})
+        else:
+            await self.call("recognize_person", "POST", "/recognize/person", files={"file": self.frame()})
+
+        if self.rng.random() < self.args.chat_prob:
+            await asyncio.sleep(self.think(self.args.chat_think))
+            question = self.rng.choice(QUESTIONS).format(name=self.rng.choice(NAMES))
+            await self.call("chat_query", "POST", "/chat/query", json={"text": question})
+
+        if self.rng.random() < self.args.enroll_prob:
+            name = f"Load Test {self.rng.randint(0, 10_000)}"
+            await self.call(
+                "remember_person", "POST", "/remember/person",
+                data={"name": name, "relation": "Friend", "notes": "Created by the load test."},
+                files={"file": self.frame()},
+            )
+
+    async def run(self, deadline: float):
+        # Stagger start-up so the first second isn't one synchronized burst
+        await asyncio.sleep(self.rng.uniform(0, self.args.frame_interval))
+        while time.perf_counter() < deadline:
+            await self.step()
+            await asyncio.sleep(self.think(self.args.frame_interval))
+
+
+async def run_stage(args, kiosks: int, frames: list) -> dict:
+    stats = Stats()
+    limits = httpx.Limits(max_connections=kiosks * 2, max_keepalive_connections=kiosks * 2)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(Kiosk(i, client, args, frames, stats).run(deadline) for i in range(kiosks)))
+        elapsed = time.perf_counter() - started
+    return {"kiosks": kiosks, "seconds": round(elapsed, 1), **stats.report(elapsed)}
+
+
+def print_stage(stage: dict):
+    total = stage["total"]
+    print(f"\n=== {stage['kiosks']} kiosk(s), {stage['seconds']}s: {total['throughput_per_s']}/s, "
+          f"p95 {total['p95_ms']} ms, errors {total['error_rate']:.1%} ===")
+    print(f"{'endpoint':>18} {'req':>6} {'err%':>6} {'rps':>7} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for name, s in stage["endpoints"].items():
+        print(f"{name:>18} {s['requests']:>6} {s['error_rate']:>6.1%} {s['throughput_per_s']:>7} "
+              f"{s['p50_ms']:>8} {s['p95_ms']:>8} {s['p99_ms']:>8}")
+        if s["error_kinds"]:
+            print(f"{'':>18} {s['error_kinds']}")
+
+
+def saturation_reason(previous: dict, stage: dict, args):
+    """Why this stage counts as saturated (None if the server still scales)."""
+    total = stage["total"]
+    if total["error_rate"] > args.max_error_rate:
+        return f"error rate {total['error_rate']:.1%} > {args.max_error_rate:.1%}"
+    if args.slo_ms and total["p95_ms"] > args.slo_ms:
+        return f"p95 {total['p95_ms']} ms > SLO {args.slo_ms} ms"
+    if previous:
+        before, after = previous["total"]["throughput_per_s"], total["throughput_per_s"]
+        load_ratio = stage["kiosks"] / previous["kiosks"]
+        # Throughput should grow with the offered load; a much smaller gain means a bottleneck
+        if before and (after / before - 1) < args.saturation_gain * (load_ratio - 1):
+            return f"throughput {before}/s -> {after}/s for {load_ratio:.1f}x the kiosks"
+    return None
+
+
+async def main_async(args):
+    frames = load_frames(args.images)
+    stages = args.ramp or [args.kiosks]
+    results, saturation = [], None
+    for kiosks in stages:
+        stage = await run_stage(args, kiosks, frames)
+        print_stage(stage)
+        reason = saturation_reason(results[-1] if results else None, stage, args)
+        results.append(stage)
+        if reason and args.ramp:
+            saturation = {"kiosks": kiosks, "last_healthy_kiosks": results[-2]["kiosks"] if len(results) > 1 else None,
+                          "reason": reason}
+            print(f"\nSaturated at {kiosks} kiosks: {reason}")
+            break
+    if args.ramp and saturation is None:
+        print(f"\nNo saturation up to {stages[-1]} kiosks")
+
+    if args.out:
+        report = {"url": args.url, "config": {k: v for k, v in vars(args).items() if k != "out"},
+                  "stages": results, "saturation": saturation}
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.out}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulated kiosk traffic against a running server")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--prefix", default="/api/v1")
+    parser.add_argument("--kiosks", type=int, default=4, help="Concurrent kiosks (ignored with --ramp)")
+    parser.add_argument("--ramp", type=int, nargs="+", help="Kiosk counts to step through, e.g. 1 2 4 8 16")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per stage")
+    parser.add_argument("--frame-interval", type=float, default=1.0, help="Mean seconds between camera frames")
+    parser.add_argument("--object-every", type=int, default=5, help="Every Nth frame goes to /find/object (0 = never)")
+    parser.add_argument("--chat-prob", type=float, default=0.2, help="Chance of a question after a frame")
+    parser.add_argument("--chat-think", type=float, default=2.0, help="Mean seconds before asking")
+    parser.add_argument("--enroll-prob", type=float, default=0.005, help="Chance of an enrollment after a frame")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--images", help="Folder of fixture frames (default: synthetic)")
+    parser.add_argument("--slo-ms", type=float, default=1000.0, help="p95 above this counts as saturated (0 = off)")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--saturation-gain", type=float, default=0.5,
+                        help="Minimum fraction of the added load that must show up as added throughput")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Write all stages as JSON here")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Bring existing collections in line with the quantization / HNSW / on-disk
+Settings and measure what they cost.
+
+    # Show current config, memory per point (measured on disk where the
+    # storage is local, estimated from Settings otherwise) and recall
+    python scripts/migrate_collection_config.py --measure
+
+    # Apply QDRANT_QUANTIZATION, QDRANT_ON_DISK_VECTORS, QDRANT_HNSW_* to existing collections
+    QDRANT_QUANTIZATION=scalar QDRANT_ON_DISK_VECTORS=true python scripts/migrate_collection_config.py --apply
+
+Qdrant rebuilds quantized vectors / HNSW in the background after --apply;
+the collection keeps serving meanwhile.
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from qdrant_client.models import SearchParams, QuantizationSearchParams
+
+from app.core.config import settings
+from app.services.memory_service import memory_service
+from app.services.model_versions import VectorNames
+from app.services.vector_index import alias_target, collection_update_params, search_params
+
+COLLECTIONS = {**memory_service.COLLECTIONS, "text_knowledge": 384}
+
+
+def bytes_per_point(dim: int) -> dict:
+    """Estimated vector storage per point (excluding payload), split by RAM / disk."""
+    original = dim * 4
+    mode = settings.QDRANT_QUANTIZATION.lower()
+    quantized = {
+        "none": 0,
+        "scalar": dim,
+        "product": original // int(settings.QDRANT_PRODUCT_COMPRESSION.lstrip("x")),
+        "binary": dim // 8,
+    }[mode]
+    # Level-0 HNSW graph: 2*m links of 4 bytes each (upper levels are negligible)
+    graph = 2 * settings.QDRANT_HNSW_M * 4
+
+    ram = graph
+    disk = 0
+    if settings.QDRANT_ON_DISK_VECTORS:
+        disk += original
+    else:
+        ram += original
+    if quantized:
+        if settings.QDRANT_QUANTIZATION_ALWAYS_RAM:
+            ram += quantized
+        else:
+            disk += quantized
+    return {"ram": ram, "disk": disk}
+
+
+def storage_dir(client, name: str):
+    """On-disk directory of a collection in local / embedded mode (None for a server: not visible from here)."""
+    physical = alias_target(client, name) or name
+    if settings.QDRANT_MODE == "embedded":
+        return Path(settings.VECTOR_INDEX_PATH) / physical
+    if settings.QDRANT_MODE == "local":
+        return Path(settings.QDRANT_PATH) / "collection" / physical
+    return None
+
+
+def disk_usage(directory: Path) -> int:
+    """Bytes actually allocated under `directory` (preallocated, still sparse files don't count)."""
+    total = 0
+    for path in directory.rglob("*"):
+        if path.is_file():
+            st = path.stat()
+            total += st.st_blocks * 512 if hasattr(st, "st_blocks") else st.st_size
+    return total
+
+
+def measure_recall(name: str, samples: int, k: int, using: str = None):
+    client = memory_service.client
+    points, _ = client.scroll(collection_name=name, limit=samples, with_payload=False, with_vectors=[using] if using else True)
+    points = [p for p in points if p.vector]
+    if not points:
+        return None, None
+
+    exact = SearchParams(exact=True, quantization=QuantizationSearchParams(ignore=True))
+    configured = search_params()
+
+    hits = total = 0
+    latencies = []
+    for p in points:
+        query = p.vector[using] if using else p.vector
+        truth = client.query_points(collection_name=name, query=query, using=using, limit=k, search_params=exact).points
+        t0 = time.perf_counter()
+        res = client.query_points(collection_name=name, query=query, using=using, limit=k, search_params=configured).points
+        latencies.append((time.perf_counter() - t0) * 1000)
+        hits += len({x.id for x in truth} & {x.id for x in res})
+        total += len(truth)
+    return hits / max(total, 1), float(np.percentile(latencies, 50))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--apply", action="store_true", help="Update existing collections to current Settings")
+    parser.add_argument("--measure", action="store_true", help="Report memory per point and recall@k")
+    parser.add_argument("--samples", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    print(
+        f"Settings: quantization={settings.QDRANT_QUANTIZATION} on_disk={settings.QDRANT_ON_DISK_VECTORS} "
+        f"rescore={settings.QDRANT_RESCORE} oversampling={settings.QDRANT_OVERSAMPLING} "
+        f"m={settings.QDRANT_HNSW_M} ef_construct={settings.QDRANT_HNSW_EF_CONSTRUCT}"
+    )
+
+    client = memory_service.client
+    vectors = VectorNames(client)
+    for name, dim in COLLECTIONS.items():
+        try:
+            info = client.get_collection(name)
+        except Exception:
+            print(f"- {name}: missing, skipped")
+            continue
+
+        print(f"\n[{name}] {info.points_count} points, {dim}d")
+
+        if args.apply:
+            client.update_collection(collection_name=name, **collection_update_params(vectors.stored(name)))
+            print("  ✅ Updated collection config")
+
+        if args.measure:
+            est = bytes_per_point(dim)
+            print(f"  Estimated per point (from Settings, not measured): ~{est['ram']} B RAM, ~{est['disk']} B disk "
+                  f"(float32 baseline {dim * 4 + 2 * settings.QDRANT_HNSW_M * 4} B RAM)")
+            directory = storage_dir(client, name)
+            if directory is not None and directory.exists() and info.points_count:
+                used = disk_usage(directory)
+                print(f"  Measured on disk: {used} B total, {used // info.points_count} B per point "
+                      f"incl. payloads ({directory})")
+            recall, p50 = measure_recall(name, args.samples, args.k, vectors.using(name))
+            if recall is not None:
+                print(f"  Recall@{args.k} vs exact float32: {recall:.3f} (query p50 {p50:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,25 @@
 
 from app.services.memory_service import memory_service
 from app.services.semantic_memory import semantic_memory
-import time
+from app.core.config import settings
 
 def migrate():
+    """
+    One-off backfill of text_knowledge for people enrolled before automatic
+    indexing existed. New enrollments / edits are indexed by semantic_indexer.
+    """
     print("--- Migrating existing memories to Vector Space ---")
     
-    # 1. Fetch all faces
-    res = memory_service.client.scroll(
-        collection_name="faces",
-        limit=1000,
-        with_payload=True
-    )
-    points = res[0]
-    print(f"Found {len(points)} existing face records.")
+    # 1. Every person in faces + patients (paged, no size cap)
+    names = memory_service.person_names()
+    print(f"Found {len(names)} enrolled people.")
     
-    for p in points:
-        payload = p.payload
-        if not payload: continue
-        
-        name = payload.get("name")
-        if not name: continue
-        
-        print(f"Vectorizing {name}...")
-        semantic_memory.learn_person(payload)
+    # 2. Rebuild their facts in batches (one encode + upsert per batch)
+    batch = settings.SEMANTIC_INDEX_BATCH
+    for i in range(0, len(names), batch):
+        chunk = names[i:i + batch]
+        print(f"Vectorizing {', '.join(chunk)}...")
+        semantic_memory.reindex_people({name: memory_service.person_records(name) for name in chunk})
         
     print("--- Migration Complete ---")
 
@@ -0,0 +1,72 @@
+"""
+Re-embed collections after an embedding model change, without taking recognition down.
+
+    # Which generation serves each collection, and how many points another model embedded
+    python scripts/reembed_collections.py --status
+
+    # New FaceNet weights: run with the new version while the API keeps serving the old one
+    FACE_MODEL_VERSION=facenet512-keras-v2 python scripts/reembed_collections.py faces patients
+
+    # Once every worker runs the new version, free the old generation
+    FACE_MODEL_VERSION=facenet512-keras-v2 python scripts/reembed_collections.py faces patients --drop-previous
+
+Each collection is rebuilt as a new generation from the stored source images /
+clips / texts and the alias is switched once it is complete (see
+app/services/reembedding.py). Running the API with the new version triggers
+the same thing as a background job: POST /api/v1/admin/reembed/{collection}.
+
+QDRANT_MODE=embedded keeps its files in this process only: stop the API first,
+or use the admin endpoint instead.
+"""
+import argparse
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.reembedding import COLLECTIONS, embedding_status, reembed
+
+
+def print_status():
+    print(f"{'collection':>15} {'generation':>45} {'version':>34} {'points':>7} {'stale':>6}")
+    for name in COLLECTIONS:
+        try:
+            s = embedding_status(name)
+        except Exception as e:
+            print(f"{name:>15} unavailable: {e}")
+            continue
+        flag = "" if s["current"] else "  <- no vectors for this version"
+        print(f"{name:>15} {s['generation']:>45} {s['model_version']:>34} {s['points']:>7} {s['stale_points']:>6}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-embed collections with the configured model versions")
+    parser.add_argument("collections", nargs="*", metavar="collection", help=f"Any of: {', '.join(COLLECTIONS)}")
+    parser.add_argument("--status", action="store_true", help="Show generations and stale points, change nothing")
+    parser.add_argument("--drop-previous", action="store_true", help="Delete the old generation after switching")
+    parser.add_argument("--allow-missing", action="store_true",
+                        help="Switch even if some points have no source left (they are dropped)")
+    args = parser.parse_args()
+    unknown = set(args.collections) - set(COLLECTIONS)
+    if unknown:
+        parser.error(f"Unknown collection(s): {', '.join(sorted(unknown))}")
+
+    if args.status or not args.collections:
+        print_status()
+        return
+
+    for name in args.collections:
+        print(f"\n🔁 Re-embedding {name}...")
+        result = reembed(
+            name, drop_previous=args.drop_previous, allow_missing=args.allow_missing,
+            progress=lambda fraction, message=None: print(f"   {fraction:6.1%} {message or ''}", flush=True),
+        )
+        print(f"   ✅ {result['from']} -> {result['to']}: {result['reembedded']} re-embedded, "
+              f"{result['payloads_synced']} payloads synced, {result['deleted']} deleted, {result['missing']} missing")
+        if result["missing_ids"]:
+            print(f"   ! Not re-embedded: {', '.join(result['missing_ids'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ from app.services.memory_service import memory_service
 def reset_objects():
     print("🗑️ Deleting 'objects' collection...")
     try:
-        memory_service.client.delete_collection("objects")
+        memory_service.drop_collection("objects")
         print("✅ Deleted.")
     except Exception as e:
         print(f"⚠️ Error deleting: {e}")
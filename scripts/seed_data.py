@@ -57,7 +57,7 @@ def seed_data():
     
     # 0. RESET COLLECTIONS
     try:
-        memory_service.client.delete_collection("faces")
+        memory_service.drop_collection("faces")
         print("🗑️ Deleted old 'faces' collection (Clean Slate).")
     except Exception as e:
         print(f"⚠️ Could not delete faces collection (might not exist): {e}")
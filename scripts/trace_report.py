@@ -0,0 +1,107 @@
+"""
+Offline view of the slowest requests in a span file (TRACING_EXPORTER=file).
+
+    python scripts/trace_report.py traces.jsonl                 # 10 slowest traces
+    python scripts/trace_report.py traces.jsonl --route "POST /api/v1/chat/query" --top 5
+    python scripts/trace_report.py traces.jsonl --percentile 99 # only traces at/above p99
+
+Each trace is printed as a span tree with durations and the attributes the
+services attach (collection, limit, points returned, prompt chars...), e.g.
+
+    812.4 ms  POST /api/v1/chat/query
+      790.1 ms  chat.retrieve
+        402.7 ms  memory.search_by_text  points.scanned=1500 matches=1
+          131.2 ms  qdrant.scroll  collection=faces limit=500 points.returned=500
+"""
+import argparse
+import json
+from collections import defaultdict
+from datetime import datetime
+
+SKIP_ATTRIBUTES = {"service", "http.method", "http.route"}
+
+
+def _ms(span: dict) -> float:
+    start = datetime.fromisoformat(span["start_time"].replace("Z", "+00:00"))
+    end = datetime.fromisoformat(span["end_time"].replace("Z", "+00:00"))
+    return (end - start).total_seconds() * 1000
+
+
+def load_traces(path: str) -> dict:
+    """trace_id -> list of spans (with a computed `ms`)."""
+    traces = defaultdict(list)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            span = json.loads(line)
+            span["ms"] = _ms(span)
+            traces[span["context"]["trace_id"]].append(span)
+    return traces
+
+
+def root_of(spans: list):
+    ids = {s["context"]["span_id"] for s in spans}
+    roots = [s for s in spans if not s.get("parent_id") or s["parent_id"] not in ids]
+    return max(roots, key=lambda s: s["ms"]) if roots else None
+
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    if not values:
+        return 0.0
+    k = (len(values) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def print_tree(spans: list):
+    children = defaultdict(list)
+    for s in spans:
+        children[s.get("parent_id")].append(s)
+    for siblings in children.values():
+        siblings.sort(key=lambda s: s["start_time"])
+
+    def walk(span, depth):
+        attrs = " ".join(
+            f"{k}={v}" for k, v in (span.get("attributes") or {}).items() if k not in SKIP_ATTRIBUTES
+        )
+        print(f"{'  ' * depth}{span['ms']:8.1f} ms  {span['name']}  {attrs}".rstrip())
+        for child in children.get(span["context"]["span_id"], []):
+            walk(child, depth + 1)
+
+    walk(root_of(spans), 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Slowest traces from a JSONL span file")
+    parser.add_argument("path", nargs="?", default="traces.jsonl")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--route", help='Root span name, e.g. "POST /api/v1/chat/query"')
+    parser.add_argument("--percentile", type=float, help="Only traces at or above this latency percentile")
+    args = parser.parse_args()
+
+    traces = [spans for spans in load_traces(args.path).values() if root_of(spans)]
+    if args.route:
+        traces = [spans for spans in traces if root_of(spans)["name"] == args.route]
+    if not traces:
+        print("No traces found.")
+        return
+
+    durations = [root_of(spans)["ms"] for spans in traces]
+    print(f"{len(traces)} traces: p50 {percentile(durations, 50):.1f} ms, "
+          f"p95 {percentile(durations, 95):.1f} ms, p99 {percentile(durations, 99):.1f} ms\n")
+    if args.percentile is not None:
+        cutoff = percentile(durations, args.percentile)
+        traces = [spans for spans in traces if root_of(spans)["ms"] >= cutoff]
+
+    traces.sort(key=lambda spans: root_of(spans)["ms"], reverse=True)
+    for spans in traces[:args.top]:
+        print(f"trace {spans[0]['context']['trace_id']}")
+        print_tree(spans)
+        print()
+
+
+if __name__ == "__main__":
+    main()
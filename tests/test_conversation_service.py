@@ -0,0 +1,43 @@
+import sys
+import os
+import time
+
+sys.path.insert(0, os.getcwd())
+
+from app.services.conversation_service import ConversationService, InMemoryContextStore
+
+
+def test_sessions_are_isolated():
+    service = ConversationService(store=InMemoryContextStore(ttl=60, max_sessions=10))
+    service.update_context({"name": "Meera", "image_base64": "x" * 1000}, "kiosk-1")
+    service.update_context({"name": "Ravi"}, "kiosk-2")
+
+    assert service.get_context("kiosk-1") == {"name": "Meera"}  # media blobs not kept
+    assert service.get_context("kiosk-2")["name"] == "Ravi"
+    assert service.get_context("kiosk-3") == {}
+
+    service.clear_context("kiosk-1")
+    assert service.get_context("kiosk-1") == {}
+    assert service.get_context("kiosk-2")["name"] == "Ravi"
+
+
+def test_ttl_and_session_cap():
+    store = InMemoryContextStore(ttl=0.1, max_sessions=2)
+    service = ConversationService(store=store)
+    service.update_context({"name": "A"}, "s1")
+    service.update_context({"name": "B"}, "s2")
+    service.get_context("s1")  # s1 is now the most recently used
+    service.update_context({"name": "C"}, "s3")
+
+    assert service.get_context("s2") == {}  # least recently used evicted
+    assert service.active_sessions() == 2
+
+    time.sleep(0.15)
+    assert service.get_context("s1") == {}
+    assert service.active_sessions() == 0
+
+
+if __name__ == "__main__":
+    test_sessions_are_isolated()
+    test_ttl_and_session_cap()
+    print("✅ Conversation service tests passed")
@@ -0,0 +1,61 @@
+import sys
+import os
+
+sys.path.insert(0, os.getcwd())
+
+from app.services.fusion_service import FusionRecognizer, Calibration
+
+MEERA = {"person_id": "Meera", "name": "Meera", "relation": "Daughter"}
+RAVI = {"person_id": "Ravi", "name": "Ravi", "relation": "Son"}
+
+
+class FakeModality:
+    def __init__(self, name, results, midpoint=0.4):
+        self.name = name
+        self.results = results
+        self.calls = 0
+        self.calibration = Calibration(15.0, midpoint)
+
+    def candidates(self, path, limit):
+        self.calls += 1
+        return self.results
+
+
+def test_decisive_face_skips_voice():
+    face = FakeModality("face", [(MEERA, 0.85), (RAVI, 0.3)])
+    voice = FakeModality("voice", [(RAVI, 0.9)])
+    result = FusionRecognizer({"face": face, "voice": voice}).recognize({"face": "f.jpg", "voice": "v.wav"})
+
+    assert result["status"] == "identified"
+    assert result["person"]["name"] == "Meera"
+    assert result["skipped"] == ["voice"] and voice.calls == 0
+
+
+def test_weak_modalities_combine():
+    # Neither modality is confident alone; together (plus context) they are
+    face = FakeModality("face", [(MEERA, 0.45), (RAVI, 0.3)])
+    voice = FakeModality("voice", [(MEERA, 0.45), (RAVI, 0.2)])
+    recognizer = FusionRecognizer({"face": face, "voice": voice})
+
+    face_only = recognizer.recognize({"face": "f.jpg"})
+    assert face_only["status"] == "uncertain"
+
+    fused = recognizer.recognize({"face": "f.jpg", "voice": "v.wav"}, context=MEERA)
+    assert fused["status"] == "identified"
+    assert fused["person"]["id"] == "Meera" and fused["person"]["from_context"]
+    assert voice.calls == 1
+
+
+def test_no_face_falls_through_to_voice():
+    face = FakeModality("face", None)  # No face in frame
+    voice = FakeModality("voice", [(RAVI, 0.8)])
+    result = FusionRecognizer({"face": face, "voice": voice}).recognize({"face": "f.jpg", "voice": "v.wav"})
+    assert result["status"] == "identified" and result["person"]["name"] == "Ravi"
+    assert result["modalities"]["face"]["signal"] is False
+
+
+if __name__ == "__main__":
+    test_decisive_face_skips_voice()
+    test_weak_modalities_combine()
+    test_no_face_falls_through_to_voice()
+    print("✅ Fusion tests passed")
@@ -0,0 +1,94 @@
+import sys
+import os
+import asyncio
+import threading
+import time
+
+import httpx
+
+sys.path.insert(0, os.getcwd())
+
+from app.core.config import settings
+from app.core.http_client import CircuitBreaker, HTTPClient
+
+
+def mock_client(handler):
+    """An HTTPClient answering from `handler` instead of the network."""
+    client = HTTPClient()
+    client.client = lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+def test_only_idempotent_requests_are_retried():
+    calls = []
+
+    def handler(request):
+        calls.append(request.method)
+        return httpx.Response(503)
+
+    client = mock_client(handler)
+
+    async def run():
+        assert (await client.request("GET", "https://api.test/a")).status_code == 503
+        assert (await client.request("POST", "https://api.test/avatars")).status_code == 503
+        await client.request("POST", "https://api.test/completions", idempotent=True)
+
+    backoff, settings.HTTP_BACKOFF = settings.HTTP_BACKOFF, 0.001
+    try:
+        asyncio.run(run())
+    finally:
+        settings.HTTP_BACKOFF = backoff
+    retries = settings.HTTP_RETRIES
+    assert calls == ["GET"] * (retries + 1) + ["POST"] + ["POST"] * (retries + 1)
+
+
+def test_half_open_circuit_lets_a_single_trial_through():
+    breaker = CircuitBreaker(threshold=1, reset_after=0.05)
+    breaker.record_failure()
+    assert not breaker.allow()
+    time.sleep(0.06)
+
+    admitted = []
+    threads = [threading.Thread(target=lambda: admitted.append(breaker.allow())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert admitted.count(True) == 1
+
+    breaker.record_success()
+    assert breaker.allow() and breaker.allow()
+
+
+def test_aclose_closes_every_loops_client():
+    client = HTTPClient()
+    other = asyncio.new_event_loop()
+    ready = threading.Event()
+
+    async def serve():
+        client.client()
+        ready.set()
+        while client._clients:
+            await asyncio.sleep(0.01)
+
+    thread = threading.Thread(target=other.run_until_complete, args=(serve(),))
+    thread.start()
+    ready.wait(timeout=5)
+
+    async def shutdown():
+        mine = client.client()
+        theirs = next(c for loop, c in client._clients.values() if loop is other)
+        await client.aclose()
+        return mine, theirs
+
+    mine, theirs = asyncio.run(shutdown())
+    thread.join(timeout=5)
+    other.close()
+    assert mine.is_closed and theirs.is_closed and not client._clients
+
+
+if __name__ == "__main__":
+    test_only_idempotent_requests_are_retried()
+    test_half_open_circuit_lets_a_single_trial_through()
+    test_aclose_closes_every_loops_client()
+    print("✅ HTTP client tests passed")
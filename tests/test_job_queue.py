@@ -0,0 +1,174 @@
+import sys
+import os
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.getcwd())
+
+from app.services.job_queue import JobQueue
+
+
+def _wait(queue, job_id, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.05)
+    return queue.get(job_id)
+
+
+def test_jobs_run_in_background_with_progress():
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(path=os.path.join(tmp, "jobs.sqlite3"), workers=2)
+
+        @queue.handler("add")
+        async def add(job):
+            job.progress(0.5, "halfway")
+            return {"sum": job.payload["a"] + job.payload["b"]}
+
+        queue.start()
+        job_id = queue.enqueue("add", {"a": 2, "b": 3})
+        job = _wait(queue, job_id)
+        queue.stop()
+
+        assert job["status"] == "done"
+        assert job["result"] == {"sum": 5}
+        assert job["progress"] == 1.0
+
+
+def test_queue_file_is_created_on_first_use():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "jobs.sqlite3")
+        queue = JobQueue(path=path, workers=1)  # As at import, for the module-level queue
+        assert not os.path.exists(path)
+        queue.enqueue("noop", {})
+        assert os.path.exists(path) and queue.depth() == 1
+
+
+def test_failed_jobs_retry_then_fail():
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(path=os.path.join(tmp, "jobs.sqlite3"), workers=1)
+        queue.retry_delay = 0.2
+        runs = []
+
+        @queue.handler("boom")
+        def boom(job):
+            runs.append(time.time())
+            raise RuntimeError("upstream down")
+
+        queue.start()
+        job = _wait(queue, queue.enqueue("boom", {}))
+        queue.stop()
+
+        assert job["status"] == "failed"
+        assert job["attempts"] == 3
+        assert "upstream down" in job["error"]
+        # Backed off 0.2s, then 0.4s
+        assert runs[1] - runs[0] >= 0.2 and runs[2] - runs[1] >= 0.4
+
+
+def test_starting_process_leaves_live_jobs_alone():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "jobs.sqlite3")
+        runs = []
+
+        def slow(job):
+            runs.append(job.queue.worker_id)
+            time.sleep(1.0)
+
+        first, second = JobQueue(path=path, workers=1), JobQueue(path=path, workers=1)
+        for queue in (first, second):
+            queue.lease = 0.3  # Renewed every 0.1s while the job runs
+            queue.handler("slow")(slow)
+
+        first.start()
+        job_id = first.enqueue("slow", {})
+        time.sleep(0.2)
+        second.start()  # e.g. a recycled gunicorn worker
+        job = _wait(first, job_id)
+        first.stop()
+        second.stop()
+
+        assert job["status"] == "done" and job["attempts"] == 1
+        assert runs == [first.worker_id]
+
+
+def test_jobs_of_a_dead_worker_are_recovered_after_the_lease():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "jobs.sqlite3")
+        dead = JobQueue(path=path, workers=1)
+        dead.lease = 0.2
+        job_id = dead.enqueue("work", {})
+        assert dead._claim().id == job_id  # Claimed, then the process died: no heartbeat
+
+        alive = JobQueue(path=path, workers=1)
+        alive.handler("work")(lambda job: job.queue.worker_id)
+        alive.start()
+        assert alive.get(job_id)["status"] == "running"  # Lease still valid
+        job = _wait(alive, job_id)
+        alive.stop()
+
+        assert job["status"] == "done" and job["attempts"] == 2
+        assert job["result"] == alive.worker_id == job["worker"]
+
+
+def test_hung_job_is_taken_over_after_its_timeout():
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(path=os.path.join(tmp, "jobs.sqlite3"), workers=2)
+        queue.lease = 0.3
+        release = threading.Event()
+
+        @queue.handler("stuck", timeout=0.2)
+        def stuck(job):
+            if job.attempts == 1:
+                release.wait(timeout=5)  # Hangs; the heartbeat would otherwise renew it forever
+            return job.attempts
+
+        queue.start()
+        job_id = queue.enqueue("stuck", {})
+        job = _wait(queue, job_id)
+        release.set()
+        time.sleep(0.2)
+        queue.stop()
+
+        assert job["status"] == "done" and job["result"] == 2
+        assert queue.get(job_id)["result"] == 2  # The hung attempt's late outcome was discarded
+
+
+def test_preloaded_queue_is_per_worker_process():
+    with tempfile.TemporaryDirectory() as tmp:
+        # Built and used in the gunicorn master (GUNICORN_PRELOAD=1), then forked
+        master = JobQueue(path=os.path.join(tmp, "jobs.sqlite3"), workers=1)
+        master.handler("whoami")(lambda job: job.queue.worker_id)
+        job_id = master.enqueue("whoami", {})
+        master_id, master_conn = master.worker_id, master._conn
+
+        read, write = os.pipe()
+        pid = os.fork()
+        if pid == 0:  # The worker
+            try:
+                ok = master.worker_id != master_id
+                master.start()
+                job = _wait(master, job_id)
+                master.stop()
+                ok = ok and master._conn is not master_conn and job["result"] == job["worker"] == master.worker_id
+                os.write(write, b"1" if ok and job["status"] == "done" else b"0")
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        assert os.read(read, 1) == b"1"
+        job = master.get(job_id)
+        assert job["status"] == "done" and job["worker"] != master_id and master._conn is master_conn
+
+
+if __name__ == "__main__":
+    test_jobs_run_in_background_with_progress()
+    test_queue_file_is_created_on_first_use()
+    test_failed_jobs_retry_then_fail()
+    test_starting_process_leaves_live_jobs_alone()
+    test_jobs_of_a_dead_worker_are_recovered_after_the_lease()
+    test_hung_job_is_taken_over_after_its_timeout()
+    test_preloaded_queue_is_per_worker_process()
+    print("✅ Job queue tests passed")
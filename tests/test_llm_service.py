@@ -0,0 +1,93 @@
+import sys
+import os
+import asyncio
+
+sys.path.insert(0, os.getcwd())
+
+from app.services.llm_backends import StubBackend
+from app.services.llm_service import LLMService
+
+
+class CountingStub(StubBackend):
+    def __init__(self):
+        self.calls = 0
+
+    async def complete(self, messages, max_tokens=100, temperature=0.7):
+        self.calls += 1
+        return await super().complete(messages, max_tokens, temperature)
+
+
+def fake_embedder(text):
+    # Bag of letters: rephrasings with the same words land close together
+    vec = [0.0] * 26
+    for ch in text.lower():
+        if "a" <= ch <= "z":
+            vec[ord(ch) - ord("a")] += 1
+    return vec
+
+
+async def collect(chunks):
+    return "".join([c async for c in chunks])
+
+
+CONTEXT = {"name": "Swarnanjali", "relation": "College Friend", "notes": "Your closest friend."}
+
+
+def test_stub_backend_is_deterministic():
+    service = LLMService(backend=StubBackend(), embedder=fake_embedder)
+    text = asyncio.run(service.generate_response("Who is she?", CONTEXT))
+    assert text == "That is Swarnanjali, your College Friend. Your closest friend."
+
+
+def test_repeat_questions_served_from_cache():
+    backend = CountingStub()
+    service = LLMService(backend=backend, embedder=fake_embedder)
+
+    asyncio.run(service.generate_response("Who is she?", CONTEXT))
+    asyncio.run(service.generate_response("who is she", CONTEXT))  # exact cache (normalized)
+    asyncio.run(service.generate_response("Who's she?", CONTEXT))  # semantic cache (rephrased)
+    assert backend.calls == 1
+
+    # Different person -> no cross-talk
+    asyncio.run(service.generate_response("Who is she?", {**CONTEXT, "name": "Meera"}))
+    assert backend.calls == 2
+
+    # Streaming reuses the cached answer too
+    assert asyncio.run(collect(service.stream_response("Who is she?", CONTEXT))).startswith("That is Swarnanjali")
+    assert backend.calls == 2
+
+
+def test_changed_context_is_not_answered_from_cache():
+    backend = CountingStub()
+    service = LLMService(backend=backend, embedder=fake_embedder)
+    service.semantic_cache = None
+    keys = {"name": "Keys", "notes": "Blue keyring.", "location": "Last seen at 09:10 AM"}
+
+    asyncio.run(service.generate_response("Where are my keys?", keys))
+    asyncio.run(service.generate_response("Where are my keys?", {**keys, "location": "Last seen at 11:45 AM"}))
+    asyncio.run(service.generate_response("Where are my keys?", {**keys, "location": "Last seen at 11:45 AM"}))
+    asyncio.run(service.generate_response("Where are my keys?", {**keys, "has_image": True}))
+    assert backend.calls == 3
+
+
+def test_rephrasing_after_an_edit_misses_the_semantic_cache():
+    backend = CountingStub()
+    # Two workers: each has its own caches, the edit is seen through the context they both read
+    workers = [LLMService(backend=backend, embedder=fake_embedder) for _ in range(2)]
+    for service in workers:
+        asyncio.run(service.generate_response("Who is she?", CONTEXT))
+    assert backend.calls == 2
+
+    edited = {**CONTEXT, "notes": "Moved to Pune last year."}
+    for service in workers:
+        text = asyncio.run(service.generate_response("Who's she?", edited))
+        assert "Pune" in text
+    assert backend.calls == 4
+
+
+if __name__ == "__main__":
+    test_stub_backend_is_deterministic()
+    test_repeat_questions_served_from_cache()
+    test_changed_context_is_not_answered_from_cache()
+    test_rephrasing_after_an_edit_misses_the_semantic_cache()
+    print("✅ LLM service tests passed")
@@ -0,0 +1,97 @@
+import sys
+import os
+import io
+import json
+import logging
+import tempfile
+import time
+
+sys.path.insert(0, os.getcwd())
+
+from app.core.logging import JsonFormatter, log_sampled, request_id_var, _QueueHandler
+from app.services.job_queue import JobQueue
+
+
+def _capture(logger_name: str):
+    """Logger writing JSON lines into a buffer through the same queue-handler preparation."""
+    stream = io.StringIO()
+    target = logging.StreamHandler(stream)
+    target.setFormatter(JsonFormatter())
+
+    class Direct(_QueueHandler):
+        def enqueue(self, record):
+            target.handle(record)
+
+    logger = logging.getLogger(logger_name)
+    logger.handlers = [Direct(None)]
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    return logger, stream
+
+
+def _lines(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_json_lines_carry_request_id_and_extra_fields():
+    logger, stream = _capture("test.logging.json")
+    token = request_id_var.set("req-123")
+    try:
+        logger.info("Indexed %d facts", 3, extra={"person": "Asha"})
+    finally:
+        request_id_var.reset(token)
+    logger.info("outside a request")
+
+    first, second = _lines(stream)
+    assert first["msg"] == "Indexed 3 facts"
+    assert first["request_id"] == "req-123"
+    assert first["person"] == "Asha"
+    assert "request_id" not in second
+
+
+def test_sampling_keeps_one_in_n_per_call_site():
+    logger, stream = _capture("test.logging.sampled")
+    for i in range(100):
+        log_sampled(logger, logging.DEBUG, "query %d", i, rate=0.1)
+        log_sampled(logger, logging.DEBUG, "other %d", i, rate=1.0)
+
+    lines = _lines(stream)
+    sampled = [l for l in lines if l["msg"].startswith("query")]
+    assert len(sampled) == 10
+    assert sampled[0]["sample_every"] == 10
+    assert len(lines) - len(sampled) == 100
+
+    logger.setLevel(logging.INFO)
+    log_sampled(logger, logging.DEBUG, "query %d", 0, rate=1.0)  # Disabled level: nothing written
+    assert len(_lines(stream)) == 110
+
+
+def test_jobs_run_under_the_enqueuing_request_id():
+    seen = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(path=os.path.join(tmp, "jobs.sqlite3"), workers=1)
+
+        @queue.handler("probe")
+        def probe(job):
+            seen["request_id"] = request_id_var.get()
+
+        token = request_id_var.set("req-job")
+        try:
+            job_id = queue.enqueue("probe", {})
+        finally:
+            request_id_var.reset(token)
+        queue.start()
+        deadline = time.time() + 5
+        while queue.get(job_id)["status"] != "done" and time.time() < deadline:
+            time.sleep(0.05)
+        queue.stop()
+
+        assert queue.get(job_id)["request_id"] == "req-job"
+    assert seen["request_id"] == "req-job"
+
+
+if __name__ == "__main__":
+    test_json_lines_carry_request_id_and_extra_fields()
+    test_sampling_keeps_one_in_n_per_call_site()
+    test_jobs_run_under_the_enqueuing_request_id()
+    print("✅ Logging tests passed")
@@ -0,0 +1,91 @@
+import sys
+import os
+import asyncio
+import subprocess
+
+sys.path.insert(0, os.getcwd())
+
+from prometheus_client import REGISTRY
+from app.core.metrics import timed, record_cache, render, InstrumentedVectorClient
+
+
+def observations(stage):
+    return REGISTRY.get_sample_value("masthishq_stage_seconds_count", {"stage": stage})
+
+
+def test_timed_sync_async_and_generators():
+    @timed("test.sync")
+    def sync_fn():
+        return 1
+
+    @timed("test.async")
+    async def async_fn():
+        return 2
+
+    @timed("test.agen")
+    async def agen_fn():
+        yield 3
+
+    async def consume():
+        return [x async for x in agen_fn()]
+
+    assert sync_fn() == 1
+    assert asyncio.run(async_fn()) == 2
+    assert asyncio.run(consume()) == [3]
+    with timed("test.block"):
+        pass
+
+    for stage in ("test.sync", "test.async", "test.agen", "test.block"):
+        assert observations(stage) == 1
+
+
+def test_vector_client_calls_are_timed():
+    class FakeClient:
+        def query_points(self, **kwargs):
+            return "points"
+        collection_name = "faces"
+
+    before = observations("qdrant.query_points") or 0
+    client = InstrumentedVectorClient(FakeClient())
+    assert client.query_points(collection_name="faces") == "points"
+    assert client.collection_name == "faces"
+    assert observations("qdrant.query_points") == before + 1
+
+
+def test_cache_counters_rendered():
+    record_cache("test_cache", True)
+    record_cache("test_cache", False)
+    body, content_type = render()
+    assert b'masthishq_cache_requests_total{cache="test_cache",result="hit"} 1.0' in body
+    assert content_type.startswith("text/plain")
+
+
+def test_metrics_and_spans_are_noops_without_the_optional_packages():
+    script = """
+import sys
+sys.modules["prometheus_client"] = sys.modules["opentelemetry"] = None  # Not installed
+from app.core.metrics import timed, record_cache, render
+from app.core.tracing import span, traced, inject_headers
+
+@traced("test.fn")
+@timed("test.fn")
+def fn():
+    with span("test.inner") as current:
+        current.set_attribute("k", 1)
+    return 1
+
+record_cache("test_cache", True)
+assert fn() == 1 and inject_headers({}) == {}
+print(render()[0].decode())
+"""
+    out = subprocess.run([sys.executable, "-c", script], cwd=os.getcwd(), capture_output=True, text=True)
+    assert out.returncode == 0, out.stderr
+    assert "prometheus_client is not installed" in out.stdout
+
+
+if __name__ == "__main__":
+    test_timed_sync_async_and_generators()
+    test_vector_client_calls_are_timed()
+    test_cache_counters_rendered()
+    test_metrics_and_spans_are_noops_without_the_optional_packages()
+    print("✅ Metrics tests passed")
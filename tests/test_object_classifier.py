@@ -0,0 +1,105 @@
+import sys
+import os
+
+import numpy as np
+import pytest
+from qdrant_client.models import Filter, FieldCondition, MatchValue
+
+sys.path.insert(0, os.getcwd())
+
+from app.core.config import settings
+from app.services import vector_index
+from app.services.embedding_projection import object_vector_size
+
+DIM = object_vector_size()
+
+
+@pytest.fixture
+def memory(monkeypatch, tmp_path):
+    """A fresh MemoryService on its own embedded index (no Qdrant server); settings restored afterwards."""
+    monkeypatch.setattr(settings, "QDRANT_MODE", "embedded")
+    monkeypatch.setattr(settings, "VECTOR_INDEX_PATH", str(tmp_path))
+    monkeypatch.setattr(vector_index, "_client", None)
+    # Imported here: importing builds the module-level memory_service, which must not reach for a server
+    from app.services.memory_service import MemoryService
+    return MemoryService()
+
+
+@pytest.fixture
+def gallery(memory):
+    """Three well-separated categories of six views each, in this test's own store."""
+    rng = np.random.default_rng(0)
+    centers = {name: rng.normal(size=DIM) for name in ["cup", "keys", "wallet"]}
+    for name, center in centers.items():
+        for _ in range(6):
+            vec = center + 0.2 * rng.normal(size=DIM)
+            memory.store_object_memory(object_id=name, embedding=vec.tolist(), metadata={"name": name})
+    return centers
+
+
+def test_knn_vote_picks_category_and_exits_early(memory, gallery):
+    from app.services.object_classifier import ObjectKNNClassifier
+    classifier = ObjectKNNClassifier(memory)
+
+    result = classifier.classify(gallery["keys"].tolist())
+    assert result["name"] == "keys"
+    assert result["share"] > 0.9
+    # Clear winner: decided by the first probe
+    assert result["searched"] == settings.OBJECT_KNN_INITIAL_K
+    assert classifier.category_stats() == {"cup": 6, "keys": 6, "wallet": 6}
+
+
+def test_resighting_below_match_threshold_dedups_instead_of_inserting(memory):
+    rng = np.random.default_rng(1)
+    view = rng.normal(size=DIM)
+    memory.store_object_memory(object_id="auto", embedding=view.tolist(),
+                               metadata={"name": "umbrella", "source": "auto", "seen_count": 1})
+    # Same umbrella, different angle: cosine 0.55, too far to be identified but the same object
+    other = rng.normal(size=DIM)
+    other -= other @ view / (view @ view) * view
+    angle = 0.55 * view / np.linalg.norm(view) + np.sqrt(1 - 0.55 ** 2) * other / np.linalg.norm(other)
+    (best,) = memory.search_object(angle.tolist())
+    assert memory.client.count("objects").count == 1  # Nothing left over from other tests
+    assert best.score <= settings.OBJECT_MATCH_THRESHOLD
+
+    existing = memory.find_similar_object(angle.tolist(), "umbrella")
+    assert existing.score >= min(settings.OBJECT_DEDUP_THRESHOLD, settings.OBJECT_MATCH_THRESHOLD)
+    memory.mark_object_seen(existing, {"location": "hall"})
+    (point,) = memory.client.retrieve("objects", ids=[existing.id], with_payload=True)
+    assert point.payload["seen_count"] == 2 and point.payload["location"] == "hall"
+
+
+def test_cap_evicts_least_recently_seen_not_recently_identified(memory):
+    rng = np.random.default_rng(2)
+    for day in range(1, 6):
+        memory.store_object_memory(object_id="auto", embedding=rng.normal(size=DIM).tolist(), metadata={
+            "name": "glasses", "source": "auto", "last_seen": f"2026-01-0{day}T10:00:00",
+        })
+    points, _ = memory.client.scroll("objects", scroll_filter=Filter(must=[
+        FieldCondition(key="name", match=MatchValue(value="glasses"))]), limit=10, with_payload=True)
+    oldest = min(points, key=lambda p: p.payload["last_seen"])
+    memory.mark_object_seen(oldest)  # identified just now
+
+    assert memory.enforce_object_cap("glasses", 3) == 2
+    points, _ = memory.client.scroll("objects", scroll_filter=Filter(must=[
+        FieldCondition(key="name", match=MatchValue(value="glasses"))]), limit=10, with_payload=True)
+    assert oldest.id in {p.id for p in points}
+    assert sorted(p.payload["last_seen"][:10] for p in points)[:2] == ["2026-01-04", "2026-01-05"]
+
+
+def test_sightings_are_written_at_most_every_update_interval(memory):
+    rng = np.random.default_rng(3)
+    memory.store_object_memory(object_id="auto", embedding=rng.normal(size=DIM).tolist(), metadata={
+        "name": "remote", "source": "auto", "seen_count": 1,
+    })
+    point = memory.find_similar_object(rng.normal(size=DIM).tolist(), "remote")
+    assert memory.mark_object_seen(point)  # No last_seen yet
+
+    (point,) = memory.client.retrieve("objects", ids=[point.id], with_payload=True)
+    assert not memory.mark_object_seen(point)  # Seen a moment ago: skipped
+    (again,) = memory.client.retrieve("objects", ids=[point.id], with_payload=True)
+    assert again.payload == point.payload and again.payload["seen_count"] == 2
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
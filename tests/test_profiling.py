@@ -0,0 +1,102 @@
+import sys
+import os
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.getcwd())
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.profiling import profiling_middleware, profile_store
+from app.api import admin_endpoint
+
+
+retained = []
+
+
+def busy_work():
+    deadline = time.perf_counter() + 0.1
+    blocks = []
+    while time.perf_counter() < deadline:
+        blocks.append(bytearray(1024))
+    retained.append(bytearray(256 * 1024))  # Outlives the request, like a cache fill
+    return len(blocks)
+
+
+def _client():
+    app = FastAPI()
+    app.middleware("http")(profiling_middleware)
+    app.include_router(admin_endpoint.router, prefix="/api/v1")
+
+    @app.get("/work")
+    def work():
+        return {"blocks": busy_work()}
+
+    return TestClient(app)
+
+
+def test_header_profiles_one_request_and_admin_lists_it():
+    with tempfile.TemporaryDirectory() as tmp:
+        profile_store.dir = Path(tmp)
+        settings.PROFILING_TOKEN = "secret"
+        auth = {"X-Profile-Token": "secret"}
+        try:
+            client = _client()
+            assert "X-Profile-Id" not in client.get("/work").headers
+            assert client.get("/api/v1/admin/profiles", headers=auth).json()["profiles"] == []
+
+            response = client.get("/work", headers={"X-Profile": "memory", **auth})
+            profile_id = response.headers["X-Profile-Id"]
+
+            (meta,) = client.get("/api/v1/admin/profiles", headers=auth).json()["profiles"]
+            assert meta["id"] == profile_id
+            assert meta["route"] == "/work" and meta["status"] == 200
+            assert meta["samples"] > 0 and meta["has_memory"]
+
+            folded = client.get(f"/api/v1/admin/profiles/{profile_id}", headers=auth).text
+            assert "busy_work (test_profiling.py" in folded
+            assert all(line.rsplit(" ", 1)[1].isdigit() for line in folded.splitlines())
+
+            memory = client.get(f"/api/v1/admin/profiles/{profile_id}", params={"kind": "memory"}, headers=auth).json()
+            assert memory["peak_kb"] >= memory["net_kb"] >= 256
+            assert any("test_profiling.py" in entry["where"] for entry in memory["top"])
+
+            assert client.get("/api/v1/admin/profiles/..%2F..%2Fetc", headers=auth).status_code == 404
+        finally:
+            settings.PROFILING_TOKEN = None
+
+
+def test_header_and_admin_disabled_without_token():
+    with tempfile.TemporaryDirectory() as tmp:
+        profile_store.dir = Path(tmp)
+        client = _client()
+        assert "X-Profile-Id" not in client.get("/work", headers={"X-Profile": "1"}).headers
+        assert "X-Profile-Id" not in client.get("/work", headers={"X-Profile": "1", "X-Profile-Token": ""}).headers
+        response = client.get("/api/v1/admin/profiles")
+        assert response.status_code == 403 and "PROFILING_TOKEN" in response.json()["detail"]
+
+
+def test_token_required_when_configured():
+    with tempfile.TemporaryDirectory() as tmp:
+        profile_store.dir = Path(tmp)
+        settings.PROFILING_TOKEN = "secret"
+        try:
+            client = _client()
+            assert "X-Profile-Id" not in client.get("/work", headers={"X-Profile": "1"}).headers
+            assert client.get("/api/v1/admin/profiles").status_code == 403
+
+            headers = {"X-Profile": "1", "X-Profile-Token": "secret"}
+            assert "X-Profile-Id" in client.get("/work", headers=headers).headers
+            assert len(client.get("/api/v1/admin/profiles", headers=headers).json()["profiles"]) == 1
+        finally:
+            settings.PROFILING_TOKEN = None
+
+
+if __name__ == "__main__":
+    test_header_profiles_one_request_and_admin_lists_it()
+    test_header_and_admin_disabled_without_token()
+    test_token_required_when_configured()
+    print("✅ Profiling tests passed")
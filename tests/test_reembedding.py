@@ -0,0 +1,230 @@
+import sys
+import os
+import tempfile
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.getcwd())
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    VectorParams, Distance, PointStruct, PointIdsList, DeleteAlias, DeleteAliasOperation,
+)
+
+from app.services.model_versions import VectorNames, model_version, vector_name
+from app.services.reembedding import Reembedder
+from app.services.vector_index import (
+    LocalVectorClient, alias_target, ensure_collection, promote_legacy, stored_vector_names, switch_alias,
+)
+
+DIM = 8
+
+
+def fake_embed(version: str):
+    """Deterministic 'model': the vector depends on the source (payload seed) and the version."""
+    def embed(payloads):
+        return [
+            np.random.default_rng([p["seed"], len(version)]).normal(size=DIM).tolist() if "seed" in p else None
+            for p in payloads
+        ]
+    return embed
+
+
+def legacy_faces(client, n=30):
+    """A collection from before versioning: physical 'faces', one unnamed vector."""
+    client.create_collection("faces", vectors_config=VectorParams(size=DIM, distance=Distance.COSINE))
+    old = fake_embed("old")([{"seed": i} for i in range(n)])
+    client.upsert("faces", [
+        PointStruct(id=i + 1, vector=v, payload={"name": f"person_{i}", "seed": i}) for i, v in enumerate(old)
+    ])
+
+
+def test_legacy_collection_moves_behind_an_alias_with_named_vectors():
+    client = QdrantClient(":memory:")
+    legacy_faces(client)
+
+    result = Reembedder(client, "faces", DIM, "model-v2", fake_embed("model-v2"), batch=7).run()
+
+    assert result["switched"] and result["reembedded"] == 30 and result["missing"] == 0
+    assert alias_target(client, "faces") == "faces__model-v2"
+    assert stored_vector_names(client, "faces") == {"model-v2"}
+    query = fake_embed("model-v2")([{"seed": 4}])[0]
+    (hit,) = client.query_points("faces", query=query, using="model-v2", limit=1).points
+    assert hit.payload == {"name": "person_4", "seed": 4, "model_version": "model-v2"}
+
+
+def test_previous_vectors_are_kept_so_old_workers_survive_the_switch():
+    client = QdrantClient(":memory:")
+    legacy_faces(client)
+    Reembedder(client, "faces", DIM, "model-v2", fake_embed("model-v2")).run()
+    old_worker = VectorNames(client)
+    assert old_worker.stored("faces") == {"model-v2"}
+
+    result = Reembedder(client, "faces", DIM, "model-v3", fake_embed("model-v3"), keep_previous=True).run(
+        drop_previous=True
+    )
+
+    assert result["kept_vectors"] == ["model-v2"] and result["dropped_previous"]
+    assert not client.collection_exists("faces__model-v2")
+    assert stored_vector_names(client, "faces") == {"model-v2", "model-v3"}
+    for version in ("model-v2", "model-v3"):
+        query = fake_embed(version)([{"seed": 9}])[0]
+        (hit,) = client.query_points("faces", query=query, using=vector_name(version), limit=1).points
+        assert hit.payload["seed"] == 9 and hit.score > 0.99
+
+
+def test_writes_during_the_copy_are_caught_up_before_the_switch():
+    client = QdrantClient(":memory:")
+    legacy_faces(client, n=20)
+    embed = fake_embed("model-v2")
+    calls = []
+
+    def embed_while_serving(payloads):
+        if not calls:
+            # An enrollment, an edit and a deletion land on the live collection mid-copy
+            client.upsert("faces", [PointStruct(id=100, vector=[1.0] * DIM, payload={"name": "new", "seed": 100})])
+            client.set_payload("faces", payload={"notes": "edited"}, points=[2])
+            client.delete("faces", points_selector=PointIdsList(points=[1]))
+        calls.append(len(payloads))
+        return embed(payloads)
+
+    result = Reembedder(client, "faces", DIM, "model-v2", embed_while_serving, batch=5).run()
+
+    records = {p.id: p.payload for p in client.scroll("faces", limit=100)[0]}
+    assert 100 in records and 1 not in records and len(records) == 20
+    assert records[2]["notes"] == "edited"  # the batch holding it was read before the edit
+    assert result["deleted"] == 1 and result["payloads_synced"] == 1
+
+
+def test_missing_sources_block_the_switch_unless_allowed():
+    client = QdrantClient(":memory:")
+    legacy_faces(client, n=5)
+    client.upsert("faces", [PointStruct(id=50, vector=[1.0] * DIM, payload={"name": "photo deleted"})])
+
+    with pytest.raises(RuntimeError, match="could not be re-embedded"):
+        Reembedder(client, "faces", DIM, "model-v2", fake_embed("model-v2")).run()
+    # Still serving the untouched data, now from the legacy generation
+    assert alias_target(client, "faces") == "faces__legacy" and not client.collection_exists("faces__model-v2")
+    assert client.count("faces").count == 6
+
+    result = Reembedder(client, "faces", DIM, "model-v2", fake_embed("model-v2")).run(allow_missing=True)
+    assert result["switched"] and result["missing_ids"] == ["50"] and result["from"] == "faces__legacy"
+    assert client.count("faces").count == 5
+    # Rollback: the skipped point and the old vectors are still there
+    assert client.count("faces__legacy").count == 6
+
+
+def test_legacy_collection_is_kept_with_its_vectors_for_rollback():
+    client = QdrantClient(":memory:")
+    legacy_faces(client, n=10)
+    before = {p.id: p.vector for p in client.scroll("faces", limit=100, with_vectors=True)[0]}
+
+    Reembedder(client, "faces", DIM, "model-v2", fake_embed("model-v2")).run()
+
+    after = {p.id: p.vector for p in client.scroll("faces__legacy", limit=100, with_vectors=True)[0]}
+    assert after.keys() == before.keys()
+    assert all(np.allclose(after[pid], before[pid]) for pid in before)
+    switch_alias(client, "faces", "faces__legacy")  # Rolling back is an alias switch
+    assert stored_vector_names(client, "faces") is None
+
+
+def test_writes_racing_the_switch_reach_the_new_generation():
+    client = QdrantClient(":memory:")
+    legacy_faces(client, n=10)
+    promote_legacy(client, "faces")
+    switch = client.update_collection_aliases
+
+    def enroll_then_switch(change_aliases_operations, **kwargs):
+        # A worker enrolls through the alias after the last catch-up, just before it moves
+        client.upsert("faces", [PointStruct(id=200, vector=[1.0] * DIM, payload={"name": "late", "seed": 200})])
+        return switch(change_aliases_operations=change_aliases_operations, **kwargs)
+
+    client.update_collection_aliases = enroll_then_switch
+    result = Reembedder(client, "faces", DIM, "model-v2", fake_embed("model-v2")).run()
+
+    (point,) = client.retrieve("faces", ids=[200], with_payload=True)
+    assert point.payload["model_version"] == "model-v2"
+    assert client.count("faces").count == 11 and result["missing"] == 0
+
+
+def test_worker_starting_mid_promotion_aliases_the_legacy_generation():
+    client = QdrantClient(":memory:")
+    legacy_faces(client, n=4)
+    promote_legacy(client, "faces")
+    # The instant between deleting the legacy collection and creating the alias
+    client.update_collection_aliases(change_aliases_operations=[
+        DeleteAliasOperation(delete_alias=DeleteAlias(alias_name="faces"))
+    ])
+
+    assert not ensure_collection(client, "faces", "faces__model-v2", {"model-v2": DIM})
+    assert alias_target(client, "faces") == "faces__legacy" and client.count("faces").count == 4
+    assert not client.collection_exists("faces__model-v2")
+
+
+def test_stale_vector_names_are_reread_after_another_process_switched():
+    client = QdrantClient(":memory:")
+    legacy_faces(client, n=5)
+    worker = VectorNames(client)
+    assert worker.stored("faces") is None  # legacy: unnamed vector
+
+    version = model_version("faces")
+    Reembedder(client, "faces", DIM, version, fake_embed(version)).run()
+
+    # The cached legacy name makes the first (unnamed) query fail; retry re-reads it
+    points = worker.retry("faces", lambda: client.query_points(
+        "faces", query=[1.0] * DIM, using=worker.using("faces"), limit=1
+    ).points)
+    assert len(points) == 1 and worker.stored("faces") == {vector_name(version)}
+
+
+def test_embedded_index_reembeds_into_a_new_generation():
+    with tempfile.TemporaryDirectory() as tmp:
+        client = LocalVectorClient(tmp)
+        legacy_faces(client, n=12)
+
+        result = Reembedder(client, "faces", DIM, "model-v2", fake_embed("model-v2"), keep_previous=False).run()
+        assert result["switched"] and result["reembedded"] == 12
+
+        reopened = LocalVectorClient(tmp)
+        assert alias_target(reopened, "faces") == "faces__model-v2"
+        query = fake_embed("model-v2")([{"seed": 3}])[0]
+        (hit,) = reopened.query_points("faces", query=query, using="model-v2", limit=1).points
+        assert hit.payload["seed"] == 3 and hit.payload["model_version"] == "model-v2"
+        with pytest.raises(ValueError):
+            reopened.query_points("faces", query=query, limit=1)  # unnamed query against a named vector
+
+
+def test_admin_reembed_is_disabled_without_token():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.api import admin_endpoint
+    from app.core.config import settings
+
+    app = FastAPI()
+    app.include_router(admin_endpoint.router, prefix="/api/v1")
+    client = TestClient(app)
+    url = "/api/v1/admin/reembed/faces?drop_previous=true&allow_missing=true"
+
+    response = client.post(url)
+    assert response.status_code == 403 and "ADMIN_TOKEN" in response.json()["detail"]
+    settings.ADMIN_TOKEN = "secret"
+    try:
+        assert client.post(url, headers={"X-Admin-Token": "wrong"}).status_code == 403
+        assert client.post("/api/v1/admin/reembed/nope", headers={"X-Admin-Token": "secret"}).status_code == 404
+    finally:
+        settings.ADMIN_TOKEN = None
+
+
+if __name__ == "__main__":
+    test_legacy_collection_moves_behind_an_alias_with_named_vectors()
+    test_previous_vectors_are_kept_so_old_workers_survive_the_switch()
+    test_writes_during_the_copy_are_caught_up_before_the_switch()
+    test_missing_sources_block_the_switch_unless_allowed()
+    test_legacy_collection_is_kept_with_its_vectors_for_rollback()
+    test_writes_racing_the_switch_reach_the_new_generation()
+    test_worker_starting_mid_promotion_aliases_the_legacy_generation()
+    test_stale_vector_names_are_reread_after_another_process_switched()
+    test_embedded_index_reembeds_into_a_new_generation()
+    test_admin_reembed_is_disabled_without_token()
+    print("✅ Re-embedding tests passed")
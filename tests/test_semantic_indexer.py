@@ -0,0 +1,47 @@
+import sys
+import os
+import time
+
+sys.path.insert(0, os.getcwd())
+
+from app.services.semantic_indexer import SemanticIndexer
+
+
+class RecordingQueue:
+    def __init__(self):
+        self.jobs = []
+
+    def enqueue(self, kind, payload):
+        self.jobs.append((kind, payload))
+        return str(len(self.jobs))
+
+
+def test_burst_of_edits_coalesces_into_one_job():
+    queue = RecordingQueue()
+    indexer = SemanticIndexer(queue=queue, debounce=0.2, batch_size=2)
+
+    for _ in range(5):
+        indexer.schedule("Swarnanjali")
+    indexer.schedule("Meera", "Ravi")
+    time.sleep(0.1)
+    assert queue.jobs == []  # still inside the debounce window
+
+    time.sleep(0.4)
+    names = sorted(n for _, payload in queue.jobs for n in payload["names"])
+    assert names == ["Meera", "Ravi", "Swarnanjali"]
+    assert all(kind == "semantic_reindex" for kind, _ in queue.jobs)
+    assert len(queue.jobs) == 2  # batch_size=2
+
+
+def test_flush_enqueues_pending_immediately():
+    queue = RecordingQueue()
+    indexer = SemanticIndexer(queue=queue, debounce=60)
+    indexer.schedule("Meera")
+    indexer.flush()
+    assert queue.jobs == [("semantic_reindex", {"names": ["Meera"]})]
+
+
+if __name__ == "__main__":
+    test_burst_of_edits_coalesces_into_one_job()
+    test_flush_enqueues_pending_immediately()
+    print("✅ Semantic indexer tests passed")
@@ -0,0 +1,82 @@
+import sys
+import os
+import json
+import tempfile
+
+sys.path.insert(0, os.getcwd())
+
+import numpy as np
+
+from app.core.config import Settings
+from scripts.evaluate_thresholds import (
+    load_identities, make_pairs, roc_curve, equal_error, auc, threshold_for_far, evaluate,
+)
+
+
+def test_roc_eer_and_far_target_on_known_scores():
+    genuine = np.array([0.5, 0.6, 0.7, 0.8, 0.9])
+    impostor = np.array([0.1, 0.2, 0.3, 0.4, 0.55])
+    thresholds, far, frr = roc_curve(genuine, impostor)
+
+    assert far[0] == 1.0 and frr[0] == 0.0  # accept everything
+    assert far[-1] == 0.0 and frr[-1] == 1.0  # reject everything
+    assert equal_error(thresholds, far, frr) == {"threshold": 0.5, "eer": 0.2}
+    assert threshold_for_far(thresholds, far, 0.0) == 0.55  # strictly above the worst impostor
+    assert auc(genuine, impostor) == 0.96  # 24 of 25 pairs ranked right
+
+
+def test_evaluate_separates_clustered_identities():
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(6, 32))
+    vectors = np.concatenate([c + 0.3 * rng.normal(size=(5, 32)) for c in centers])
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    labels = np.repeat([f"person_{i}" for i in range(6)], 5)
+    embedded = {"vectors": vectors, "labels": labels, "latencies": [1.0] * 31, "failures": ["blurry.jpg"]}
+
+    genuine, impostor = make_pairs(labels.tolist(), max_genuine_per_identity=0, impostors=1000)
+    assert len(genuine) == 6 * 10 and len(impostor) == 375  # every cross-identity pair exists only once
+
+    report = evaluate(embedded, current=0.99, target_far=0.01, max_genuine=0, impostors=1000)
+    assert report["auc"] > 0.99 and report["eer"]["eer"] < 0.05
+    assert report["failure_to_embed"] == round(1 / 31, 4)
+    assert report["recommended"]["far"] <= 0.01
+    assert report["recommended"]["gallery"]["identified"] > report["current"]["gallery"]["identified"]
+    assert report["current"]["frr"] == 1.0  # a too-strict threshold rejects everyone
+
+
+def test_identities_take_names_from_metadata():
+    with tempfile.TemporaryDirectory() as tmp:
+        for folder, meta in (("id001", {"name": "Asha"}), ("id002", None)):
+            os.makedirs(os.path.join(tmp, folder))
+            for i in range(2):
+                open(os.path.join(tmp, folder, f"face_{i}.jpg"), "wb").close()
+            if meta:
+                with open(os.path.join(tmp, folder, "metadata.json"), "w") as f:
+                    json.dump(meta, f)
+        identities = load_identities(tmp, (".jpg",))
+
+    assert sorted(identities) == ["Asha", "id002"]
+    assert len(identities["Asha"]) == 2
+
+
+def test_thresholds_file_applies_unless_set_in_environment():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "thresholds.json")
+        with open(path, "w") as f:
+            json.dump({"FACE_MATCH_THRESHOLD": 0.47, "OBJECT_MATCH_THRESHOLD": 0.55, "LLM_BACKEND": "groq"}, f)
+
+        settings = Settings(OBJECT_MATCH_THRESHOLD=0.7)
+        applied = settings.load_thresholds(path)
+
+    assert applied == {"FACE_MATCH_THRESHOLD": 0.47}
+    assert settings.FACE_MATCH_THRESHOLD == 0.47
+    assert settings.OBJECT_MATCH_THRESHOLD == 0.7
+    assert settings.LLM_BACKEND != "groq"
+
+
+if __name__ == "__main__":
+    test_roc_eer_and_far_target_on_known_scores()
+    test_evaluate_separates_clustered_identities()
+    test_identities_take_names_from_metadata()
+    test_thresholds_file_applies_unless_set_in_environment()
+    print("✅ Threshold evaluation tests passed")
@@ -0,0 +1,58 @@
+import sys
+import os
+import tempfile
+import time
+
+sys.path.insert(0, os.getcwd())
+
+from app.services.tts_service import AudioCache, greeting
+
+
+def test_cache_is_keyed_by_text_and_voice():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = AudioCache(tmp, max_bytes=10_000)
+        key = cache.key("Hello Meera.", "en-IN-NeerjaNeural")
+        assert key != cache.key("Hello Meera.", "en-IN-PrabhatNeural")
+        assert cache.get(key) is None
+        cache.put(key, b"mp3-bytes")
+        assert cache.get(key) == b"mp3-bytes"
+        assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_evicted_first():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = AudioCache(tmp, max_bytes=2500)
+        cache.put("a", b"x" * 1000)
+        time.sleep(0.02)
+        cache.put("b", b"x" * 1000)
+        time.sleep(0.02)
+        cache.get("a")  # 'a' is now more recent than 'b'
+        time.sleep(0.02)
+        cache.put("c", b"x" * 1000)
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None and cache.get("c") is not None
+        # Survives a restart with the same accounting
+        assert AudioCache(tmp, max_bytes=2500)._size == 2000
+
+
+def test_directory_is_created_by_the_first_write():
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = os.path.join(tmp, "tts_cache")
+        cache = AudioCache(directory, max_bytes=10_000)
+        assert cache.get("a") is None and not os.path.exists(directory)
+        cache.put("a", b"mp3-bytes")
+        assert os.listdir(directory) == ["a.mp3"]
+
+
+def test_greeting_text():
+    assert greeting("Meera", "Daughter") == "Hello Meera. You are a Daughter."
+    assert greeting("Meera", "Daughter", "She visits on Sundays.") == "Hello Meera. She visits on Sundays."
+
+
+if __name__ == "__main__":
+    test_cache_is_keyed_by_text_and_voice()
+    test_least_recently_used_evicted_first()
+    test_directory_is_created_by_the_first_write()
+    test_greeting_text()
+    print("✅ TTS cache tests passed")
@@ -0,0 +1,97 @@
+import sys
+import os
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.getcwd())
+
+from qdrant_client.models import VectorParams, Distance, PointStruct, Filter, FieldCondition, MatchValue
+from app.services.vector_index import LocalVectorClient
+
+
+def _client_with_points(path, n=50, dim=8):
+    client = LocalVectorClient(path)
+    client.create_collection("faces", vectors_config=VectorParams(size=dim, distance=Distance.COSINE))
+    rng = np.random.default_rng(0)
+    vecs = rng.normal(size=(n, dim))
+    client.upsert("faces", [
+        PointStruct(id=f"p{i}", vector=v.tolist(), payload={"name": f"person_{i % 5}", "i": i})
+        for i, v in enumerate(vecs)
+    ])
+    return client, vecs
+
+
+def test_exact_search_matches_numpy():
+    with tempfile.TemporaryDirectory() as tmp:
+        client, vecs = _client_with_points(tmp)
+        res = client.query_points("faces", query=vecs[7].tolist(), limit=3).points
+        assert res[0].id == "p7"
+        assert abs(res[0].score - 1.0) < 1e-5
+        assert res[0].score >= res[1].score >= res[2].score
+
+
+def test_filter_and_persistence():
+    with tempfile.TemporaryDirectory() as tmp:
+        client, vecs = _client_with_points(tmp, n=2000)
+        flt = Filter(must=[FieldCondition(key="name", match=MatchValue(value="person_3"))])
+        res = client.query_points("faces", query=vecs[0].tolist(), query_filter=flt, limit=10).points
+        assert all(p.payload["name"] == "person_3" for p in res)
+
+        client.close()
+        reopened = LocalVectorClient(tmp)
+        res = reopened.query_points("faces", query=vecs[1999].tolist(), limit=1).points
+        assert res[0].id == "p1999"
+        records, _ = reopened.scroll("faces", limit=5000)
+        assert len(records) == 2000
+
+
+def test_uncommitted_log_entries_are_dropped_on_load():
+    with tempfile.TemporaryDirectory() as tmp:
+        client, vecs = _client_with_points(tmp, n=10)
+        client.close()
+        # A crash mid-upsert: the payload log has a row that meta.json never counted, and a torn line
+        with open(os.path.join(tmp, "faces", "payloads.jsonl"), "a", encoding="utf-8") as f:
+            f.write('{"id": "ghost", "row": 10, "payload": {"name": "ghost"}}\n{"id": "p11", "ro')
+
+        reopened = LocalVectorClient(tmp)
+        assert reopened.count("faces").count == 10 and not reopened.retrieve("faces", ids=["ghost"])
+        reopened.upsert("faces", [PointStruct(id="late", vector=vecs[0].tolist(), payload={"name": "late"})])
+        reopened.close()
+
+        again = LocalVectorClient(tmp)
+        records, _ = again.scroll("faces", limit=100)
+        assert len(records) == 11 and "ghost" not in {r.id for r in records}
+        (late,) = again.retrieve("faces", ids=["late"])
+        assert late.payload == {"name": "late"}
+
+
+def test_update_params_follow_settings_per_vector():
+    from qdrant_client.models import Disabled, ScalarQuantization
+    from app.core.config import settings
+    from app.services.vector_index import collection_update_params
+
+    saved = settings.QDRANT_QUANTIZATION, settings.QDRANT_ON_DISK_VECTORS, settings.QDRANT_HNSW_M
+    try:
+        settings.QDRANT_QUANTIZATION, settings.QDRANT_ON_DISK_VECTORS, settings.QDRANT_HNSW_M = "scalar", True, 32
+        legacy = collection_update_params()
+        assert list(legacy["vectors_config"]) == [""] and legacy["vectors_config"][""].on_disk
+        assert isinstance(legacy["quantization_config"], ScalarQuantization)
+        assert legacy["hnsw_config"].m == 32
+
+        named = collection_update_params({"facenet512-keras", "old-model"})
+        assert set(named["vectors_config"]) == {"facenet512-keras", "old-model"}
+
+        # Turning quantization off has to be explicit, None would leave it as it is
+        settings.QDRANT_QUANTIZATION = "none"
+        assert collection_update_params()["quantization_config"] == Disabled.DISABLED
+    finally:
+        settings.QDRANT_QUANTIZATION, settings.QDRANT_ON_DISK_VECTORS, settings.QDRANT_HNSW_M = saved
+
+
+if __name__ == "__main__":
+    test_exact_search_matches_numpy()
+    test_filter_and_persistence()
+    test_uncommitted_log_entries_are_dropped_on_load()
+    test_update_params_follow_settings_per_vector()
+    print("✅ Vector index tests passed")
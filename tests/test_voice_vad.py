@@ -0,0 +1,37 @@
+import sys
+import os
+import numpy as np
+
+sys.path.insert(0, os.getcwd())
+
+from app.services.voice_service import detect_speech, SAMPLE_RATE
+
+
+def tone(seconds, amplitude=0.5):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def silence(seconds):
+    rng = np.random.default_rng(0)
+    return (0.001 * rng.standard_normal(int(seconds * SAMPLE_RATE))).astype(np.float32)
+
+
+def test_speech_split_on_long_pauses_only():
+    audio = np.concatenate([silence(1), tone(1), silence(0.2), tone(1), silence(1.5), tone(0.8), silence(1)])
+    chunks = detect_speech(audio, min_silence_ms=400, padding_ms=0)
+    spans = [(round(s / SAMPLE_RATE, 1), round(e / SAMPLE_RATE, 1)) for s, e in chunks]
+    # The 0.2 s pause stays inside the first chunk, the 1.5 s one splits
+    assert spans == [(1.0, 3.2), (4.7, 5.5)]
+
+
+def test_long_speech_is_capped():
+    chunks = detect_speech(np.concatenate([silence(0.5), tone(10)]), max_chunk_s=3, padding_ms=0)
+    assert len(chunks) >= 4
+    assert all((e - s) / SAMPLE_RATE <= 3.01 for s, e in chunks)
+
+
+if __name__ == "__main__":
+    test_speech_split_on_long_pauses_only()
+    test_long_speech_is_capped()
+    print("✅ VAD tests passed")